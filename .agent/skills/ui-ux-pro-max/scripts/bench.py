@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark - Reproducible timings for search, routing, design-system generation and output
+
+Each case runs a fixed query set for --warmup untimed and --iterations timed
+samples and reports percentiles in milliseconds. "cold" cases drop every cached
+index before each sample; "warm" cases keep the indexes but clear the ranking
+LRU, so every sample still scores. --compare checks the run against a stored
+baseline and exits 1 when a case's p50 regresses past --threshold.
+--data-dir runs the same cases over another corpus (see synth.py) and --memory
+adds each case's peak traced allocation, for latency and memory scaling curves.
+The import.search case times `python -X importtime -c "import search"` in a
+fresh interpreter per sample (bytecode cached by the warm-up runs), and
+--import-budget fails the run when its p50 exceeds the budget.
+
+Usage:
+    python bench.py                              # table of every case
+    python bench.py --filter search.warm -i 50   # only matching cases
+    python bench.py --out baseline.json          # store a baseline
+    python bench.py --compare baseline.json --threshold 0.2
+    python bench.py --data-dir /tmp/corpus-100k --memory --out 100k.json
+    python bench.py --filter import --import-budget 25
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import core
+import joins
+import palette
+from core import CSV_CONFIG, AVAILABLE_STACKS, search, search_stack, detect_domain
+from design_system import (DesignSystemGenerator, persist_design_system, format_ascii_box, format_markdown,
+                           format_master_md, format_page_override_md)
+from search import format_output, write_output
+
+
+# ============ CONFIGURATION ============
+ITERATIONS = 20
+WARMUP = 3
+THRESHOLD = 0.2       # allowed p50 slowdown against the baseline (0.2 = 20%)
+MIN_DELTA_MS = 0.05   # slowdowns smaller than this are timer noise, never failures
+
+# Fixed query set: a close match, a broad query and a typo per domain
+QUERIES = {
+    "style": ["glassmorphism dark", "minimal clean professional", "brutalsm bold"],
+    "color": ["fintech trust blue", "beauty spa calm", "gaming neon"],
+    "chart": ["trend over time", "compare categories", "realtime dashbord"],
+    "landing": ["hero testimonial pricing", "saas conversion", "waitlist"],
+    "product": ["saas dashboard", "ecommerce luxury", "helthcare app"],
+    "ux": ["animation accessibility", "touch target mobile", "scrol performance"],
+    "typography": ["elegant luxury serif", "modern tech sans", "playful rounded"],
+    "icons": ["navigation arrow", "user profile", "setings gear"],
+    "react": ["useEffect waterfall", "bundle size dynamic import", "rerender memo"],
+    "web": ["aria focus", "form input type", "virtualize long list"],
+}
+STACK_QUERIES = ["form validation", "responsive layout", "accessibility focus", "state management"]
+DESIGN_QUERIES = ["SaaS dashboard", "beauty spa wellness", "fintech crypto app", "luxury ecommerce"]
+PAGE = "dashboard"
+
+IMPORT_MODULE = "search"  # the CLI entry point: what every one-shot run pays before searching
+IMPORT_BUDGET_MS = 25.0   # default --import-budget for its cumulative import time (p50)
+IMPORT_SLOWEST = 10       # modules listed by own import time
+
+
+# ============ CASES ============
+def _cold():
+    """Drop every cached index, join graph and palette engine"""
+    with core._INDEX_LOCK:
+        core._INDEX_CACHE.clear()
+    joins._GRAPH = None
+    palette._ENGINE = None
+
+
+def _warm():
+    """Keep the indexes but empty their ranking LRUs so each sample scores again"""
+    with core._INDEX_LOCK:
+        indexes = list(core._INDEX_CACHE.values())
+    for index in indexes:
+        with index._rankings_lock:
+            index._rankings.clear()
+
+
+def _cycle(items):
+    """Callable returning the items round-robin, one per call"""
+    state = {"i": -1}
+
+    def next_item():
+        state["i"] = (state["i"] + 1) % len(items)
+        return items[state["i"]]
+    return next_item
+
+
+def cases():
+    """[(name, setup, run)]: setup runs untimed before every sample, run is timed"""
+    found = []
+    for domain, queries in QUERIES.items():
+        query = _cycle(queries)
+        found.append((f"search.cold:{domain}", _cold, lambda d=domain, q=query: search(q(), d)))
+        found.append((f"search.warm:{domain}", _warm, lambda d=domain, q=query: search(q(), d)))
+    for stack in AVAILABLE_STACKS:
+        query = _cycle(STACK_QUERIES)
+        found.append((f"stack.cold:{stack}", _cold, lambda s=stack, q=query: search_stack(q(), s)))
+        found.append((f"stack.warm:{stack}", _warm, lambda s=stack, q=query: search_stack(q(), s)))
+
+    every_query = _cycle([q for queries in QUERIES.values() for q in queries])
+    found.append(("detect_domain", None, lambda: detect_domain(every_query())))
+
+    design_query = _cycle(DESIGN_QUERIES)
+    found.append(("generate.cold", _cold, lambda: DesignSystemGenerator().generate(design_query())))
+    found.append(("generate.warm", _warm, lambda: DesignSystemGenerator().generate(design_query())))
+
+    # Output cases render one fixed design system and search result, built on first use
+    fixtures = {}
+
+    def fixture(name):
+        if not fixtures:
+            fixtures["design_system"] = DesignSystemGenerator().generate(DESIGN_QUERIES[0], "Bench")
+            fixtures["result"] = search(QUERIES["style"][0], "style", 5)
+        return fixtures[name]
+
+    output_dir = tempfile.mkdtemp(prefix="ui-pro-max-bench-")
+    found += [
+        ("persist", None, lambda: persist_design_system(fixture("design_system"), None, output_dir)),
+        ("persist.page", None, lambda: persist_design_system(fixture("design_system"), PAGE, output_dir, PAGE)),
+        ("format.ascii_box", None, lambda: format_ascii_box(fixture("design_system"))),
+        ("format.markdown", None, lambda: format_markdown(fixture("design_system"))),
+        ("format.master_md", None, lambda: format_master_md(fixture("design_system"))),
+        ("format.page_override_md", None, lambda: format_page_override_md(fixture("design_system"), PAGE, PAGE)),
+        ("format.search_output", None, lambda: format_output(fixture("result"))),
+        ("format.budgeted_output", None, lambda: write_output(fixture("result"), 1600, io.StringIO())),
+    ]
+    return found, output_dir
+
+
+# ============ MEASUREMENT ============
+def percentile(samples, pct):
+    """Linear-interpolated percentile of sorted samples"""
+    pos = (len(samples) - 1) * pct / 100
+    low = int(pos)
+    high = min(low + 1, len(samples) - 1)
+    return samples[low] + (samples[high] - samples[low]) * (pos - low)
+
+
+def measure(setup, run, iterations=ITERATIONS, warmup=WARMUP):
+    """Timing summary in milliseconds over iterations samples after warmup runs"""
+    for _ in range(warmup):
+        if setup:
+            setup()
+        run()
+    samples = []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - start) * 1000)
+    return _summary(samples)
+
+
+def _summary(samples):
+    """Percentiles in milliseconds of unsorted samples"""
+    samples = sorted(samples)
+    return {
+        "samples": len(samples),
+        "mean": round(sum(samples) / len(samples), 4),
+        "min": round(samples[0], 4),
+        "p50": round(percentile(samples, 50), 4),
+        "p90": round(percentile(samples, 90), 4),
+        "p99": round(percentile(samples, 99), 4),
+        "max": round(samples[-1], 4),
+    }
+
+
+def _import_time(module):
+    """({name: (self ms, cumulative ms)}, module's cumulative ms) from one `python -X importtime` run"""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # time imports as installed, from cached bytecode
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                          capture_output=True, text=True, check=True)
+    modules, total = {}, None
+    for line in proc.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package", nesting shown by indentation
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        own_ms, cumulative_ms = int(own) / 1000, int(cumulative) / 1000
+        modules[name.strip()] = (own_ms, cumulative_ms)
+        if name == f" {module}":
+            total = cumulative_ms
+    return modules, total
+
+
+def import_times(module=IMPORT_MODULE, iterations=ITERATIONS, warmup=WARMUP):
+    """(timing summary of module's cumulative import ms, slowest modules by own median ms)"""
+    for _ in range(max(warmup, 1)):
+        _import_time(module)
+    totals, own = [], {}
+    for _ in range(iterations):
+        modules, total = _import_time(module)
+        totals.append(total)
+        for name, (own_ms, _) in modules.items():
+            own.setdefault(name, []).append(own_ms)
+    medians = {name: round(percentile(sorted(ms), 50), 3) for name, ms in own.items()}
+    slowest = sorted(medians.items(), key=lambda item: -item[1])[:IMPORT_SLOWEST]
+    return _summary(totals), [{"module": name, "self_ms": ms} for name, ms in slowest]
+
+
+def peak_memory(setup, run):
+    """Peak KiB traced by tracemalloc during one run (after an untimed setup)"""
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        run()
+        return round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmarks(iterations=ITERATIONS, warmup=WARMUP, name_filter=None, memory=False):
+    """{"meta": ..., "results": {case: timing summary}} for every case matching name_filter"""
+    found, output_dir = cases()
+    results, imports = {}, None
+    try:
+        name = f"import.{IMPORT_MODULE}"
+        if not name_filter or name_filter in name:
+            results[name], imports = import_times(IMPORT_MODULE, iterations, warmup)
+        for name, setup, run in found:
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = measure(setup, run, iterations, warmup)
+            if memory:
+                results[name]["peak_kb"] = peak_memory(setup, run)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    meta = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "warmup": warmup,
+        "data_dir": str(core.DATA_DIR),
+    }
+    report = {"meta": meta, "results": results}
+    if imports:
+        report["imports"] = imports
+    return report
+
+
+def compare(report, baseline, threshold=THRESHOLD, min_delta_ms=MIN_DELTA_MS):
+    """[{"case", "baseline", "current", "change", "regressed"}] for cases in both runs, by p50"""
+    rows = []
+    for name, current in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before:
+            continue
+        change = current["p50"] / before["p50"] - 1 if before["p50"] else 0.0
+        rows.append({
+            "case": name,
+            "baseline": before["p50"],
+            "current": current["p50"],
+            "change": round(change, 4),
+            "regressed": change > threshold and current["p50"] - before["p50"] > min_delta_ms,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max benchmarks")
+    parser.add_argument("--iterations", "-i", type=int, default=ITERATIONS, help=f"Timed samples per case (default: {ITERATIONS})")
+    parser.add_argument("--warmup", "-w", type=int, default=WARMUP, help=f"Untimed runs before sampling (default: {WARMUP})")
+    parser.add_argument("--filter", "-k", default=None, metavar="TEXT", help="Only run cases whose name contains TEXT")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--out", metavar="FILE", default=None, help="Also write the JSON report to FILE (e.g. a baseline)")
+    parser.add_argument("--compare", metavar="FILE", default=None, help="Compare against a baseline report; exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help=f"Allowed p50 slowdown for --compare (default: {THRESHOLD})")
+    parser.add_argument("--data-dir", metavar="DIR", default=None, help="Read CSVs from DIR instead of the shipped data (e.g. a synth.py corpus)")
+    parser.add_argument("--memory", action="store_true", help="Also record each case's peak traced allocation (peak_kb)")
+    parser.add_argument("--import-budget", type=float, nargs="?", const=IMPORT_BUDGET_MS, default=None, metavar="MS",
+                        help=f"Exit 1 when import.{IMPORT_MODULE} p50 exceeds MS (default: {IMPORT_BUDGET_MS:g})")
+    args = parser.parse_args()
+    if args.iterations < 1 or args.warmup < 0:
+        parser.error("--iterations must be 1 or more and --warmup 0 or more")
+    if args.data_dir:
+        core.set_data_dir(args.data_dir)
+
+    report = run_benchmarks(args.iterations, args.warmup, args.filter, args.memory)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    regressions = []
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            rows = compare(report, json.load(f), args.threshold)
+        report["comparison"] = rows
+        regressions = [row for row in rows if row["regressed"]]
+    import_case = report["results"].get(f"import.{IMPORT_MODULE}")
+    over_budget = args.import_budget is not None and import_case and import_case["p50"] > args.import_budget
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"## Benchmarks ({report['meta']['iterations']} samples, {report['meta']['warmup']} warm-up, ms)\n")
+        print(f"{'case':<32} {'p50':>10} {'p90':>10} {'p99':>10} {'mean':>10}" + (f" {'peak KiB':>10}" if args.memory else ""))
+        for name, stats in report["results"].items():
+            peak = f" {stats['peak_kb']:>10.1f}" if args.memory else ""
+            print(f"{name:<32} {stats['p50']:>10.3f} {stats['p90']:>10.3f} {stats['p99']:>10.3f} {stats['mean']:>10.3f}{peak}")
+        if args.compare:
+            print(f"\n## Against {args.compare} (p50, threshold {args.threshold:.0%})\n")
+            for row in report["comparison"]:
+                flag = "  REGRESSED" if row["regressed"] else ""
+                print(f"{row['case']:<32} {row['baseline']:>10.3f} -> {row['current']:>10.3f} ({row['change']:+.1%}){flag}")
+        if report.get("imports"):
+            print(f"\n## Slowest imports under {IMPORT_MODULE} (own ms, median)\n")
+            for item in report["imports"]:
+                print(f"{item['module']:<32} {item['self_ms']:>10.3f}")
+
+    if over_budget:
+        print(f"\nimport.{IMPORT_MODULE} p50 {import_case['p50']:.3f} ms is over the {args.import_budget:g} ms budget", file=sys.stderr)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed past {args.threshold:.0%}", file=sys.stderr)
+    if regressions or over_budget:
+        sys.exit(1)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compatibility - Picks the style x color x typography combination that belongs together
+
+Every candidate row becomes a TF-IDF vector over its keyword, mood and best-for
+fields. Pairwise cosine similarities give three compatibility matrices, and each
+triple scores its search-rank priors plus the summed pairwise compatibility. With
+NumPy the whole (styles x colors x typography) tensor is scored in one broadcast;
+without it the same scores are computed in plain Python.
+
+Usage:
+    from compatibility import best_combinations
+    combos = best_combinations({"style": styles, "color": colors, "typography": fonts}, k=3)
+    combos[0]  # -> {"score": 2.41, "style": 0, "color": 0, "typography": 1}
+"""
+
+from math import log, sqrt
+from core import BM25
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+
+# ============ CONFIGURATION ============
+DOMAINS = ["style", "color", "typography"]
+
+# Fields describing what a row is for; shared words across domains signal a fit
+COMPAT_FIELDS = {
+    "style": ["Style Category", "Keywords", "Best For"],
+    "color": ["Product Type", "Notes"],
+    "typography": ["Mood/Style Keywords", "Best For", "Category"],
+}
+
+# A rank-r candidate contributes 1 / (1 + r); compatibility adds up to 3 x COMPAT_WEIGHT
+COMPAT_WEIGHT = 0.5
+
+
+# ============ TERM VECTORS ============
+def _term_vectors(candidates):
+    """L2-normalised TF-IDF dicts per domain, IDF taken over all candidate rows"""
+    docs = {domain: [BM25.tokenize(" ".join(str(row.get(col, "")) for col in COMPAT_FIELDS[domain]))
+                     for row in candidates[domain]] for domain in DOMAINS}
+    df = {}
+    for domain in DOMAINS:
+        for tokens in docs[domain]:
+            for token in set(tokens):
+                df[token] = df.get(token, 0) + 1
+    n = sum(len(docs[domain]) for domain in DOMAINS)
+
+    vectors = {}
+    for domain in DOMAINS:
+        vectors[domain] = []
+        for tokens in docs[domain]:
+            vec = {}
+            for token in tokens:
+                vec[token] = vec.get(token, 0) + log(1 + n / df[token])
+            norm = sqrt(sum(w * w for w in vec.values())) or 1
+            vectors[domain].append({token: w / norm for token, w in vec.items()})
+    return vectors
+
+
+def _priors(size):
+    """Search-rank prior for each candidate position"""
+    return [1 / (1 + rank) for rank in range(size)]
+
+
+# ============ SCORING ============
+def _score_numpy(vectors):
+    """Score tensor of shape (styles, colors, typography)"""
+    vocab = {}
+    for domain in DOMAINS:
+        for vec in vectors[domain]:
+            for token in vec:
+                vocab.setdefault(token, len(vocab))
+
+    mats = {}
+    for domain in DOMAINS:
+        mat = np.zeros((len(vectors[domain]), max(len(vocab), 1)))
+        for i, vec in enumerate(vectors[domain]):
+            for token, weight in vec.items():
+                mat[i, vocab[token]] = weight
+        mats[domain] = mat
+
+    s, c, t = mats["style"], mats["color"], mats["typography"]
+    compat = (s @ c.T)[:, :, None] + (s @ t.T)[:, None, :] + (c @ t.T)[None, :, :]
+    prior = (np.array(_priors(len(s)))[:, None, None]
+             + np.array(_priors(len(c)))[None, :, None]
+             + np.array(_priors(len(t)))[None, None, :])
+    return prior + COMPAT_WEIGHT * compat
+
+
+def _cosine(a, b):
+    """Dot product of two normalised sparse vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(w * b.get(token, 0.0) for token, w in a.items())
+
+
+def _score_python(vectors):
+    """Same scores as _score_numpy, as (score, i, j, l) tuples in i, j, l order"""
+    s, c, t = vectors["style"], vectors["color"], vectors["typography"]
+    sc = [[_cosine(x, y) for y in c] for x in s]
+    st = [[_cosine(x, y) for y in t] for x in s]
+    ct = [[_cosine(x, y) for y in t] for x in c]
+    ps, pc, pt = _priors(len(s)), _priors(len(c)), _priors(len(t))
+    return [(ps[i] + pc[j] + pt[l] + COMPAT_WEIGHT * (sc[i][j] + st[i][l] + ct[j][l]), i, j, l)
+            for i in range(len(s)) for j in range(len(c)) for l in range(len(t))]
+
+
+def best_combinations(candidates, k=1):
+    """Top-k (style, color, typography) index triples over {domain: ranked candidate rows}.
+
+    Ties keep the lower search ranks (style first, then color, then typography).
+    """
+    if any(not candidates.get(domain) for domain in DOMAINS):
+        return []
+    vectors = _term_vectors(candidates)
+
+    if np is not None:
+        scores = _score_numpy(vectors)
+        # Stable sort over the flattened tensor keeps i, j, l order among equal scores
+        order = np.argsort(-scores, axis=None, kind="stable")[:k]
+        triples = [(float(scores.flat[idx]), *np.unravel_index(idx, scores.shape)) for idx in order]
+    else:
+        triples = sorted(_score_python(vectors), key=lambda x: -x[0])[:k]
+
+    return [{"score": round(score, 4), "style": int(i), "color": int(j), "typography": int(l)}
+            for score, i, j, l in triples]
@@ -5,64 +5,134 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import gc
+import heapq
+import os
 import re
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import wraps
+from bisect import bisect_left
 from pathlib import Path
-from math import log
-from collections import defaultdict
+from math import log, sqrt
+from collections import defaultdict, Counter, OrderedDict
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+import metrics
+# concurrent.futures, inspect, multiprocessing, pickle and tracemalloc are imported where
+# used: most calls are one-shot CLI runs, where import time is a large share of the total
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+# UI_PRO_MAX_DATA_DIR points every module at another set of CSVs (e.g. a synthetic corpus)
+DATA_DIR = Path(os.environ.get("UI_PRO_MAX_DATA_DIR") or Path(__file__).parent.parent / "data")
 MAX_RESULTS = 3
 
+# Auto-routing: a query also goes to runner-up domains whose best attainable
+# score is within ROUTE_MARGIN of the top domain (at most ROUTE_MAX_DOMAINS)
+ROUTE_MARGIN = 0.85
+ROUTE_MAX_DOMAINS = 2
+
+# Typo tolerance: tokens found in no CSV are corrected against each index's
+# vocabulary within this edit distance (the delete dictionary is built for it),
+# and a rewrite is kept only if it lifts the top score by CORRECTION_MARGIN
+MAX_EDIT_DISTANCE = 2
+CORRECTION_MARGIN = 0.1
+
+# Autocomplete: suggestions per call, and how many are precomputed for 1-2 character prefixes
+MAX_SUGGESTIONS = 8
+_SUGGEST_CACHE_K = 10
+
+# "More like this": neighbours kept per row in the similarity lists, which are
+# built with the index for domains marked "similar" (on first use elsewhere)
+SIMILAR_TOP_N = 10
+
+# Diversity re-ranking (MMR) picks from this many top BM25 candidates
+MMR_CANDIDATES = 20
+
+# Ranked candidate lists kept per index, so later pages of a query skip re-scoring
+RANKING_CACHE_SIZE = 64
+
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
+        "title_col": "Style Category",
+        "similar": True,
         "search_cols": ["Style Category", "Keywords", "Best For", "Type", "AI Prompt Keywords"],
+        "field_boosts": {"Style Category": 3.0, "Keywords": 2.0, "Best For": 1.5, "Type": 1.0, "AI Prompt Keywords": 0.5},
+        "facet_cols": ["Type", "Complexity", "Light Mode ✓", "Dark Mode ✓"],
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity", "AI Prompt Keywords", "CSS/Technical Keywords", "Implementation Checklist", "Design System Variables"]
     },
     "color": {
         "file": "colors.csv",
+        "title_col": "Product Type",
+        "similar": True,
         "search_cols": ["Product Type", "Notes"],
+        "field_boosts": {"Product Type": 3.0, "Notes": 1.0},
         "output_cols": ["Product Type", "Primary (Hex)", "Secondary (Hex)", "CTA (Hex)", "Background (Hex)", "Text (Hex)", "Notes"]
     },
     "chart": {
         "file": "charts.csv",
+        "title_col": "Data Type",
         "search_cols": ["Data Type", "Keywords", "Best Chart Type", "Accessibility Notes"],
+        "field_boosts": {"Data Type": 3.0, "Keywords": 2.0, "Best Chart Type": 2.0, "Accessibility Notes": 0.5},
+        "facet_cols": ["Interactive Level"],
         "output_cols": ["Data Type", "Keywords", "Best Chart Type", "Secondary Options", "Color Guidance", "Accessibility Notes", "Library Recommendation", "Interactive Level"]
     },
     "landing": {
         "file": "landing.csv",
+        "title_col": "Pattern Name",
+        "similar": True,
         "search_cols": ["Pattern Name", "Keywords", "Conversion Optimization", "Section Order"],
+        "field_boosts": {"Pattern Name": 3.0, "Keywords": 2.0, "Conversion Optimization": 1.0, "Section Order": 1.0},
         "output_cols": ["Pattern Name", "Keywords", "Section Order", "Primary CTA Placement", "Color Strategy", "Conversion Optimization"]
     },
     "product": {
         "file": "products.csv",
+        "title_col": "Product Type",
         "search_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Key Considerations"],
+        "field_boosts": {"Product Type": 3.0, "Keywords": 2.0, "Primary Style Recommendation": 1.0, "Key Considerations": 0.5},
         "output_cols": ["Product Type", "Keywords", "Primary Style Recommendation", "Secondary Styles", "Landing Page Pattern", "Dashboard Style (if applicable)", "Color Palette Focus"]
     },
     "ux": {
         "file": "ux-guidelines.csv",
+        "title_col": "Issue",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
+        "field_boosts": {"Category": 2.0, "Issue": 3.0, "Description": 1.0, "Platform": 1.0},
+        "facet_cols": ["Category", "Platform", "Severity"],
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
+        "title_col": "Font Pairing Name",
+        "similar": True,
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "field_boosts": {"Font Pairing Name": 3.0, "Category": 1.5, "Mood/Style Keywords": 2.0, "Best For": 1.5, "Heading Font": 1.0, "Body Font": 1.0},
+        "facet_cols": ["Category"],
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
+        "title_col": "Icon Name",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
+        "field_boosts": {"Category": 1.5, "Icon Name": 3.0, "Keywords": 2.0, "Best For": 1.0},
+        "facet_cols": ["Category"],
         "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
     },
     "react": {
         "file": "react-performance.csv",
+        "title_col": "Issue",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_boosts": {"Category": 1.5, "Issue": 3.0, "Keywords": 2.0, "Description": 1.0},
+        "facet_cols": ["Category", "Platform", "Severity"],
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "web": {
         "file": "web-interface.csv",
+        "title_col": "Issue",
         "search_cols": ["Category", "Issue", "Keywords", "Description"],
+        "field_boosts": {"Category": 1.5, "Issue": 3.0, "Keywords": 2.0, "Description": 1.0},
+        "facet_cols": ["Category", "Platform", "Severity"],
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     }
 }
@@ -85,16 +155,167 @@ STACK_CONFIG = {
 
 # Common columns for all stacks
 _STACK_COLS = {
+    "title_col": "Guideline",
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
+    "field_boosts": {"Category": 1.5, "Guideline": 3.0, "Description": 1.0, "Do": 1.0, "Don't": 1.0},
+    "facet_cols": ["Category", "Severity"],
     "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Metric label of each CSV: its domain, or stack:<name>
+_INDEX_LABELS = {
+    **{config["file"]: domain for domain, config in CSV_CONFIG.items()},
+    **{config["file"]: f"stack:{stack}" for stack, config in STACK_CONFIG.items()},
+}
+
+# Intent keywords per domain for auto-routing (substring matches on the lowercased query)
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+
+
+# ============ BITSETS ============
+def _bitset(indices, size):
+    """Python int bitset with the given row indices set"""
+    bits = bytearray((size + 7) // 8)
+    for idx in indices:
+        bits[idx >> 3] |= 1 << (idx & 7)
+    return int.from_bytes(bits, "little")
+
+
+def _bit_bytes(mask, size):
+    """Bitset as bytes for O(1) membership tests: bits[idx >> 3] >> (idx & 7) & 1"""
+    return mask.to_bytes((size + 7) // 8, "little")
+
+
+# ============ PROFILING HOOK ============
+_PROFILERS = ()
+_NO_STAGE = nullcontext()
+
+
+def add_profiler(profiler):
+    """Route profile_stage() to profiler too (anything with a stage(name) context manager)"""
+    global _PROFILERS
+    _PROFILERS = _PROFILERS + (profiler,)
+
+
+def remove_profiler(profiler):
+    """Stop routing profile_stage() to profiler"""
+    global _PROFILERS
+    _PROFILERS = tuple(p for p in _PROFILERS if p is not profiler)
+
+
+def profile_stage(name):
+    """Context manager timing one named stage when a profiler is installed, a no-op otherwise"""
+    if not _PROFILERS:
+        return _NO_STAGE
+    if len(_PROFILERS) == 1:
+        return _PROFILERS[0].stage(name)
+    stack = ExitStack()
+    for profiler in _PROFILERS:
+        stack.enter_context(profiler.stage(name))
+    return stack
+
+
+# ============ CALL OBSERVERS ============
+# Observers see each top-level search / generate call once it returns; calls made
+# inside it (e.g. the searches behind a design system) only add to its notes
+_OBSERVERS = ()
+_CALL = threading.local()
+
+
+def add_observer(observer):
+    """Call observer.observe(kind, params, result, elapsed_seconds, notes) after every top-level call"""
+    global _OBSERVERS
+    _OBSERVERS = _OBSERVERS + (observer,)
+
+
+def remove_observer(observer):
+    """Stop notifying observer"""
+    global _OBSERVERS
+    _OBSERVERS = tuple(o for o in _OBSERVERS if o is not observer)
+
+
+def call_notes():
+    """Notes dict of the observed call running on this thread, or None"""
+    return getattr(_CALL, "notes", None)
+
+
+def observed(kind):
+    """Decorator reporting each top-level call of the function to the observers"""
+    def decorate(func):
+        params_of = None
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            nonlocal params_of
+            if not _OBSERVERS or call_notes() is not None:
+                return func(*args, **kwargs)
+            if params_of is None:
+                from inspect import signature
+                params_of = signature(func).bind
+            _CALL.notes = notes = {}
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            finally:
+                _CALL.notes = None
+            elapsed = time.perf_counter() - start
+            params = params_of(*args, **kwargs).arguments
+            for observer in _OBSERVERS:
+                observer.observe(kind, params, result, elapsed, notes)
+            return result
+        return wrapper
+    return decorate
+
+
+# ============ METRICS ============
+# Families live in metrics.REGISTRY; SearchIndex binds its own series when built.
+# Index cache misses are index_builds_total; its hits (nearly every lookup) are not counted.
+_RANKING_CACHE = metrics.counter("ranking_cache_requests_total", "Ranking LRU lookups (one per search)", ["index", "result"])
+_ZERO_RESULTS = metrics.counter("zero_result_searches_total", "Searches returning no results", ["index"])
+_INDEX_BUILDS = metrics.counter("index_builds_total", "Index builds (first, or rebuild after the CSV changed), snapshot loads and shared-memory attaches", ["index", "reason"])
+_SCORE_SECONDS = metrics.histogram("score_seconds", f"BM25 scoring latency of uncached queries, timed on 1 in {metrics.SAMPLE_EVERY} per index", ["index"])
+_DOCS_SCORED = metrics.histogram("documents_scored", "Documents scored per uncached query, on the queries timed by score_seconds", ["index"], metrics.SIZE_BUCKETS)
+
+
+def _searches():
+    """searches_total per index: every search makes exactly one ranking lookup"""
+    totals = Counter()
+    for (label, _), series in list(_RANKING_CACHE.series.items()):
+        totals[(label,)] += series.value
+    return totals
+
+
+metrics.counter("searches_total", "Searches run against an index", ["index"], collect=_searches)
+
+
+def _index_label(filepath):
+    """Metric label for a CSV under DATA_DIR (its file stem elsewhere)"""
+    try:
+        return _INDEX_LABELS.get(filepath.relative_to(DATA_DIR).as_posix(), filepath.stem)
+    except ValueError:
+        return filepath.stem
+
 
 # ============ BM25 IMPLEMENTATION ============
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search.
+
+    Ranking order: score descending, equal scores in row order (lower index
+    first). Every scoring path must keep this tie-break; golden.py checks it.
+    """
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
@@ -104,16 +325,20 @@ class BM25:
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
+        self.postings = defaultdict(list)
+        self.term_upper = {}
         self.N = 0
 
-    def tokenize(self, text):
+    @staticmethod
+    def tokenize(text):
         """Lowercase, split, remove punctuation, filter short words"""
         text = re.sub(r'[^\w\s]', ' ', str(text).lower())
         return [w for w in text.split() if len(w) > 2]
 
     def fit(self, documents):
         """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
+        with profile_stage("tokenize"):
+            self.corpus = [self.tokenize(doc) for doc in documents]
         self.N = len(self.corpus)
         if self.N == 0:
             return
@@ -130,12 +355,27 @@ class BM25:
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
+        # Postings (doc, tf) plus each term's best single-document contribution
+        for idx, doc in enumerate(self.corpus):
+            term_freqs = defaultdict(int)
+            for word in doc:
+                term_freqs[word] += 1
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+            for word, tf in term_freqs.items():
+                self.postings[word].append((idx, tf))
+                contribution = self.idf[word] * tf * (self.k1 + 1) / (tf + norm)
+                if contribution > self.term_upper.get(word, 0):
+                    self.term_upper[word] = contribution
+
+    def score(self, query, candidates=None):
+        """Score all documents (or only those in the candidates bitset) against query, ties in row order"""
         query_tokens = self.tokenize(query)
         scores = []
+        allowed = _bit_bytes(candidates, self.N) if candidates is not None else None
 
         for idx, doc in enumerate(self.corpus):
+            if allowed is not None and not allowed[idx >> 3] >> (idx & 7) & 1:
+                continue
             score = 0
             doc_len = self.doc_lengths[idx]
             term_freqs = defaultdict(int)
@@ -152,67 +392,825 @@ class BM25:
 
             scores.append((idx, score))
 
+        # Stable sort: reverse=True keeps equal scores in row order
         return sorted(scores, key=lambda x: x[1], reverse=True)
 
+    def term_weight(self, word, idx, tf):
+        """BM25 weight of a term in one document, as it would add to that document's score"""
+        norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+        return self.idf[word] * tf * (self.k1 + 1) / (tf + norm)
+
+    def term_vectors(self):
+        """L2-normalised {term: BM25 weight} per document, read off the postings"""
+        vectors = [{} for _ in range(self.N)]
+        for word, postings in self.postings.items():
+            for idx, tf in postings:
+                vectors[idx][word] = self.term_weight(word, idx, tf)
+        for vec in vectors:
+            norm = sqrt(sum(w * w for w in vec.values())) or 1
+            for word in vec:
+                vec[word] /= norm
+        return vectors
+
+    def max_possible_score(self, query):
+        """Score ceiling for query: every token at its highest idf with tf -> infinity.
+
+        Tokens missing from the index count at the idf of an unseen term, so an
+        index that cannot match part of the query cannot normalise to 1.0.
+        """
+        unseen_idf = log((self.N + 0.5) / 0.5 + 1)
+        return sum(self.idf.get(token, unseen_idf) * (self.k1 + 1) for token in self.tokenize(query))
+
+    def upper_bound(self, query):
+        """Best score any document could reach for query, read from postings metadata only"""
+        return sum(self.term_upper.get(token, 0) for token in self.tokenize(query))
+
+
+class BM25F(BM25):
+    """BM25F: per-field term frequencies and length normalisation, combined with field boosts.
+
+    Each field's tf is normalised by that field's length against its average
+    length, then weighted by the field boost into a single pseudo-frequency per
+    (term, document). Pseudo-frequencies do not depend on the query, so fit()
+    stores them in the postings and score() only walks the query's postings.
+    """
+
+    def __init__(self, boosts, k1=1.5, b=0.75):
+        super().__init__(k1, b)
+        self.boosts = list(boosts)
+        self.field_lengths = []
+        self.avg_field_lengths = []
+
+    def fit(self, documents):
+        """Build index from documents given as one text per field, aligned with boosts"""
+        with profile_stage("tokenize"):
+            fields = [[self.tokenize(text) for text in doc] for doc in documents]
+        self.corpus = [[word for field in doc for word in field] for doc in fields]
+        self.N = len(self.corpus)
+        if self.N == 0:
+            return
+        self.doc_lengths = [len(doc) for doc in self.corpus]
+        self.avgdl = sum(self.doc_lengths) / self.N
+        self.field_lengths = [[len(field) for field in doc] for doc in fields]
+        self.avg_field_lengths = [sum(lengths[f] for lengths in self.field_lengths) / self.N or 1
+                                  for f in range(len(self.boosts))]
+
+        for doc in self.corpus:
+            for word in set(doc):
+                self.doc_freqs[word] += 1
+        for word, freq in self.doc_freqs.items():
+            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+
+        for idx, doc in enumerate(fields):
+            pseudo_tf = defaultdict(float)
+            for f, field in enumerate(doc):
+                if not field:
+                    continue
+                weight = self.boosts[f] / (1 - self.b + self.b * len(field) / self.avg_field_lengths[f])
+                for word in field:
+                    pseudo_tf[word] += weight
+            for word, tf in pseudo_tf.items():
+                self.postings[word].append((idx, tf))
+                contribution = self.idf[word] * tf * (self.k1 + 1) / (tf + self.k1)
+                if contribution > self.term_upper.get(word, 0):
+                    self.term_upper[word] = contribution
+
+    def term_weight(self, word, idx, tf):
+        """BM25F weight of a term in one document; tf is the stored pseudo-frequency"""
+        return self.idf[word] * tf * (self.k1 + 1) / (tf + self.k1)
+
+    def score(self, query, candidates=None):
+        """Score all documents (or only those in the candidates bitset) against query, ties in row order"""
+        scores = [0.0] * self.N
+        allowed = _bit_bytes(candidates, self.N) if candidates is not None else None
+        for token in self.tokenize(query):
+            if token in self.idf:
+                idf = self.idf[token]
+                for idx, tf in self.postings[token]:
+                    if allowed is None or allowed[idx >> 3] >> (idx & 7) & 1:
+                        scores[idx] += idf * tf * (self.k1 + 1) / (tf + self.k1)
+        ranked = enumerate(scores)
+        if allowed is not None:
+            ranked = ((idx, score) for idx, score in ranked if allowed[idx >> 3] >> (idx & 7) & 1)
+        return sorted(ranked, key=lambda x: x[1], reverse=True)
+
+
+# ============ SPELLING CORRECTION ============
+def _correction_distance(token, max_distance):
+    """Edit distance allowed for token: short tokens have too many near neighbours to correct safely"""
+    return min(max_distance, (len(token) - 1) // 4)
+
+
+def _edit_distance(a, b, max_distance):
+    """Optimal string alignment distance, or max_distance + 1 once it is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return min(prev[-1], max_distance + 1)
+
+
+class SymSpell:
+    """SymSpell-style delete dictionary: corrects a token with hash lookups, not a vocabulary scan"""
+
+    def __init__(self, frequencies, max_distance=MAX_EDIT_DISTANCE, prefix_length=7):
+        self.frequencies = frequencies
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.deletes = defaultdict(list)
+        for word in frequencies:
+            for variant in self._deletes(word[:prefix_length], max_distance):
+                self.deletes[variant].append(word)
+
+    @staticmethod
+    def _deletes(word, max_distance):
+        """word plus every string reachable from it by up to max_distance deletions"""
+        found = {word}
+        frontier = [word]
+        for _ in range(max_distance):
+            frontier = [w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))]
+            frontier = [w for w in frontier if w not in found]
+            found.update(frontier)
+        return found
+
+    def correct(self, token, max_distance=None):
+        """Closest known word to token (ties: higher frequency, then alphabetical), or None"""
+        if max_distance is None:
+            max_distance = self.max_distance
+        max_distance = _correction_distance(token, min(max_distance, self.max_distance))
+        if max_distance <= 0:
+            return None
+
+        best = None
+        seen = set()
+        for variant in self._deletes(token[:self.prefix_length], max_distance):
+            for word in self.deletes.get(variant, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = _edit_distance(token, word, max_distance)
+                if distance <= max_distance:
+                    key = (distance, -self.frequencies[word], word)
+                    if best is None or key < best:
+                        best = key
+        return best[2] if best else None
+
+
+# ============ AUTOCOMPLETE ============
+class PrefixIndex:
+    """Frequency-ranked completions over row titles and vocabulary (sorted keys + binary search).
+
+    Titles matching from their first word rank first, then titles matching from a
+    later word ("glass" finds "Liquid Glass"), then vocabulary terms. Within each
+    tier more frequent entries come first, then alphabetical. Results for 1-2
+    character prefixes, whose key ranges are widest, are precomputed.
+    """
+
+    def __init__(self, titles, frequencies):
+        items = []
+        for title, count in Counter(t.strip() for t in titles if t and t.strip()).items():
+            words = title.lower().split()
+            for i in range(len(words)):
+                items.append((" ".join(words[i:]), (min(i, 1), -count, title.lower(), title), "title", count))
+        for term, freq in frequencies.items():
+            items.append((term, (2, -freq, term, term), "term", freq))
+        items.sort(key=lambda x: x[0])
+        self.keys = [item[0] for item in items]
+        self.items = items
+
+        self.cached = {}
+        groups = defaultdict(list)
+        for item in items:
+            for length in (1, 2):
+                if len(item[0]) >= length:
+                    groups[item[0][:length]].append(item)
+        for prefix, group in groups.items():
+            self.cached[prefix] = self._rank(group, _SUGGEST_CACHE_K)
+
+    @staticmethod
+    def _rank(items, k):
+        # One entry per text (case-insensitive), keeping its best-ranked match
+        best = {}
+        for _, rank, kind, count in items:
+            if rank[2] not in best or rank < best[rank[2]][0]:
+                best[rank[2]] = (rank, kind, count)
+        return [{"text": rank[3], "type": kind, "count": count} for rank, kind, count in heapq.nsmallest(k, best.values())]
+
+    def suggest(self, prefix, k=MAX_SUGGESTIONS):
+        """Top-k completions for prefix"""
+        prefix = " ".join(prefix.lower().split())
+        if not prefix or k <= 0:
+            return []
+        if prefix in self.cached and k <= _SUGGEST_CACHE_K:
+            return self.cached[prefix][:k]
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + "\U0010ffff", lo)
+        return self._rank(self.items[lo:hi], k)
+
+
+# ============ KEYWORD MATCHING ============
+class KeywordMatcher:
+    """Aho-Corasick automaton that finds every keyword occurring in a text in one pass"""
+
+    def __init__(self, groups):
+        """groups: iterable of (owner, keywords); owners[kw] lists each owner once per listing"""
+        self.owners = defaultdict(list)
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+        for owner, keywords in groups:
+            for kw in keywords:
+                self.owners[kw].append(owner)
+        for kw in self.owners:
+            self._insert(kw)
+        self._link()
+
+    def _insert(self, keyword):
+        state = 0
+        for ch in keyword:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(())
+            state = nxt
+        self.out[state] = (keyword,)
+
+    def _link(self):
+        """Breadth-first pass setting failure links and merging outputs along them"""
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] += self.out[self.fail[nxt]]
+
+    def matches(self, text):
+        """Return the set of keywords that occur as substrings of text"""
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+_DOMAIN_MATCHER = KeywordMatcher(DOMAIN_KEYWORDS.items())
+
+
+# ============ INDEX CACHE ============
+_PROCESS_FIELDS = {"label", "_hits", "_misses", "_zero", "_score_seconds", "_scored", "_rankings", "_rankings_lock"}
+
+
+class SearchIndex:
+    """Parsed CSV rows plus the BM25 (or BM25F, when fields are boosted) index over their search columns"""
+
+    def __init__(self, filepath, search_cols, field_boosts=None, neighbours=False):
+        self.filepath = filepath
+        self.mtime = filepath.stat().st_mtime
+        self.rows = _load_csv(filepath)
+        self.columns = list(self.rows[0]) if self.rows else []
+        with profile_stage("fit"):
+            self.bm25 = _fit(self.rows, search_cols, field_boosts)
+        self.row_ids = {row.get("No") or str(idx + 1): idx for idx, row in enumerate(self.rows)}
+        with profile_stage("speller"):
+            self.speller = SymSpell(self.bm25.doc_freqs)
+        self._prefixes = {}
+        self._bitmaps = {}
+        self._vectors = None
+        self._neighbours = None
+        if neighbours:
+            with profile_stage("neighbours"):
+                self.neighbours
+        self._bind()
+
+    def _bind(self):
+        """Per-process state: metric series and the ranking LRU with its lock"""
+        self.label = label = _index_label(self.filepath)
+        self._hits, self._misses = _RANKING_CACHE.labels(label, "hit"), _RANKING_CACHE.labels(label, "miss")
+        self._zero = _ZERO_RESULTS.labels(label)
+        self._score_seconds, self._scored = _SCORE_SECONDS.labels(label), _DOCS_SCORED.labels(label)
+        self._rankings = OrderedDict()
+        self._rankings_lock = threading.Lock()
+
+    def __getstate__(self):
+        """Pickled without the per-process state, which the receiving process binds afresh"""
+        return {name: value for name, value in vars(self).items() if name not in _PROCESS_FIELDS}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._bind()
+
+    @property
+    def vectors(self):
+        """Normalised BM25 term vector per row, built on first use"""
+        if self._vectors is None:
+            self._vectors = self.bm25.term_vectors()
+        return self._vectors
+
+    @property
+    def neighbours(self):
+        """Top SIMILAR_TOP_N (row, cosine) per row, built once per index (with it, when asked) so lookups are O(1)"""
+        if self._neighbours is None:
+            vectors = self.vectors
+            postings = self.bm25.postings
+            neighbours = []
+            for idx, vec in enumerate(vectors):
+                # Sparse dot products: only rows sharing a term with this one are touched
+                dots = defaultdict(float)
+                for word, weight in vec.items():
+                    for other, _ in postings[word]:
+                        if other != idx:
+                            dots[other] += weight * vectors[other][word]
+                top = heapq.nsmallest(SIMILAR_TOP_N, dots.items(), key=lambda x: (-x[1], x[0]))
+                neighbours.append([(other, score) for other, score in top if score > 0])
+            self._neighbours = neighbours
+        return self._neighbours
+
+    def build_lazy(self, title_col=None):
+        """Build the term vectors, neighbours (and title_col prefixes) now instead of on first use"""
+        self.neighbours
+        if title_col:
+            self.prefixes(title_col)
+
+    def stats(self):
+        """Rows, vocabulary, postings-length distribution, mean document length and bytes held"""
+        seen = set()
+        row_bytes = _sizeof(self.rows, seen)
+        return {
+            "rows": len(self.rows),
+            "vocabulary": len(self.bm25.idf),
+            "postings": _distribution(sorted(len(postings) for postings in self.bm25.postings.values())),
+            "avg_doc_length": round(self.bm25.avgdl, 2),
+            "row_bytes": row_bytes,
+            "index_bytes": _sizeof(self.bm25, seen) + _sizeof(self.row_ids, seen) + _sizeof(self.speller, seen),
+            "lazy_bytes": _sizeof(self, seen),  # vectors, neighbours, prefixes, bitmaps, ranking LRU
+        }
+
+    def find_row(self, ref, title_col):
+        """Row index for a row ID ("No") or a title (case-insensitive), else None"""
+        ref = str(ref).strip()
+        if ref in self.row_ids:
+            return self.row_ids[ref]
+        ref = ref.lower()
+        return next((idx for idx, row in enumerate(self.rows) if row.get(title_col, "").strip().lower() == ref), None)
+
+    def prefixes(self, title_col):
+        """Autocomplete index over title_col and the vocabulary, built on first use"""
+        if title_col not in self._prefixes:
+            self._prefixes[title_col] = PrefixIndex([row.get(title_col, "") for row in self.rows], self.bm25.doc_freqs)
+        return self._prefixes[title_col]
+
+    def bitmaps(self, col):
+        """{lowercased value: (value, row bitset)} for a categorical column, built on first use"""
+        if col not in self._bitmaps:
+            rows_by_value = {}
+            for idx, row in enumerate(self.rows):
+                value = (row.get(col) or "").strip()
+                rows_by_value.setdefault(value.lower(), (value, []))[1].append(idx)
+            self._bitmaps[col] = {key: (value, _bitset(indices, len(self.rows)))
+                                  for key, (value, indices) in rows_by_value.items()}
+        return self._bitmaps[col]
+
+    def filter_mask(self, filters):
+        """Bitset of rows matching every filter; a list of values matches any of them (case-insensitive)"""
+        mask = (1 << len(self.rows)) - 1
+        for col, wanted in filters.items():
+            bitmaps = self.bitmaps(col)
+            col_mask = 0
+            for value in ([wanted] if isinstance(wanted, str) else wanted):
+                col_mask |= bitmaps.get(str(value).strip().lower(), (None, 0))[1]
+            mask &= col_mask
+        return mask
+
+    def facet_counts(self, cols, mask):
+        """Per-column value counts among the rows in mask, most frequent first"""
+        facets = {}
+        for col in cols:
+            counts = [(value, (bits & mask).bit_count()) for value, bits in self.bitmaps(col).values()]
+            facets[col] = dict(sorted(((v, c) for v, c in counts if c), key=lambda x: -x[1]))
+        return facets
+
+    def ranking(self, query, max_edit_distance=MAX_EDIT_DISTANCE, filters=None):
+        """(corrected query, corrections, ranked (row, score) list, score ceiling) for a query.
+
+        Results are kept in a small LRU, so paging through a query reuses its
+        ranked candidate list; callers must not modify the returned list.
+        """
+        key = (query, max_edit_distance,
+               tuple(sorted((col, (v,) if isinstance(v, str) else tuple(v)) for col, v in (filters or {}).items())))
+        with self._rankings_lock:
+            entry = self._rankings.get(key)
+            if entry is not None:
+                self._rankings.move_to_end(key)
+                self._hits.value += 1
+                return entry
+            self._misses.value += 1
+            sampled = self._misses.value % metrics.SAMPLE_EVERY == 1  # each index's 1st, 17th, ... miss
+
+        with profile_stage("correct"):
+            corrected, corrections = self.correct_query(query, max_edit_distance)
+        with profile_stage("score"):
+            mask = self.filter_mask(filters) if filters else None
+            if not sampled:
+                ranked = self.bm25.score(corrected, mask)
+            else:
+                start = time.perf_counter()
+                ranked = self.bm25.score(corrected, mask)
+                self._score_seconds.observe(time.perf_counter() - start)
+                self._scored.observe(len(ranked))
+            if corrections:
+                # Keep the rewrite only if it ranks clearly better than the query as typed
+                original = self.bm25.score(query, mask)
+                if (ranked[0][1] if ranked else 0) <= (original[0][1] if original else 0) * (1 + CORRECTION_MARGIN):
+                    corrected, corrections, ranked = query, {}, original
+        entry = (corrected, corrections, ranked, self.bm25.max_possible_score(corrected) or 1)
+        with self._rankings_lock:
+            self._rankings[key] = entry
+            if len(self._rankings) > RANKING_CACHE_SIZE:
+                self._rankings.popitem(last=False)
+        return entry
+
+    def correct_query(self, query, max_edit_distance=MAX_EDIT_DISTANCE):
+        """Replace tokens found in no vocabulary with their closest word in this index's vocabulary"""
+        if max_edit_distance is None:
+            max_edit_distance = MAX_EDIT_DISTANCE
+        if max_edit_distance <= 0:
+            return query, {}
+        tokens = self.bm25.tokenize(query)
+        unknown = [token for token in dict.fromkeys(tokens) if token not in self.bm25.idf
+                   and _correction_distance(token, max_edit_distance) > 0]
+        if unknown:
+            # A word this index lacks may still be spelt right for another domain or stack
+            vocabulary = _vocabulary()
+            unknown = [token for token in unknown if token not in vocabulary]
+        if not unknown:
+            return query, {}
+
+        corrections = {}
+        for token in unknown:
+            fixed = self.speller.correct(token, max_edit_distance)
+            if fixed:
+                corrections[token] = fixed
+        if not corrections:
+            return query, {}
+        return " ".join(corrections.get(token, token) for token in tokens), corrections
+
+
+_INDEX_CACHE = {}
+_INDEX_LOCK = threading.Lock()
+_PENDING = {}  # cache key -> Event set once warm_all has installed (or given up on) that index
+_SNAPSHOT = None  # Snapshot serving cache misses, see use_snapshot()
+
+
+def _get_index(filepath, search_cols, field_boosts=None, neighbours=False):
+    """Return the cached index for a CSV, rebuilding it when the file changes"""
+    key = _index_key(filepath, search_cols, field_boosts)
+    mtime = filepath.stat().st_mtime
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+    if index is None or index.mtime != mtime:
+        pending = _PENDING.get(key)
+        if pending is not None:
+            # warm_all is building this index in a worker: wait rather than build it twice
+            pending.wait()
+            with _INDEX_LOCK:
+                index = _INDEX_CACHE.get(key)
+            if index is not None and index.mtime == mtime:
+                return index
+        if _SNAPSHOT is not None:
+            loaded = _SNAPSHOT.load(key, mtime)
+            if loaded is not None:
+                _INDEX_BUILDS.labels(loaded.label, "snapshot").inc()
+                with _INDEX_LOCK:
+                    _INDEX_CACHE[key] = loaded
+                return loaded
+        _INDEX_BUILDS.labels(_index_label(filepath), "first" if index is None else "rebuild").inc()
+        if index is not None:
+            _VOCABULARY.pop(DATA_DIR, None)  # the CSV changed, so may the union vocabulary
+        with profile_stage("index_build"):
+            index = SearchIndex(filepath, search_cols, field_boosts, neighbours)
+        with _INDEX_LOCK:
+            _INDEX_CACHE[key] = index
+    return index
+
+
+def _index_key(filepath, search_cols, field_boosts=None):
+    return (str(filepath), tuple(search_cols), tuple(sorted((field_boosts or {}).items())))
+
+
+def _fit(rows, search_cols, field_boosts=None):
+    """BM25 (BM25F when fields are boosted) fitted over the search columns of rows"""
+    if field_boosts:
+        bm25 = BM25F([field_boosts.get(col, 1.0) for col in search_cols])
+        bm25.fit([[str(row.get(col, "")) for col in search_cols] for row in rows])
+    else:
+        bm25 = BM25()
+        bm25.fit([" ".join(str(row.get(col, "")) for col in search_cols) for row in rows])
+    return bm25
+
+
+def set_data_dir(path):
+    """Read CSVs from path from now on; drops the indexes built over the previous directory"""
+    global DATA_DIR
+    DATA_DIR = Path(path)
+    with _INDEX_LOCK:
+        _INDEX_CACHE.clear()
+    _TERM_STATS.clear()
+    _VOCABULARY.clear()
+    _UNION_SPELLER.clear()
+
+
+# ============ TERM STATISTICS ============
+# Cross-index questions (is a word spelt right anywhere?) need every CSV's
+# vocabulary but not its rows, postings or speller, so CSVs without a built
+# index answer them from a fit whose postings are dropped
+_TERM_STATS = {}  # index cache key -> (CSV mtime, BM25 without postings)
+_VOCABULARY = {}  # DATA_DIR -> {term: document frequency summed over every domain and stack}
+_UNION_SPELLER = {}  # DATA_DIR -> (the vocabulary it was built from, SymSpell over it)
+
+
+def _term_stats(config):
+    """BM25 statistics (vocabulary, idf, per-term score bounds) for a config's CSV, without building its index.
+
+    The cached index supplies them when it is current; otherwise they come
+    from the snapshot, or from a fit kept without its postings.
+    """
+    filepath = DATA_DIR / config["file"]
+    key = _index_key(filepath, config["search_cols"], config.get("field_boosts"))
+    mtime = filepath.stat().st_mtime
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(key)
+    if index is not None and index.mtime == mtime:
+        return index.bm25
+    if _SNAPSHOT is not None and _SNAPSHOT.entries.get(key, (None, None, None))[2] == mtime:
+        return _config_index(config).bm25  # unpickling beats refitting
+    cached = _TERM_STATS.get(key)
+    if cached is None or cached[0] != mtime:
+        with profile_stage("term_stats"):
+            bm25 = _fit(_load_csv(filepath), config["search_cols"], config.get("field_boosts"))
+        bm25.corpus, bm25.postings = [], {}
+        cached = _TERM_STATS[key] = (mtime, bm25)
+    return cached[1]
+
+
+def _vocabulary():
+    """Union vocabulary of every domain and stack, built once and again after any index is rebuilt"""
+    vocabulary = _VOCABULARY.get(DATA_DIR)
+    if vocabulary is None:
+        vocabulary = Counter()
+        for _, config in _all_configs():
+            vocabulary.update(_term_stats(config).doc_freqs)
+        _VOCABULARY[DATA_DIR] = vocabulary
+    return vocabulary
+
+
+def _union_speller():
+    """Delete dictionary over the union vocabulary, for correcting a query before it is routed"""
+    vocabulary = _vocabulary()
+    cached = _UNION_SPELLER.get(DATA_DIR)
+    if cached is None or cached[0] is not vocabulary:
+        with profile_stage("speller"):
+            cached = _UNION_SPELLER[DATA_DIR] = (vocabulary, SymSpell(vocabulary))
+    return cached[1]
+
 
 # ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
     """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
+    with profile_stage("csv_load"), open(filepath, 'r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+def _config_index(config):
+    """Cached index for a CSV_CONFIG entry (or stack config)"""
+    return _get_index(DATA_DIR / config["file"], config["search_cols"], config.get("field_boosts"), config.get("similar", False))
+
+
+def _stack_config(stack):
+    """Full search config for a stack: shared stack columns plus its file"""
+    return {**_STACK_COLS, **STACK_CONFIG[stack]}
 
-    data = _load_csv(filepath)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+def _search_csv_scored(config, query, max_results, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+                       fields=None, offset=0):
+    """Core search function using BM25, returns ((normalised score, row) pairs, extra result keys)"""
+    if not (DATA_DIR / config["file"]).exists():
+        return [], {}
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    index = _config_index(config)
+    data = index.rows
+    output_cols = fields or config["output_cols"]
+    query, corrections, ranked, ceiling = index.ranking(query, max_edit_distance, filters)
+    end = offset + max_results
+    with profile_stage("top_k"):
+        top = _mmr(index, ranked, end, diversity)[offset:] if diversity > 0 else ranked[offset:end]
 
     # Get top results with score > 0
     results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+    with profile_stage("projection"):
+        for idx, score in top:
+            if score > 0:
+                row = data[idx]
+                results.append((score / ceiling, {col: row.get(col, "") for col in output_cols if col in row}))
+    if not results:
+        index._zero.value += 1
+    notes = call_notes() if _OBSERVERS else None
+    if notes is not None:
+        notes.setdefault("ids", {}).setdefault(config["file"], []).extend(
+            data[idx].get("No") or str(idx + 1) for idx, score in top if score > 0)
+
+    extras = {}
+    if corrections:
+        extras["corrections"] = corrections
+    if facets:
+        matched = _bitset((idx for idx, score in ranked if score > 0), len(data))
+        extras["facets"] = index.facet_counts(config.get("facet_cols", []), matched)
+    if len(ranked) > end and ranked[end][1] > 0:
+        extras["next_offset"] = end
+    return results, extras
+
+
+def _dot(a, b):
+    """Dot product of two sparse term vectors"""
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(weight * b.get(word, 0.0) for word, weight in a.items())
+
+
+def _mmr(index, ranked, max_results, diversity):
+    """Maximal Marginal Relevance over the top BM25 candidates.
+
+    Each pick maximises (1 - diversity) * relevance - diversity * (max cosine to
+    rows already picked), using the index's cached term vectors; the running max
+    is updated against the latest pick only, so k picks cost O(M * k) dot products.
+    """
+    diversity = min(diversity, 1.0)
+    pool = [(idx, score) for idx, score in ranked[:max(MMR_CANDIDATES, max_results)] if score > 0]
+    if not pool:
+        return []
+    vectors = index.vectors
+    best = pool[0][1]
+    redundancy = [0.0] * len(pool)
+    picked, remaining = [], list(range(len(pool)))
+    while remaining and len(picked) < max_results:
+        choice = max(remaining, key=lambda i: ((1 - diversity) * pool[i][1] / best - diversity * redundancy[i], -i))
+        remaining.remove(choice)
+        picked.append(pool[choice])
+        chosen = vectors[pool[choice][0]]
+        for i in remaining:
+            redundancy[i] = max(redundancy[i], _dot(vectors[pool[i][0]], chosen))
+    return picked
+
+
+def _search_csv(config, query, max_results, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+                fields=None, offset=0):
+    """Core search function using BM25, returns (rows, extra result keys)"""
+    hits, extras = _search_csv_scored(config, query, max_results, max_edit_distance, filters, facets, diversity,
+                                      fields=fields, offset=offset)
+    return [row for _, row in hits], extras
+
+
+def _columns(config):
+    """Header of a config's CSV: its cached index's columns, else the file's first line"""
+    filepath = DATA_DIR / config["file"]
+    with _INDEX_LOCK:
+        index = _INDEX_CACHE.get(_index_key(filepath, config["search_cols"], config.get("field_boosts")))
+    if index is not None:
+        return index.columns
+    with open(filepath, 'r', encoding='utf-8', newline='') as f:
+        return next(csv.reader(f), [])
+
+
+def _unknown_columns(config, cols):
+    """Filter or field columns that the config's CSV does not have"""
+    if not cols or not (DATA_DIR / config["file"]).exists():
+        return []
+    columns = _columns(config)
+    return [col for col in cols if col not in columns]
+
+
+def _bad_columns(config, filters, fields, name):
+    """Error message for unknown filter or field columns, else None"""
+    unknown = _unknown_columns(config, filters)
+    if unknown:
+        return f"Unknown filter column for {name}: {', '.join(unknown)}"
+    unknown = _unknown_columns(config, fields)
+    if unknown:
+        return f"Unknown field for {name}: {', '.join(unknown)}"
+    return None
+
+
+def _keyword_hits(query):
+    """Count hand-picked intent keywords per domain (covers words the CSVs never use, e.g. 'color', 'ux')"""
+    hits = dict.fromkeys(DOMAIN_KEYWORDS, 0)
+    for kw in _DOMAIN_MATCHER.matches(query.lower()):
+        for domain in _DOMAIN_MATCHER.owners[kw]:
+            hits[domain] += 1
+    return hits
+
+
+def _routing_query(query, max_edit_distance=MAX_EDIT_DISTANCE):
+    """query with tokens found in no vocabulary replaced by their closest word in the union vocabulary"""
+    if max_edit_distance is None:
+        max_edit_distance = MAX_EDIT_DISTANCE
+    if max_edit_distance <= 0:
+        return query
+    tokens = BM25.tokenize(query)
+    unknown = [token for token in tokens if _correction_distance(token, max_edit_distance) > 0]
+    if unknown:
+        vocabulary = _vocabulary()
+        unknown = [token for token in unknown if token not in vocabulary]
+    if not unknown:
+        return query
+    speller = _union_speller()
+    return " ".join((speller.correct(token, max_edit_distance) or token) if token in unknown else token
+                    for token in tokens)
+
+
+def detect_domains(query, max_domains=ROUTE_MAX_DOMAINS, margin=ROUTE_MARGIN, candidates=None,
+                   max_edit_distance=MAX_EDIT_DISTANCE):
+    """Route query to its best domains (only among candidates, when given), best first.
+
+    Misspelt tokens are corrected against the union vocabulary first. Each
+    domain then scores its keyword hits plus the best BM25 score any of its
+    rows could reach, read from per-term bounds and normalised to [0, 1]
+    against the query's score ceiling. The bounds come from term statistics,
+    so only the routed domains' indexes are built. Keyword hits dominate when
+    present; otherwise the indexes decide, so off-list queries no longer fall
+    back to "style".
+    """
+    query = _routing_query(query, max_edit_distance)
+    hits = _keyword_hits(query)
+    scores = []
+    for domain in list(hits) + [d for d in CSV_CONFIG if d not in hits]:
+        if candidates is not None and domain not in candidates:
+            continue
+        config = CSV_CONFIG.get(domain)
+        bound = 0
+        if config and (DATA_DIR / config["file"]).exists():
+            stats = _term_stats(config)
+            ceiling = stats.max_possible_score(query)
+            bound = stats.upper_bound(query) / ceiling if ceiling else 0
+        scores.append((domain, hits.get(domain, 0) + bound))
 
-    return results
+    # Stable sort keeps keyword-table order between equal scores
+    scores.sort(key=lambda x: x[1], reverse=True)
+    best = scores[0][1]
+    if best <= 0:
+        return ["style"] if candidates is None or "style" in candidates else [scores[0][0]]
+    return [domain for domain, score in scores[:max_domains] if score >= best * margin]
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora", "prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
+    return detect_domains(query, max_domains=1)[0]
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
 
+@observed("search")
+def search(query, domain=None, max_results=MAX_RESULTS, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+           fields=None, offset=0):
+    """Main search function with auto-domain detection.
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
+    filters: {column: value or [values]} restricts results to matching rows before
+    scoring; facets=True adds per-value counts of the domain's facet_cols among matches.
+    diversity: 0 keeps the BM25 order; up to 1 trades relevance for fewer near-duplicates (MMR).
+    fields: columns to return instead of the domain's output_cols; offset skips that many
+    ranked results, and "next_offset" in the result is the cursor for the following page.
+    """
     if domain is None:
-        domain = detect_domain(query)
+        with profile_stage("route"):
+            candidates = None
+            if filters:
+                # Route only to domains that can apply every filter
+                candidates = [d for d, c in CSV_CONFIG.items()
+                              if (DATA_DIR / c["file"]).exists() and not _unknown_columns(c, filters)]
+                if not candidates:
+                    return {"error": f"No domain has every filter column: {', '.join(filters)}"}
+            domains = detect_domains(query, candidates=candidates, max_edit_distance=max_edit_distance)
+        if len(domains) > 1:
+            return _search_domains(query, domains, max_results, max_edit_distance, filters, facets, diversity,
+                                   fields=fields, offset=offset)
+        domain = domains[0]
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -220,34 +1218,496 @@ def search(query, domain=None, max_results=MAX_RESULTS):
     if not filepath.exists():
         return {"error": f"File not found: {filepath}", "domain": domain}
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    error = _bad_columns(config, filters, fields, domain)
+    if error:
+        return {"error": error, "domain": domain}
+
+    with profile_stage(f"search:{domain}"):
+        results, extras = _search_csv(config, query, max_results, max_edit_distance, filters, facets, diversity,
+                                      fields=fields, offset=offset)
 
     return {
         "domain": domain,
         "query": query,
         "file": config["file"],
         "count": len(results),
-        "results": results
+        "results": results,
+        **extras
     }
 
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
+def _merge_hits(label, groups, max_results, offset=0):
+    """Merge (name, scored hits) groups into one top-k page, tagging each row with its group"""
+    # Normalised scores are comparable across indexes; ties keep the group order
+    merged = []
+    for order, (name, (hits, _)) in enumerate(groups):
+        for rank, (score, row) in enumerate(hits):
+            merged.append((-score, order, rank, name, row))
+    merged.sort(key=lambda x: x[:3])
+    return [{label: name, **row} for _, _, _, name, row in merged[offset:offset + max_results]]
+
+
+def _merged_next_offset(ranked, max_results, offset):
+    """Cursor for the next merged page: more hits than this page used, in any group or overall"""
+    end = offset + max_results
+    if any("next_offset" in extras for _, extras in ranked) or sum(len(hits) for hits, _ in ranked) > end:
+        return {"next_offset": end}
+    return {}
+
+
+def _merge_extras(ranked):
+    """Combine extra result keys across indexes: corrections (first index wins) and summed facet counts"""
+    merged = {}
+    for _, extras in ranked:
+        for typo, word in extras.get("corrections", {}).items():
+            merged.setdefault("corrections", {}).setdefault(typo, word)
+        for col, counts in extras.get("facets", {}).items():
+            totals = merged.setdefault("facets", {}).setdefault(col, {})
+            for value, count in counts.items():
+                totals[value] = totals.get(value, 0) + count
+    for col, totals in merged.get("facets", {}).items():
+        merged["facets"][col] = dict(sorted(totals.items(), key=lambda x: -x[1]))
+    return merged
+
+
+def _search_domains(query, domains, max_results, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+                    fields=None, offset=0):
+    """Search several routed domains and merge into a single top-k"""
+    configs = [CSV_CONFIG[domain] for domain in domains]
+    for domain, config in zip(domains, configs):
+        error = _bad_columns(config, filters, fields, domain)
+        if error:
+            return {"error": error, "domain": domain}
+    # Each index supplies its first offset + max_results hits; the merged page is sliced from those
+    ranked = []
+    for domain, config in zip(domains, configs):
+        with profile_stage(f"search:{domain}"):
+            ranked.append(_search_csv_scored(config, query, offset + max_results, max_edit_distance, filters, facets,
+                                             diversity, fields=fields))
+    results = _merge_hits("Domain", zip(domains, ranked), max_results, offset)
+
+    return {
+        "domain": ", ".join(domains),
+        "domains": domains,
+        "query": query,
+        "file": ", ".join(config["file"] for config in configs),
+        "count": len(results),
+        "results": results,
+        **_merge_extras(ranked),
+        **_merged_next_offset(ranked, max_results, offset)
+    }
+
+
+@observed("search_stack")
+def search_stack(query, stack, max_results=MAX_RESULTS, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+                 fields=None, offset=0):
     """Search stack-specific guidelines"""
     if stack not in STACK_CONFIG:
         return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
 
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    config = _stack_config(stack)
+    filepath = DATA_DIR / config["file"]
 
     if not filepath.exists():
         return {"error": f"Stack file not found: {filepath}", "stack": stack}
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    error = _bad_columns(config, filters, fields, stack)
+    if error:
+        return {"error": error, "stack": stack}
+
+    with profile_stage(f"stack:{stack}"):
+        results, extras = _search_csv(config, query, max_results, max_edit_distance, filters, facets, diversity,
+                                      fields=fields, offset=offset)
 
     return {
         "domain": "stack",
         "stack": stack,
         "query": query,
-        "file": STACK_CONFIG[stack]["file"],
+        "file": config["file"],
+        "count": len(results),
+        "results": results,
+        **extras
+    }
+
+
+@observed("search_stacks")
+def search_stacks(query, stacks, max_results=MAX_RESULTS, max_edit_distance=MAX_EDIT_DISTANCE, filters=None, facets=False, diversity=0.0,
+                  fields=None, offset=0):
+    """Search several stacks concurrently and merge into a single top-k"""
+    stacks = list(dict.fromkeys(stacks))
+    unknown = [stack for stack in stacks if stack not in STACK_CONFIG]
+    if unknown:
+        return {"error": f"Unknown stack: {', '.join(unknown)}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    configs = [_stack_config(stack) for stack in stacks]
+    for stack, config in zip(stacks, configs):
+        if not (DATA_DIR / config["file"]).exists():
+            return {"error": f"Stack file not found: {DATA_DIR / config['file']}", "stack": stack}
+        error = _bad_columns(config, filters, fields, stack)
+        if error:
+            return {"error": error, "stack": stack}
+
+    notes = call_notes()
+
+    def run(stack, config):
+        _CALL.notes = notes  # worker threads add to the calling thread's notes
+        try:
+            with profile_stage(f"stack:{stack}"):
+                return _search_csv_scored(config, query, offset + max_results, max_edit_distance, filters, facets,
+                                          diversity, fields=fields)
+        finally:
+            _CALL.notes = None
+
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(len(stacks), 1)) as pool:
+        ranked = list(pool.map(run, stacks, configs))
+
+    results = _merge_hits("Stack", zip(stacks, ranked), max_results, offset)
+
+    return {
+        "domain": "stack",
+        "stack": ", ".join(stacks),
+        "stacks": stacks,
+        "query": query,
+        "file": ", ".join(config["file"] for config in configs),
+        "count": len(results),
+        "results": results,
+        **_merge_extras(ranked),
+        **_merged_next_offset(ranked, max_results, offset)
+    }
+
+
+def similar(domain, row_id, k=MAX_RESULTS, fields=None):
+    """Rows most like one row ("more like this"), read from the precomputed neighbour lists.
+
+    row_id is the row's No value or its title, e.g. similar("style", "Glassmorphism");
+    fields: columns to return instead of the domain's output_cols.
+    """
+    if domain not in CSV_CONFIG:
+        return {"error": f"Unknown domain: {domain}. Available: {', '.join(CSV_CONFIG)}"}
+    if k < 1:
+        return {"error": f"k must be at least 1, got {k}", "domain": domain}
+
+    config = CSV_CONFIG[domain]
+    filepath = DATA_DIR / config["file"]
+    if not filepath.exists():
+        return {"error": f"File not found: {filepath}", "domain": domain}
+    error = _bad_columns(config, None, fields, domain)
+    if error:
+        return {"error": error, "domain": domain}
+
+    index = _config_index(config)
+    idx = index.find_row(row_id, config["title_col"])
+    if idx is None:
+        return {"error": f"No {domain} row with ID or {config['title_col']} '{row_id}'", "domain": domain}
+
+    source = index.rows[idx]
+    results = []
+    for other, score in index.neighbours[idx][:k]:
+        row = index.rows[other]
+        results.append({**{col: row.get(col, "") for col in fields or config["output_cols"] if col in row},
+                        "Similarity": round(score, 3)})
+
+    return {
+        "domain": domain,
+        "query": f"similar to {source.get(config['title_col'], row_id)}",
+        "row_id": source.get("No", str(idx + 1)),
+        "file": config["file"],
         "count": len(results),
         "results": results
     }
+
+
+def suggest(prefix, domain=None, k=MAX_SUGGESTIONS, stack=None):
+    """As-you-type completions from row titles and vocabulary of a domain (or stack)"""
+    if stack is not None:
+        if stack not in STACK_CONFIG:
+            return []
+        config = _stack_config(stack)
+    else:
+        config = CSV_CONFIG.get(domain or "style", CSV_CONFIG["style"])
+
+    filepath = DATA_DIR / config["file"]
+    if not filepath.exists():
+        return []
+    return _config_index(config).prefixes(config["title_col"]).suggest(prefix, k)
+
+
+# ============ PARALLEL WARM-UP ============
+def _all_configs():
+    """[(name, config)] for every domain and stack whose CSV exists"""
+    configs = [(domain, config) for domain, config in CSV_CONFIG.items()]
+    configs += [(f"stack:{stack}", _stack_config(stack)) for stack in AVAILABLE_STACKS]
+    return [(name, config) for name, config in configs if (DATA_DIR / config["file"]).exists()]
+
+
+@contextmanager
+def _gc_paused():
+    """Hold off cyclic GC while allocating an index's many small acyclic objects"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _build_pickled(filepath, search_cols, field_boosts, title_col, lazy, neighbours=False):
+    """Process-pool worker: (pickled SearchIndex, build seconds) for one CSV"""
+    import pickle
+    start = time.perf_counter()
+    with _gc_paused():
+        index = SearchIndex(Path(filepath), search_cols, field_boosts, neighbours)
+        if lazy:
+            index.build_lazy(title_col)
+    return pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL), time.perf_counter() - start
+
+
+def _warm_plan():
+    """[(name, config, key)] for indexes missing or stale in the cache, each marked pending"""
+    plan = []
+    for name, config in _all_configs():
+        filepath = DATA_DIR / config["file"]
+        key = _index_key(filepath, config["search_cols"], config.get("field_boosts"))
+        with _INDEX_LOCK:
+            index = _INDEX_CACHE.get(key)
+            if (index is not None and index.mtime == filepath.stat().st_mtime) or key in _PENDING:
+                continue
+            _PENDING[key] = threading.Event()
+        plan.append((name, config, key))
+    return plan
+
+
+def _warm(plan, workers, lazy):
+    """Build the planned indexes in a process pool and install each one as it arrives"""
+    import multiprocessing
+    import pickle
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+    report = {}
+    start = time.perf_counter()
+    try:
+        # spawn: safe from a background thread, where forking could copy a held lock
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = {pool.submit(_build_pickled, str(DATA_DIR / config["file"]), config["search_cols"],
+                                   config.get("field_boosts"), config["title_col"], lazy, config.get("similar", False)): (name, key)
+                       for name, config, key in plan}
+            for future in as_completed(futures):
+                name, key = futures[future]
+                try:
+                    payload, build_seconds = future.result()
+                except Exception as e:  # left to the first query, which builds it in-process
+                    report[name] = {"error": f"{type(e).__name__}: {e}"}
+                    _PENDING.pop(key).set()
+                    continue
+                loaded = time.perf_counter()
+                with _gc_paused():  # several times faster than unpickling with the collector running
+                    index = pickle.loads(payload)
+                with _INDEX_LOCK:
+                    _INDEX_CACHE[key] = index
+                _INDEX_BUILDS.labels(index.label, "first").inc()
+                _PENDING.pop(key).set()
+                report[name] = {"build_ms": round(build_seconds * 1000, 2),
+                                "load_ms": round((time.perf_counter() - loaded) * 1000, 2), "bytes": len(payload)}
+    finally:
+        for _, _, key in plan:
+            event = _PENDING.pop(key, None)
+            if event is not None:
+                event.set()
+    _VOCABULARY.pop(DATA_DIR, None)
+    _union_speller()
+    return {"workers": workers, "lazy": lazy, "wall_ms": round((time.perf_counter() - start) * 1000, 2),
+            "indexes": report}
+
+
+def warm_all(workers=None, lazy=False):
+    """Build every domain and stack index in parallel worker processes and install them in the cache.
+
+    Each worker parses and indexes one CSV and hands it back pickled without
+    its per-process state; with lazy it also builds the term vectors,
+    neighbours and title prefixes. Indexes already cached and fresh are
+    skipped; the union vocabulary and its speller are rebuilt over the result. Returns {"workers", "lazy", "wall_ms", "indexes": {name:
+    {"build_ms", "load_ms", "bytes"}}}, build_ms being the worker's time.
+    """
+    return _warm(_warm_plan(), workers or os.cpu_count() or 1, lazy)
+
+
+def warm_all_background(workers=None, lazy=False):
+    """Start warm_all in a daemon thread; queries arriving meanwhile wait for their index instead of building it.
+
+    Returns the thread; its report is in thread.report once it finishes.
+    """
+    plan = _warm_plan()  # marked pending before returning, so no query races the workers
+    thread = threading.Thread(target=lambda: setattr(thread, "report", _warm(plan, workers or os.cpu_count() or 1, lazy)),
+                              name="ui-pro-max-warm", daemon=True)
+    thread.report = None
+    thread.start()
+    return thread
+
+
+# ============ SNAPSHOT ============
+SNAPSHOT_VERSION = 2  # bump whenever SearchIndex or BM25 state changes shape
+
+
+class Snapshot:
+    """Reader for a write_snapshot() file: an offset table, then one pickled SearchIndex per CSV.
+
+    Only the indexes a call asks for are read and unpickled. An entry whose
+    CSV has changed since the snapshot was written is ignored, and that index
+    is built from the CSV as usual.
+    """
+
+    def __init__(self, path):
+        import pickle
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            size = int.from_bytes(f.read(8), "little")
+            header = pickle.loads(f.read(size))
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{self.path}: snapshot version {header.get('version')}, expected {SNAPSHOT_VERSION}")
+        self.entries = header["entries"]
+        self.base = 8 + size
+
+    def load(self, key, mtime):
+        """The stored index for a cache key if it was built from a CSV with this mtime, else None"""
+        entry = self.entries.get(key)
+        if entry is None or entry[2] != mtime:
+            return None
+        import pickle
+        offset, length, _ = entry
+        with open(self.path, "rb") as f:
+            f.seek(self.base + offset)
+            payload = f.read(length)
+        with _gc_paused():
+            return pickle.loads(payload)
+
+
+def write_snapshot(path, lazy=False):
+    """Write every domain and stack index, parsed rows included, to one file; returns {"path", "indexes", "bytes"}.
+
+    With lazy the term vectors, neighbours and title prefixes are stored
+    too. The file is keyed by absolute CSV path, so it serves this data
+    directory only.
+    """
+    import pickle
+    entries, payloads, offset = {}, [], 0
+    for name, config in _all_configs():
+        index = _config_index(config)
+        if lazy:
+            index.build_lazy(config["title_col"])
+        payload = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+        entries[_index_key(index.filepath, config["search_cols"], config.get("field_boosts"))] = (offset, len(payload), index.mtime)
+        payloads.append(payload)
+        offset += len(payload)
+    header = pickle.dumps({"version": SNAPSHOT_VERSION, "entries": entries}, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for payload in payloads:
+            f.write(payload)
+    os.replace(tmp, path)
+    return {"path": str(path), "indexes": len(entries), "bytes": 8 + len(header) + offset}
+
+
+def use_snapshot(path):
+    """Serve index cache misses from a write_snapshot() file while its entries are current (None stops)"""
+    global _SNAPSHOT
+    _SNAPSHOT = Snapshot(path) if path else None
+
+
+# ============ INDEX STATISTICS ============
+_UNSIZED = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType)
+
+
+def _sizeof(obj, seen):
+    """Bytes of obj and everything reachable from it whose id is not in seen (shared objects count once)"""
+    total = 0
+    pending = [obj]
+    while pending:
+        obj = pending.pop()
+        if id(obj) in seen or isinstance(obj, _UNSIZED):
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                pending.append(vars(obj))
+            for cls in type(obj).__mro__:
+                slots = getattr(cls, "__slots__", ())
+                for name in [slots] if isinstance(slots, str) else slots:
+                    if hasattr(obj, name):
+                        pending.append(getattr(obj, name))
+    return total
+
+
+def _distribution(values):
+    """min, p50, p90, p99, max and mean of sorted values"""
+    if not values:
+        return {}
+    pick = lambda pct: values[min(len(values) - 1, len(values) * pct // 100)]
+    return {"min": values[0], "p50": pick(50), "p90": pick(90), "p99": pick(99), "max": values[-1],
+            "mean": round(sum(values) / len(values), 2)}
+
+
+def index_stats(lazy=True):
+    """Statistics for every domain and stack index, plus the resident total with all of them loaded.
+
+    Indexes load through the cache. With lazy, each also builds its
+    term vectors, neighbours and title prefixes, so the total matches a fully
+    warmed process. traced_bytes is what tracemalloc saw allocated while
+    loading, so it leaves out indexes that were already cached.
+    """
+    import tracemalloc
+    configs = _all_configs()
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    indexes = {}
+    for name, config in configs:
+        indexes[name] = _config_index(config)
+        if lazy:
+            indexes[name].build_lazy(config["title_col"])
+    traced = tracemalloc.get_traced_memory()[0] - before
+    if not tracing:
+        tracemalloc.stop()
+
+    seen = set()
+    return {
+        "indexes": {name: index.stats() for name, index in indexes.items()},
+        "total": {
+            "indexes": len(indexes),
+            "rows": sum(len(index.rows) for index in indexes.values()),
+            "resident_bytes": _sizeof(list(indexes.values()), seen),
+            "traced_bytes": traced,
+            "lazy": lazy,
+        },
+    }
+
+
+# Opt-in snapshot of parsed CSVs and built indexes (see write_snapshot)
+if os.environ.get("UI_PRO_MAX_SNAPSHOT"):
+    try:
+        use_snapshot(os.environ["UI_PRO_MAX_SNAPSHOT"])
+    except Exception as e:  # an unreadable snapshot only costs the time it would have saved
+        print(f"Ignoring snapshot {os.environ['UI_PRO_MAX_SNAPSHOT']}: {e}", file=sys.stderr)
+
+# Opt-in shared-memory indexes published by a parent process (see shared_index.py)
+if os.environ.get("UI_PRO_MAX_SHARED_INDEX"):
+    try:
+        import shared_index
+        shared_index.attach(os.environ["UI_PRO_MAX_SHARED_INDEX"])
+    except Exception as e:  # without the segment this process builds its own indexes
+        print(f"Ignoring shared index {os.environ['UI_PRO_MAX_SHARED_INDEX']}: {e}", file=sys.stderr)
+
+# Opt-in query log for every entry point (see querylog.py)
+if os.environ.get("UI_PRO_MAX_QUERY_LOG"):
+    import querylog
+    querylog.enable(os.environ["UI_PRO_MAX_QUERY_LOG"])
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Golden Rankings - Proves every scoring path ranks exactly like brute-force BM25F
+
+A fixed query set (hand-written plus words sampled from each CSV's own search
+columns) is scored for every domain and stack index by a brute-force reference
+that walks every row and computes BM25F (BM25 for unboosted indexes) term by
+term from the raw CSV fields, sharing no state with the index. Each registered
+engine, the postings path behind BM25.score included, must return the same
+top-k row IDs in the same order, with scores within TOLERANCE. --record stores
+the reference top-k as a golden file and --check compares a later run against
+it, so changes to the reference itself are caught too.
+
+Tie-break: results are ordered by score descending; scores equal to
+SCORE_DIGITS decimal places are ties and keep row order (lower row index,
+i.e. CSV order, first). The reference sorts by that rule and every engine must
+return its ranking in the same order; an engine that reorders ties fails even
+when its scores are right.
+
+Usage:
+    python golden.py                          # every engine against the reference
+    python golden.py --record golden.json     # store reference top-k
+    python golden.py --check golden.json      # compare reference and engines to it
+"""
+
+import argparse
+import json
+import random
+import sys
+from collections import Counter
+from math import log
+
+import core
+from core import CSV_CONFIG, AVAILABLE_STACKS, _bitset, _config_index, _stack_config
+
+
+# ============ CONFIGURATION ============
+TOP_K = 10
+TOLERANCE = 1e-9        # relative score tolerance between engines
+SCORE_DIGITS = 9        # scores equal to this many decimals are ties
+SAMPLES_PER_INDEX = 40  # queries sampled from each CSV's own words
+SEED = 0
+
+HAND_WRITTEN = [
+    "glassmorphism dark", "minimal clean professional", "saas dashboard", "beauty spa wellness",
+    "fintech crypto", "elegant luxury serif", "real-time trend", "hero testimonial pricing",
+    "animation accessibility", "useEffect waterfall", "aria focus", "lucide icon", "form validation",
+    "responsive layout", "state management", "color palette", "touch target mobile", "xyzzy", "a",
+]
+
+
+# ============ ENGINES ============
+ENGINES = {}
+
+
+def engine(name):
+    """Register fn(index, query) -> ranked [(row index, score)] as a path that must match the reference"""
+    def register(fn):
+        ENGINES[name] = fn
+        return fn
+    return register
+
+
+_FIELDS = {}  # CSV path -> (per row: per field term counts and length, per-field average length, document frequencies)
+
+
+def _fields(config, index):
+    """Tokenized raw search fields of every row, with the corpus statistics BM25F needs"""
+    cached = _FIELDS.get(index.filepath)
+    if cached is None:
+        tokenize = index.bm25.tokenize
+        cols = config["search_cols"]
+        if config.get("field_boosts"):
+            docs = [[tokenize(str(row.get(col, ""))) for col in cols] for row in index.rows]
+        else:
+            docs = [[tokenize(" ".join(str(row.get(col, "")) for col in cols))] for row in index.rows]
+        averages = [sum(len(doc[f]) for doc in docs) / len(docs) or 1 for f in range(len(docs[0]))] if docs else []
+        doc_freqs = Counter(word for doc in docs for word in {w for field in doc for w in field})
+        cached = _FIELDS[index.filepath] = ([[(Counter(field), len(field)) for field in doc] for doc in docs],
+                                            averages, doc_freqs)
+    return cached
+
+
+def reference(config, index, query):
+    """The reference: every row scored from its raw fields, ranked by the documented order"""
+    docs, averages, doc_freqs = _fields(config, index)
+    boosts = config.get("field_boosts")
+    weights = [boosts.get(col, 1.0) for col in config["search_cols"]] if boosts else [1.0]
+    k1, b, n = index.bm25.k1, index.bm25.b, len(docs)
+    tokens = index.bm25.tokenize(query)
+    scored = []
+    for idx, doc in enumerate(docs):
+        score = 0.0
+        for token in tokens:
+            if token not in doc_freqs:
+                continue
+            idf = log((n - doc_freqs[token] + 0.5) / (doc_freqs[token] + 0.5) + 1)
+            if boosts:
+                # BM25F: per-field length-normalised tf, boosted, summed into one pseudo-frequency
+                tf = sum(weights[f] * counts[token] / (1 - b + b * length / averages[f])
+                         for f, (counts, length) in enumerate(doc) if counts[token])
+                score += idf * tf * (k1 + 1) / (tf + k1)
+            else:
+                counts, length = doc[0]
+                tf = counts[token]
+                score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / averages[0]))
+        scored.append((idx, score))
+    return sorted(scored, key=lambda x: (-round(x[1], SCORE_DIGITS), x[0]))
+
+
+@engine("postings")
+def _postings(index, query):
+    """BM25.score: the postings fast path the other engines build on"""
+    return index.bm25.score(query)
+
+
+@engine("filtered")
+def _filtered(index, query):
+    """Bitset-filtered scoring with every row allowed"""
+    size = len(index.rows)
+    return index.bm25.score(query, _bitset(range(size), size))
+
+
+@engine("ranking_cache")
+def _ranking_cache(index, query):
+    """SearchIndex.ranking without typo correction, read twice so the second call is an LRU hit"""
+    index.ranking(query, 0)
+    return index.ranking(query, 0)[2]
+
+
+_SHARED = {}  # CSV path -> SharedIndex over a copy of that index published by this process
+
+
+@engine("shared_memory")
+def _shared_memory(index, query):
+    """The index published to a shared-memory segment (shared_index.py) and scored through read-only views"""
+    shared = _SHARED.get(index.filepath)
+    if shared is None:
+        import shared_index
+        published = shared_index.publish({index.filepath: index})
+        shared = _SHARED[index.filepath] = shared_index.attach(published.name, install=False)[index.filepath]
+    return shared.bm25.score(query)
+
+
+# ============ QUERY SET ============
+def indexes():
+    """[(name, config, SearchIndex)] for every domain and stack whose CSV exists"""
+    found = [(domain, config) for domain, config in CSV_CONFIG.items()]
+    found += [(f"stack:{stack}", _stack_config(stack)) for stack in AVAILABLE_STACKS]
+    return [(name, config, _config_index(config)) for name, config in found
+            if (core.DATA_DIR / config["file"]).exists()]
+
+
+def queries(index, samples=SAMPLES_PER_INDEX, seed=SEED):
+    """Hand-written queries plus 1-3 word queries sampled from the index's own documents"""
+    rng = random.Random(seed)
+    sampled = []
+    docs = [doc for doc in index.bm25.corpus if doc]
+    for _ in range(samples if docs else 0):
+        doc = rng.choice(docs)
+        sampled.append(" ".join(rng.sample(doc, min(len(doc), rng.randint(1, 3)))))
+    return list(dict.fromkeys(HAND_WRITTEN + sampled))
+
+
+# ============ COMPARISON ============
+def top_k(index, ranked, k=TOP_K):
+    """[(row ID, score)] for the first k positive-score results, in the order returned"""
+    return [(index.rows[idx].get("No") or str(idx + 1), score) for idx, score in ranked[:k] if score > 0]
+
+
+def tie_break_errors(ranked, k=TOP_K):
+    """Adjacent pairs among the first k positive-score results that break the documented order"""
+    errors = []
+    head = [(idx, score) for idx, score in ranked[:k] if score > 0]
+    for (a, sa), (b, sb) in zip(head, head[1:]):
+        ra, rb = round(sa, SCORE_DIGITS), round(sb, SCORE_DIGITS)
+        if ra < rb or (ra == rb and a > b):
+            errors.append(f"row index {a} ({sa!r}) ranked before row index {b} ({sb!r})")
+    return errors
+
+
+def differences(expected, actual, tolerance=TOLERANCE):
+    """Position-by-position mismatches between two top-k lists"""
+    errors = []
+    if len(expected) != len(actual):
+        errors.append(f"{len(actual)} results, expected {len(expected)}")
+    for pos, ((eid, escore), (aid, ascore)) in enumerate(zip(expected, actual), 1):
+        if eid != aid:
+            errors.append(f"#{pos}: row {aid}, expected row {eid}")
+        elif abs(escore - ascore) > tolerance * max(1.0, abs(escore)):
+            errors.append(f"#{pos}: row {aid} scored {ascore!r}, expected {escore!r}")
+    return errors
+
+
+def run(engines=None, k=TOP_K, samples=SAMPLES_PER_INDEX, golden=None):
+    """{"queries", "golden": {index: {query: top-k}}, "failures": [...]} over every index and query"""
+    engines = {name: ENGINES[name] for name in engines} if engines else ENGINES
+    recorded, failures = {}, []
+    total = 0
+    for name, config, index in indexes():
+        recorded[name] = {}
+        for query in queries(index, samples):
+            total += 1
+            ranked = reference(config, index, query)
+            expected = top_k(index, ranked, k)
+            recorded[name][query] = [[row_id, round(score, 12)] for row_id, score in expected]
+
+            def fail(source, errors):
+                failures.extend({"index": name, "query": query, "engine": source, "error": e} for e in errors)
+
+            fail("reference", tie_break_errors(ranked, k))
+            if golden is not None and query in golden.get(name, {}):
+                fail("golden", differences([tuple(x) for x in golden[name][query]], expected))
+            for engine_name, fn in engines.items():
+                ranked_by_engine = fn(index, query)
+                fail(engine_name, tie_break_errors(ranked_by_engine, k))
+                fail(engine_name, differences(expected, top_k(index, ranked_by_engine, k)))
+    return {"queries": total, "golden": recorded, "failures": failures}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden ranking-equivalence checks")
+    parser.add_argument("--engine", "-e", action="append", choices=list(ENGINES), help="Only check this engine (repeatable)")
+    parser.add_argument("--top-k", "-k", type=int, default=TOP_K, help=f"Results compared per query (default: {TOP_K})")
+    parser.add_argument("--samples", type=int, default=SAMPLES_PER_INDEX, help=f"Queries sampled per index (default: {SAMPLES_PER_INDEX})")
+    parser.add_argument("--record", metavar="FILE", default=None, help="Write the reference top-k to FILE")
+    parser.add_argument("--check", metavar="FILE", default=None, help="Also compare the reference top-k to a recorded FILE")
+    args = parser.parse_args()
+
+    golden = None
+    if args.check:
+        with open(args.check, encoding="utf-8") as f:
+            stored = json.load(f)
+        golden = stored["golden"]
+        args.top_k, args.samples = stored["top_k"], stored["samples"]
+
+    result = run(args.engine, args.top_k, args.samples, golden)
+    if args.record:
+        with open(args.record, "w", encoding="utf-8") as f:
+            json.dump({"top_k": args.top_k, "samples": args.samples, "golden": result["golden"]}, f, indent=1,
+                      ensure_ascii=False)
+
+    engines = args.engine or list(ENGINES)
+    print(f"## Golden Rankings\n**Queries:** {result['queries']} | **Top-k:** {args.top_k} | "
+          f"**Engines:** {', '.join(engines)} | **Failures:** {len(result['failures'])}")
+    for failure in result["failures"][:50]:
+        print(f"- [{failure['engine']}] {failure['index']} \"{failure['query']}\": {failure['error']}")
+    if len(result["failures"]) > 50:
+        print(f"- ... {len(result['failures']) - 50} more")
+    if result["failures"]:
+        sys.exit(1)
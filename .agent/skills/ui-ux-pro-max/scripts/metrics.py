@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics - Low-overhead counters and histograms in Prometheus text format
+
+core and design_system bind their series up front (per index when it is
+built) and hot paths bump series.value directly, once per warm query;
+totals that follow from other counters are derived when rendered instead of
+counted again. Per-query histograms on the warm path (scoring latency,
+documents scored) are sampled on 1 in SAMPLE_EVERY queries, since two clock
+reads and two bucket updates would use the whole 1% budget alone. Increments
+are not locked for the same reason; a concurrent increment lost to a thread
+switch is an accepted, rare undercount.
+
+Usage:
+    import metrics
+    print(metrics.render())            # Prometheus text exposition
+    metrics.render({"worker": "1234"}) # ... with a label added to every series
+    metrics.write("metrics.prom")      # file dump (e.g. node_exporter textfile collector)
+    metrics.serve(9464)                # GET /metrics from a background thread
+"""
+
+import os
+import threading
+from bisect import bisect_left
+
+
+# ============ CONFIGURATION ============
+PREFIX = "ui_pro_max_"
+SAMPLE_EVERY = 16  # warm-path latency histograms time 1 in this many events
+
+# Latency buckets in seconds, from warm scoring (tens of microseconds) to cold builds
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Size buckets (e.g. documents per query), from the shipped CSVs to large synthetic corpora
+SIZE_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000)
+
+
+# ============ SERIES ============
+class CounterSeries:
+    """One labelled counter value"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class HistogramSeries:
+    """One labelled histogram: per-bucket counts (the last is +Inf) and the sum of observations"""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        # bisect_left finds the first bound >= value, matching Prometheus' inclusive "le"
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """A named metric family; labels(...) returns (and keeps) the series for one label combination.
+
+    A family with collect() has no series of its own: collect() returns
+    {label values: value} when rendered, for counters derived from others.
+    """
+
+    def __init__(self, name, help_text, kind, label_names=(), buckets=None, collect=None):
+        self.name = PREFIX + name
+        self.help = help_text
+        self.kind = kind
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) if buckets else None
+        self.collect = collect
+        self.series = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        series = self.series.get(values)
+        if series is None:
+            with self._lock:
+                series = self.series.setdefault(
+                    values, HistogramSeries(self.buckets) if self.kind == "histogram" else CounterSeries())
+        return series
+
+    def _label_text(self, values, extra=()):
+        pairs = list(zip(self.label_names, values)) + list(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self, extra=()):
+        """Exposition lines for this family; extra (name, value) label pairs go on every series"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self.collect:
+            for values, value in sorted(self.collect().items()):
+                lines.append(f"{self.name}{self._label_text(values, extra)} {value}")
+            return lines
+        for values, series in sorted(self.series.items()):
+            if self.kind == "counter":
+                lines.append(f"{self.name}{self._label_text(values, extra)} {series.value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series.counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._label_text(values, [*extra, ('le', bound)])} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(values, extra)} {series.sum!r}")
+            lines.append(f"{self.name}_count{self._label_text(values, extra)} {cumulative}")
+        return lines
+
+
+REGISTRY = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def _register(name, help_text, kind, label_names, buckets=None, collect=None):
+    with _REGISTRY_LOCK:
+        if name not in REGISTRY:
+            REGISTRY[name] = Metric(name, help_text, kind, label_names, buckets, collect)
+        return REGISTRY[name]
+
+
+def counter(name, help_text, label_names=(), collect=None):
+    """Registered counter family (created once per name); collect() derives its values at render time"""
+    return _register(name, help_text, "counter", label_names, collect=collect)
+
+
+def histogram(name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+    """Registered histogram family (created once per name)"""
+    return _register(name, help_text, "histogram", label_names, buckets)
+
+
+# ============ EXPOSITION ============
+def render(labels=None):
+    """Every registered metric in Prometheus text format, with labels ({name: value}) on every series"""
+    extra = tuple((labels or {}).items())
+    with _REGISTRY_LOCK:
+        families = list(REGISTRY.values())
+    return "\n".join(line for family in families for line in family.render(extra)) + "\n"
+
+
+def write(path):
+    """Dump render() to path, replacing it atomically"""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def serve(port, host="127.0.0.1"):
+    """Serve GET /metrics from a daemon thread; returns the server (call shutdown() to stop)"""
+    # Imported here: http.server costs one-shot CLI runs more than all their searching
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
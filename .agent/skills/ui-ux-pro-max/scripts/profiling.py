@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Profiling - Per-stage wall time and allocations for search and design-system runs
+
+core and design_system mark their stages (CSV load, tokenize, fit, score, top-k,
+projection, reasoning, each domain search, rendering, persistence) through
+core.profile_stage(); the hooks cost one global check until a profiler is
+installed. StageProfiler records each stage by its nesting path and can also
+run cProfile alongside, exporting collapsed stacks for flamegraph tools.
+
+Usage:
+    from profiling import StageProfiler
+    with StageProfiler(cprofile=True) as profiler:
+        search("glassmorphism", "style")
+    profiler.report()                        # -> {"total_ms": ..., "stages": [...]}
+    profiler.write_collapsed("search.folded")  # flamegraph.pl / speedscope input
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+import core
+
+
+class StageProfiler:
+    """Collects wall time and net allocated bytes per stage path (e.g. "search:style/score").
+
+    Paths nest per thread, so stages run on worker threads (search_stacks) start
+    a path of their own. Net allocations are process-wide and include any
+    concurrent threads.
+    """
+
+    def __init__(self, allocations=True, cprofile=False):
+        self.allocations = allocations
+        self.stages = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cprofile = cProfile.Profile() if cprofile else None
+        self._started = None
+        self._elapsed = 0.0
+
+    def start(self):
+        """Install as core's profiler and start measuring"""
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        core.add_profiler(self)
+        self._started = time.perf_counter()
+        if self._cprofile:
+            self._cprofile.enable()
+        return self
+
+    def stop(self):
+        """Uninstall and stop measuring"""
+        if self._cprofile:
+            self._cprofile.disable()
+        self._elapsed += time.perf_counter() - self._started
+        core.remove_profiler(self)
+        if self.allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @contextmanager
+    def stage(self, name):
+        """Time one stage; stages entered inside it are recorded under its path"""
+        stack = self._local.__dict__.setdefault("path", [])
+        stack.append(name)
+        path = "/".join(stack)
+        memory = tracemalloc.get_traced_memory()[0] if self.allocations else 0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - start
+            allocated = tracemalloc.get_traced_memory()[0] - memory if self.allocations else 0
+            with self._lock:
+                entry = self.stages.setdefault(path, {"stage": path, "calls": 0, "wall_ms": 0.0, "alloc_kb": 0.0})
+                entry["calls"] += 1
+                entry["wall_ms"] += wall * 1000
+                entry["alloc_kb"] += allocated / 1024
+            stack.pop()
+
+    def report(self):
+        """JSON-ready breakdown: total wall time and every stage in first-seen order"""
+        return {
+            "total_ms": round(self._elapsed * 1000, 3),
+            "allocations": "net KiB traced by tracemalloc" if self.allocations else None,
+            "stages": [{**entry, "wall_ms": round(entry["wall_ms"], 3), "alloc_kb": round(entry["alloc_kb"], 1)}
+                       for entry in self.stages.values()],
+        }
+
+    def collapsed_stacks(self):
+        """cProfile self time as "caller;...;callee microseconds" lines.
+
+        cProfile only records caller -> callee edges, so each function's self time
+        is split across its callers in proportion to the cumulative time of each
+        edge, the usual approximation when turning cProfile data into flamegraphs.
+        """
+        if not self._cprofile:
+            return []
+        stats = pstats.Stats(self._cprofile).stats
+        children = {}
+        for func, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                children.setdefault(caller, []).append((func, edge[3]))
+
+        def label(func):
+            filename, line, name = func
+            return f"{name} ({filename.rsplit('/', 1)[-1]}:{line})"
+
+        lines = {}
+
+        def walk(func, path, frames, share):
+            frames = frames + [label(func)]
+            micros = int(stats[func][2] * share * 1e6)
+            if micros:
+                key = ";".join(frames)
+                lines[key] = lines.get(key, 0) + micros
+            for child, edge_cum in children.get(func, []):
+                child_cum = stats[child][3]
+                # Recursion folds into the first frame; sub-microsecond branches are dropped
+                if child in path or not child_cum or share * edge_cum < 1e-6 or len(frames) > 64:
+                    continue
+                walk(child, path | {child}, frames, share * edge_cum / child_cum)
+
+        for func, (_, _, _, _, callers) in stats.items():
+            if not callers:
+                walk(func, {func}, [], 1.0)
+        return [f"{stack} {micros}" for stack, micros in sorted(lines.items())]
+
+    def write_collapsed(self, path):
+        """Write collapsed stacks to path"""
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.collapsed_stacks():
+                f.write(line + "\n")
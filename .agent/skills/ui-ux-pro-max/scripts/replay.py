@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replay - Re-runs a captured query log as load and reports throughput and latency
+
+Records from querylog.py JSONL files (rotated backups included, oldest first)
+are replayed in order at --concurrency workers, optionally paced to --rate
+calls per second. The target is the in-process API (default) or a local
+server, which receives POST <url>/<kind> with the record's params as a JSON
+body. Paced runs measure latency from each call's scheduled start, so a
+backlog shows up as latency instead of silently lowering the offered load;
+service time (start to finish) is reported alongside.
+
+Usage:
+    python replay.py queries.jsonl.2 queries.jsonl.1 queries.jsonl
+    python replay.py queries.jsonl --concurrency 8 --rate 200 --json
+    python replay.py queries.jsonl --target http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from bench import percentile
+
+
+# ============ LOG LOADING ============
+def load_log(paths, kinds=None, limit=None):
+    """Records from the given JSONL files in order, optionally only some kinds"""
+    records = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if kinds and record.get("kind") not in kinds:
+                    continue
+                records.append(record)
+                if limit and len(records) >= limit:
+                    return records
+    return records
+
+
+# ============ TARGETS ============
+def in_process_target():
+    """Callable running one record against the library; persisted files go to a scratch directory"""
+    from core import search, search_stack, search_stacks
+    from design_system import generate_design_system
+    calls = {
+        "search": search,
+        "search_stack": search_stack,
+        "search_stacks": search_stacks,
+        "generate_design_system": generate_design_system,
+    }
+    scratch = tempfile.mkdtemp(prefix="ui-pro-max-replay-")
+
+    def run(kind, params):
+        if kind == "generate_design_system" and params.get("persist"):
+            params = {**params, "output_dir": scratch}
+        result = calls[kind](**params)
+        return not (isinstance(result, dict) and "error" in result)
+    return run
+
+
+def http_target(url):
+    """Callable POSTing one record to a local server"""
+    base = url.rstrip("/")
+
+    def run(kind, params):
+        request = urllib.request.Request(f"{base}/{kind}", data=json.dumps(params).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            return 200 <= response.status < 300
+    return run
+
+
+# ============ REPLAY ============
+def _summary(latencies):
+    """Percentiles in milliseconds"""
+    samples = sorted(latencies)
+    if not samples:
+        return {}
+    return {
+        "mean": round(sum(samples) / len(samples), 3),
+        "p50": round(percentile(samples, 50), 3),
+        "p90": round(percentile(samples, 90), 3),
+        "p99": round(percentile(samples, 99), 3),
+        "max": round(samples[-1], 3),
+    }
+
+
+def replay(records, target, concurrency=1, rate=None):
+    """Run every record against target; returns throughput, error count and latency percentiles"""
+    lock = threading.Lock()
+    latency, service, by_kind, errors = [], [], {}, []
+    started = time.perf_counter()
+
+    def one(i, record):
+        scheduled = started + i / rate if rate else None
+        if scheduled:
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        begin = time.perf_counter()
+        try:
+            ok = target(record["kind"], record.get("params", {}))
+            error = None if ok else "error result"
+        except Exception as e:  # a failing call is counted, not fatal to the run
+            error = f"{type(e).__name__}: {e}"
+        end = time.perf_counter()
+        with lock:
+            service.append((end - begin) * 1000)
+            latency.append((end - (scheduled or begin)) * 1000)
+            by_kind.setdefault(record["kind"], []).append((end - begin) * 1000)
+            if error:
+                errors.append({"index": i, "kind": record["kind"], "error": error})
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        list(pool.map(one, range(len(records)), records))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "calls": len(records),
+        "errors": len(errors),
+        "concurrency": concurrency,
+        "rate": rate,
+        "duration_s": round(elapsed, 3),
+        "throughput": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": _summary(latency),
+        "service_ms": _summary(service),
+        "by_kind": {kind: {"calls": len(ms), **_summary(ms)} for kind, ms in by_kind.items()},
+        "error_samples": errors[:10],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a UI Pro Max query log")
+    parser.add_argument("logs", nargs="+", help="Query log files, oldest first (e.g. queries.jsonl.1 queries.jsonl)")
+    parser.add_argument("--concurrency", "-c", type=int, default=1, help="Concurrent workers (default: 1)")
+    parser.add_argument("--rate", "-r", type=float, default=None, help="Offered load in calls per second (default: as fast as possible)")
+    parser.add_argument("--target", "-t", default="inproc", help="'inproc' (default) or a server URL such as http://127.0.0.1:8765")
+    parser.add_argument("--kind", action="append", choices=["search", "search_stack", "search_stacks", "generate_design_system"], help="Only replay these call kinds")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many records")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    if args.concurrency < 1 or (args.rate is not None and args.rate <= 0):
+        parser.error("--concurrency must be 1 or more and --rate above 0")
+
+    records = load_log(args.logs, args.kind, args.limit)
+    target = in_process_target() if args.target == "inproc" else http_target(args.target)
+    report = replay(records, target, args.concurrency, args.rate)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        lat, svc = report["latency_ms"], report["service_ms"]
+        print(f"## Replay\n**Calls:** {report['calls']} | **Errors:** {report['errors']} | "
+              f"**Duration:** {report['duration_s']}s | **Throughput:** {report['throughput']}/s\n")
+        if lat:
+            print(f"- **Latency (ms):** p50 {lat['p50']} | p90 {lat['p90']} | p99 {lat['p99']} | max {lat['max']}")
+            print(f"- **Service time (ms):** p50 {svc['p50']} | p90 {svc['p90']} | p99 {svc['p99']} | max {svc['max']}")
+        for kind, stats in report["by_kind"].items():
+            print(f"- **{kind}:** {stats['calls']} calls, p50 {stats['p50']} ms, p99 {stats['p99']} ms")
+        for error in report["error_samples"]:
+            print(f"- record {error['index']} ({error['kind']}): {error['error']}")
+    if report["errors"] and report["errors"] == report["calls"]:
+        sys.exit(1)
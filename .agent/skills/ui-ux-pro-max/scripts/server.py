@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Server - Pre-fork HTTP server over warm, copy-on-write indexes
+
+The master warms every index (core.warm_all, with the vectors,
+neighbours and prefixes built too), the join graph and the palette engine,
+calls gc.freeze() so the collector leaves those objects alone, and forks
+--workers workers. Workers inherit the warm state through copy-on-write pages
+and accept connections on one shared listening socket (TCP, or a Unix socket
+with --unix), so N workers use N cores with no GIL between them.
+
+A worker exits after --max-requests requests and the master forks a
+replacement from its still-warm state. When a CSV changes (checked every
+--reload-interval seconds) or on SIGHUP, the master re-warms, forks a new
+generation of workers and tells the old one to finish its current request
+and exit. SIGTERM or SIGINT stops every worker the same way. POSIX only.
+
+Endpoints (one request per connection):
+    POST /search, /search_stack, /search_stacks, /generate_design_system
+         JSON object of keyword arguments -> JSON result (400 when it holds "error")
+    GET  /metrics   Prometheus text from the worker that answers, not a total over
+                    workers: every series carries worker="<pid>" and counts from
+                    that worker's fork (warm-up builds appear in each). Repeated
+                    scrapes reach the workers in turn, so totals are
+                    sum without (worker) (...) over their latest values
+
+Usage:
+    python server.py --workers 4 --port 8765 --max-requests 10000
+    python server.py --unix /tmp/ui-pro-max.sock
+    python replay.py queries.jsonl --target http://127.0.0.1:8765 --concurrency 8
+    kill -HUP <master pid>                       # reload now
+"""
+
+import argparse
+import gc
+import inspect
+import json
+import os
+import select
+import signal
+import socket
+import stat
+import sys
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler
+from socketserver import BaseServer
+
+import core
+import metrics
+from core import search, search_stack, search_stacks
+from design_system import generate_design_system
+from joins import join_graph
+from palette import palette_engine
+
+
+# ============ CONFIGURATION ============
+PORT = 8765
+MAX_REQUESTS = 10000     # requests a worker serves before it is replaced (0: never)
+RELOAD_INTERVAL = 2.0    # seconds between CSV change checks (0: only on SIGHUP)
+GRACE = 30.0             # seconds workers get to finish their request when stopped
+BACKLOG = 128
+MAX_BODY = 1 << 20
+
+CALLS = {
+    "search": search,
+    "search_stack": search_stack,
+    "search_stacks": search_stacks,
+    "generate_design_system": generate_design_system,
+}
+
+
+# ============ REQUEST HANDLING ============
+class Handler(BaseHTTPRequestHandler):
+    """POST /<call> with JSON keyword arguments, GET /metrics"""
+    server_version = "UIProMax"
+    wbufsize = -1  # buffered: headers and body leave in one send, not two small ones held up by Nagle
+
+    def _send(self, status, body, content_type="application/json; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _json(self, status, result):
+        self._send(status, json.dumps(result, ensure_ascii=False))
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self._json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        self._send(200, metrics.render({"worker": os.getpid()}), metrics.CONTENT_TYPE)
+
+    def do_POST(self):
+        name = self.path.split("?")[0].strip("/")
+        call = CALLS.get(name)
+        if call is None:
+            self._json(404, {"error": f"Unknown call: {name}", "available": list(CALLS)})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY:
+                raise ValueError(f"body over {MAX_BODY} bytes")
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError("expected a JSON object of keyword arguments")
+            inspect.signature(call).bind(**params)
+        except (ValueError, TypeError) as e:
+            self._json(400, {"error": f"Invalid request: {e}"})
+            return
+        if params.get("persist"):
+            self._json(400, {"error": "persist writes files on the server and is not available over HTTP"})
+            return
+        try:
+            result = call(**params)
+        except Exception as e:
+            traceback.print_exc()
+            self._json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        if isinstance(result, str):
+            result = {"output": result}
+        self._json(400 if "error" in result else 200, result)
+
+    def log_message(self, *args):
+        pass
+
+
+class _Listener(BaseServer):
+    """socketserver loop over the listening socket every worker inherited from the master"""
+    timeout = 1.0  # handle_request returns at least this often, so a stop request is noticed
+
+    def __init__(self, sock):
+        super().__init__(sock.getsockname(), Handler)
+        self.socket = sock
+        self.served = 0
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def get_request(self):
+        # Non-blocking listener: a worker that loses the race for a connection gets
+        # BlockingIOError, which handle_request ignores, instead of blocking in accept
+        conn, address = self.socket.accept()
+        conn.setblocking(True)
+        return conn, address
+
+    def finish_request(self, request, client_address):
+        self.served += 1
+        super().finish_request(request, client_address)
+
+    def shutdown_request(self, request):
+        try:
+            request.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        request.close()
+
+
+def _serve(sock, max_requests):
+    """Worker body: answer requests until stopped, max_requests are served or the master is gone"""
+    stopping = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    master = os.getppid()
+    server = _Listener(sock)
+    while not stopping and not (max_requests and server.served >= max_requests) and os.getppid() == master:
+        server.handle_request()
+
+
+# ============ MASTER ============
+def _data_mtimes():
+    """{CSV path: mtime} under core.DATA_DIR, to notice edited, added or removed files"""
+    return {str(path): path.stat().st_mtime for path in sorted(core.DATA_DIR.rglob("*.csv"))}
+
+
+def listen(host="127.0.0.1", port=PORT, path=None):
+    """Non-blocking listening socket on host:port, or on a Unix socket at path"""
+    if path:
+        if os.path.exists(path) and stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)  # left behind by a previous run
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(path)
+        sock.listen(BACKLOG)
+    else:
+        sock = socket.create_server((host, port), backlog=BACKLOG)
+    sock.setblocking(False)
+    return sock
+
+
+class Master:
+    """Warms the indexes, forks workers over them and keeps their number up until stopped"""
+
+    def __init__(self, sock, workers, max_requests=MAX_REQUESTS, reload_interval=RELOAD_INTERVAL, warm_workers=None):
+        self.sock = sock
+        self.count = workers
+        self.max_requests = max_requests
+        self.reload_interval = reload_interval
+        self.warm_workers = warm_workers
+        self.workers = {}  # pid -> generation
+        self.generation = 0
+        self.mtimes = {}
+
+    def warm(self):
+        """Build missing or stale indexes and shared engines, then freeze them out of the collector's reach"""
+        start = time.perf_counter()
+        gc.unfreeze()  # replaced indexes must be collectable again
+        report = core.warm_all(self.warm_workers, lazy=True)
+        join_graph().resolve_all()
+        palette_engine()
+        gc.collect()
+        gc.freeze()
+        self.mtimes = _data_mtimes()
+        print(f"[master {os.getpid()}] warmed {len(report['indexes'])} indexes in "
+              f"{(time.perf_counter() - start) * 1000:,.0f} ms (generation {self.generation})", file=sys.stderr)
+
+    def spawn(self):
+        """Fork one worker of the current generation"""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.set_wakeup_fd(-1)
+                os.close(self._wake_r)
+                os.close(self._wake_w)
+                _serve(self.sock, self.max_requests)
+            except BaseException:
+                traceback.print_exc()
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)  # skip the master's atexit handlers
+        self.workers[pid] = self.generation
+
+    def reap(self, respawn=True):
+        """Collect exited workers, replacing those of the current generation"""
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            generation = self.workers.pop(pid, None)
+            if respawn and generation == self.generation:
+                self.spawn()
+
+    def signal_workers(self, pids, signum=signal.SIGTERM):
+        for pid in pids:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def reload(self):
+        """Re-warm, fork a fresh generation, then let the previous one finish and exit"""
+        previous = list(self.workers)
+        self.generation += 1
+        self.warm()
+        for _ in range(self.count):
+            self.spawn()
+        self.signal_workers(previous)
+
+    def stop(self):
+        """Ask every worker to finish its request and exit; kill those still running after GRACE"""
+        self.signal_workers(list(self.workers))
+        deadline = time.monotonic() + GRACE
+        while self.workers and time.monotonic() < deadline:
+            self.reap(respawn=False)
+            time.sleep(0.05)
+        self.signal_workers(list(self.workers), signal.SIGKILL)
+        while self.workers:
+            self.reap(respawn=False)
+            time.sleep(0.01)
+
+    def run(self):
+        """Serve until SIGTERM or SIGINT; SIGHUP or a changed CSV reloads"""
+        # Signals only write their number to a pipe; the loop below acts on them
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_w, False)
+        signal.set_wakeup_fd(self._wake_w)
+        for signum in (signal.SIGCHLD, signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: None)
+
+        self.warm()
+        for _ in range(self.count):
+            self.spawn()
+        next_check = time.monotonic() + self.reload_interval
+        try:
+            while True:
+                timeout = max(next_check - time.monotonic(), 0) if self.reload_interval else None
+                readable, _, _ = select.select([self._wake_r], [], [], timeout)
+                signums = set(os.read(self._wake_r, 64)) if readable else set()
+                if signal.SIGTERM in signums or signal.SIGINT in signums:
+                    break
+                self.reap()
+                changed = False
+                if self.reload_interval and time.monotonic() >= next_check:
+                    changed = _data_mtimes() != self.mtimes
+                    next_check = time.monotonic() + self.reload_interval
+                if changed or signal.SIGHUP in signums:
+                    self.reload()
+        finally:
+            self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max pre-fork server")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=PORT, help=f"TCP port (default: {PORT})")
+    parser.add_argument("--unix", metavar="PATH", default=None, help="Listen on a Unix socket at PATH instead of TCP")
+    parser.add_argument("--max-requests", "-m", type=int, default=MAX_REQUESTS, help=f"Replace a worker after this many requests, 0 never (default: {MAX_REQUESTS})")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL, help=f"Seconds between CSV change checks, 0 for SIGHUP only (default: {RELOAD_INTERVAL:g})")
+    parser.add_argument("--warm-workers", type=int, default=None, help="Processes core.warm_all builds indexes in (default: CPU count)")
+    args = parser.parse_args()
+    if not hasattr(os, "fork"):
+        parser.error("the pre-fork server needs os.fork (Linux, macOS or another POSIX system)")
+    if args.workers < 1 or args.max_requests < 0 or args.reload_interval < 0:
+        parser.error("--workers must be 1 or more, --max-requests and --reload-interval 0 or more")
+
+    sock = listen(args.host, args.port, args.unix)
+    where = f"unix:{args.unix}" if args.unix else f"http://{args.host}:{sock.getsockname()[1]}"
+    print(f"[master {os.getpid()}] serving on {where} with {args.workers} workers", file=sys.stderr)
+    try:
+        Master(sock, args.workers, args.max_requests, args.reload_interval, args.warm_workers).run()
+    finally:
+        sock.close()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic Corpus - Schema-faithful CSVs at any row count for scale testing
+
+Every CSV_CONFIG domain, stack and the reasoning table is regenerated from its
+shipped file: same columns, IDs numbered from 1, hex colours stay hex, and
+low-cardinality columns (Severity, Platform, Category, ...) keep their observed
+values and frequencies. Free-text cells draw words from a Zipfian distribution
+over the column's own vocabulary, which grows with the row count following
+Heaps' law so new (synthetic) words keep appearing, and cell lengths follow
+the column's observed word counts.
+
+Usage:
+    python synth.py --rows 100000 --out /tmp/corpus-100k
+    UI_PRO_MAX_DATA_DIR=/tmp/corpus-100k python search.py "glassmorphism dark"
+    python bench.py --data-dir /tmp/corpus-100k -k warm
+"""
+
+import argparse
+import csv
+import random
+import re
+import zlib
+from collections import Counter
+from itertools import accumulate
+from pathlib import Path
+
+from core import CSV_CONFIG, STACK_CONFIG, DATA_DIR
+from joins import REASONING_FILE
+
+
+# ============ CONFIGURATION ============
+ZIPF_EXPONENT = 1.07     # word frequency ~ 1 / rank^s, s close to 1 for natural text
+HEAPS_BETA = 0.6         # vocabulary grows as K * rows^beta
+CATEGORICAL_MAX = 20     # columns with at most this many distinct values keep them verbatim
+
+_HEX = re.compile(r"^#[0-9A-Fa-f]{6}$")
+_SYLLABLES = ["ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "xe", "zu", "bra", "cle", "dri", "fen", "gor", "plu"]
+
+
+def source_files():
+    """Relative paths of every CSV the skill reads"""
+    files = [config["file"] for config in CSV_CONFIG.values()]
+    files += [config["file"] for config in STACK_CONFIG.values()]
+    files.append(REASONING_FILE)
+    return list(dict.fromkeys(files))
+
+
+def _synthetic_word(rank):
+    """Deterministic pronounceable word for a vocabulary rank beyond the real words"""
+    syllables = []
+    rank += len(_SYLLABLES)  # at least two syllables, so words pass the tokenizer's length filter
+    while rank:
+        rank, digit = divmod(rank, len(_SYLLABLES))
+        syllables.append(_SYLLABLES[digit])
+    return "".join(syllables)
+
+
+# ============ COLUMN MODELS ============
+class ColumnModel:
+    """How to sample one column: id, hex, categorical or Zipfian free text"""
+
+    def __init__(self, name, values, rows):
+        self.name = name
+        present = [v for v in values if v]
+        counts = Counter(values)
+        if name == "No":
+            self.kind = "id"
+        elif present and all(_HEX.match(v) for v in present):
+            self.kind = "hex"
+        elif len(counts) <= min(CATEGORICAL_MAX, max(len(values) // 2, 1)):
+            self.kind = "categorical"
+            self.choices, weights = zip(*counts.most_common())
+            self.cum_weights = list(accumulate(weights))
+        else:
+            self.kind = "text"
+            self.lengths = [len(v.split()) for v in values]
+            words = Counter(word for v in values for word in v.split())
+            vocab = [word for word, _ in words.most_common()]
+            # Heaps' law fitted to the shipped column, so the vocabulary scales with rows
+            k = len(vocab) / max(len(values), 1) ** HEAPS_BETA
+            size = max(len(vocab), int(k * rows ** HEAPS_BETA))
+            self.vocab = vocab + [_synthetic_word(r) for r in range(size - len(vocab))]
+            self.cum_weights = list(accumulate(1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(size)))
+
+    def sample(self, rng, row_number):
+        if self.kind == "id":
+            return str(row_number)
+        if self.kind == "hex":
+            return f"#{rng.randrange(1 << 24):06X}"
+        if self.kind == "categorical":
+            return rng.choices(self.choices, cum_weights=self.cum_weights)[0]
+        length = rng.choice(self.lengths)
+        return " ".join(rng.choices(self.vocab, cum_weights=self.cum_weights, k=length))
+
+
+# ============ GENERATION ============
+def generate_file(source, target, rows, seed=0):
+    """Write rows synthetic rows shaped like the CSV at source to target; returns the row count"""
+    with open(source, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        columns = reader.fieldnames
+        shipped = list(reader)
+    models = [ColumnModel(col, [row.get(col) or "" for row in shipped], rows) for col in columns]
+    rng = random.Random(seed ^ zlib.crc32(source.name.encode()))
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for number in range(1, rows + 1):
+            writer.writerow([model.sample(rng, number) for model in models])
+    return rows
+
+
+def generate_corpus(out_dir, rows, seed=0, files=None):
+    """Synthetic copy of every shipped CSV (or just files) under out_dir: {file: rows written}"""
+    out_dir = Path(out_dir)
+    written = {}
+    for name in files or source_files():
+        source = DATA_DIR / name
+        if source.exists():
+            written[name] = generate_file(source, out_dir / name, rows, seed)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic UI Pro Max corpus")
+    parser.add_argument("--rows", "-r", type=int, required=True, help="Rows per CSV")
+    parser.add_argument("--out", "-o", required=True, help="Output data directory (use with UI_PRO_MAX_DATA_DIR or bench.py --data-dir)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--files", nargs="+", default=None, metavar="FILE", help="Only these CSVs (e.g. styles.csv stacks/react.csv)")
+    args = parser.parse_args()
+    if args.rows < 1:
+        parser.error("--rows must be 1 or more")
+
+    for name, count in generate_corpus(args.out, args.rows, args.seed, args.files).items():
+        print(f"{name}: {count} rows")
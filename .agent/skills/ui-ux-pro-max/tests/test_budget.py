@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Budgeted output - write_output stays within its character budget, shares it
+by rank, and the CLI rejects budgets too small to hold anything.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import io
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from core import search
+from search import KEEP_FIELDS, MIN_FIELD_CHARS, _plan_fields, write_output
+
+
+def render(result, budget):
+    out = io.StringIO()
+    write_output(result, budget, out)
+    return out.getvalue()
+
+
+class WriteOutputTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = search("glassmorphism dark", "style", max_results=5)
+
+    def test_never_exceeds_the_budget(self):
+        for budget in range(MIN_FIELD_CHARS, 4000, 37):
+            with self.subTest(budget=budget):
+                self.assertLessEqual(len(render(self.result, budget)), budget)
+
+    def test_large_budget_prints_everything(self):
+        text = render(self.result, 10 ** 6)
+        for row in self.result["results"]:
+            for value in row.values():
+                self.assertIn(str(value), text)
+
+    def test_higher_ranks_get_more_room(self):
+        text = render(self.result, 1600)
+        sections = text.split("### Result ")[1:]
+        self.assertGreaterEqual(len(sections), 2)
+        self.assertGreater(len(sections[0]), len(sections[-1]))
+
+    def test_title_goes_first_when_short(self):
+        self.assertTrue(render(self.result, 10 ** 6).startswith("## "))
+        self.assertFalse(render(self.result, 60).startswith("## "))
+
+    def test_error(self):
+        self.assertEqual(render({"error": "boom"}, 100), "Error: boom\n")
+
+
+class PlanFieldsTest(unittest.TestCase):
+    def test_drops_then_truncates(self):
+        row = {f"Field {i}": "x" * 100 for i in range(6)}
+        plan, used = _plan_fields(row, 10 ** 6)
+        self.assertEqual(len(plan), 6)
+        plan, used = _plan_fields(row, 300)
+        self.assertLessEqual(used, 300)
+        self.assertEqual([key for key, _, _ in plan], list(row)[:len(plan)])
+        plan, used = _plan_fields(row, 0)
+        self.assertEqual(len(plan), KEEP_FIELDS)  # leading fields are never dropped
+
+
+class BudgetFlagTest(unittest.TestCase):
+    def run_cli(self, *args):
+        return subprocess.run([sys.executable, str(SCRIPTS / "search.py"), *args], capture_output=True, text=True)
+
+    def test_budget_too_small_is_rejected(self):
+        for budget in ("0", "-5", "9"):
+            with self.subTest(budget=budget):
+                run = self.run_cli("glass", "-d", "style", "--budget", budget)
+                self.assertEqual(run.returncode, 2)
+                self.assertIn("--budget must allow", run.stderr)
+        self.assertEqual(self.run_cli("glass", "-d", "style", "--budget", "39", "--budget-unit", "chars").returncode, 2)
+        self.assertEqual(self.run_cli("glass", "-d", "style", "--budget", "10").returncode, 0)
+
+    def test_filter_with_similar_or_suggest_is_rejected(self):
+        for args in (["Glassmorphism", "--similar", "-d", "style"], ["gla", "--suggest"]):
+            with self.subTest(args=args):
+                run = self.run_cli(*args, "--filter", "Type=General")
+                self.assertEqual(run.returncode, 2)
+                self.assertIn("--filter does not apply", run.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compatibility scoring - best_combinations on the pure-Python path against a
+brute-force reference, and the NumPy tensor against it when NumPy is installed.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import itertools
+import math
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import compatibility
+from compatibility import COMPAT_FIELDS, COMPAT_WEIGHT, DOMAINS, best_combinations
+from core import search
+
+
+def candidates(query, n=4):
+    return {domain: search(query, domain, max_results=n, fields=COMPAT_FIELDS[domain])["results"] for domain in DOMAINS}
+
+
+def reference(rows, k):
+    """Every triple scored from scratch: rank priors plus weighted pairwise cosine"""
+    vectors = compatibility._term_vectors(rows)
+
+    def cosine(a, b):
+        return sum(w * b.get(token, 0.0) for token, w in a.items())
+
+    scored = []
+    for i, j, l in itertools.product(*(range(len(rows[d])) for d in DOMAINS)):
+        s, c, t = vectors["style"][i], vectors["color"][j], vectors["typography"][l]
+        scored.append((1 / (1 + i) + 1 / (1 + j) + 1 / (1 + l)
+                       + COMPAT_WEIGHT * (cosine(s, c) + cosine(s, t) + cosine(c, t)), i, j, l))
+    scored.sort(key=lambda x: -x[0])
+    return [{"score": round(score, 4), "style": i, "color": j, "typography": l} for score, i, j, l in scored[:k]]
+
+
+class CompatibilityTest(unittest.TestCase):
+    QUERIES = ["SaaS dashboard", "beauty spa wellness", "fintech crypto app", "luxury ecommerce"]
+
+    def test_pure_python_matches_reference(self):
+        with mock.patch.object(compatibility, "np", None):
+            for query in self.QUERIES:
+                rows = candidates(query)
+                with self.subTest(query=query):
+                    self.assertEqual(best_combinations(rows, k=5), reference(rows, 5))
+
+    @unittest.skipIf(compatibility.np is None, "NumPy not installed")
+    def test_numpy_matches_pure_python(self):
+        for query in self.QUERIES:
+            rows = candidates(query)
+            with mock.patch.object(compatibility, "np", None):
+                expected = best_combinations(rows, k=8)
+            with self.subTest(query=query):
+                got = best_combinations(rows, k=8)
+                self.assertEqual([(r["style"], r["color"], r["typography"]) for r in got],
+                                 [(r["style"], r["color"], r["typography"]) for r in expected])
+                for a, b in zip(got, expected):
+                    self.assertTrue(math.isclose(a["score"], b["score"], abs_tol=1e-4))
+
+    def test_vectors_are_normalised(self):
+        vectors = compatibility._term_vectors(candidates("SaaS dashboard"))
+        for domain in DOMAINS:
+            for vec in vectors[domain]:
+                self.assertTrue(math.isclose(sum(w * w for w in vec.values()), 1.0) or not vec)
+
+    def test_missing_domain(self):
+        rows = candidates("SaaS dashboard")
+        rows["color"] = []
+        self.assertEqual(best_combinations(rows), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Faceted filtering - bitmap filter masks against a row scan, filtered ranking
+as the full ranking restricted to matching rows, and facet counts.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, search
+
+FILTERS = [
+    {"Platform": ["Web"]},
+    {"Platform": ["web", "MOBILE"]},                     # any value, case-insensitive
+    {"Platform": ["All"], "Severity": ["High"]},         # every column
+    {"Severity": "Low"},
+    {"Platform": ["Nowhere"]},
+]
+
+
+def matches(row, filters):
+    return all((row.get(col) or "").strip().lower() in {v.lower() for v in ([want] if isinstance(want, str) else want)}
+               for col, want in filters.items())
+
+
+class FilterTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = CSV_CONFIG["ux"]
+        cls.index = core._config_index(cls.config)
+
+    def test_mask_matches_row_scan(self):
+        for filters in FILTERS:
+            with self.subTest(filters=filters):
+                mask = self.index.filter_mask(filters)
+                self.assertEqual([idx for idx in range(len(self.index.rows)) if mask >> idx & 1],
+                                 [idx for idx, row in enumerate(self.index.rows) if matches(row, filters)])
+
+    def test_filtered_ranking_restricts_the_full_one(self):
+        full = self.index.bm25.score("touch target accessibility")
+        for filters in FILTERS:
+            with self.subTest(filters=filters):
+                ranked = self.index.bm25.score("touch target accessibility", self.index.filter_mask(filters))
+                self.assertEqual(ranked, [(idx, s) for idx, s in full if matches(self.index.rows[idx], filters)])
+
+    def test_search_results_and_facets(self):
+        for filters in FILTERS:
+            with self.subTest(filters=filters):
+                result = search("animation", "ux", max_results=50, filters=filters, facets=True)
+                self.assertTrue(all(matches(row, filters) for row in result["results"]))
+                hits = [self.index.rows[idx] for idx, score in self.index.bm25.score("animation") if score > 0]
+                hits = [row for row in hits if matches(row, filters)]
+                self.assertEqual(result["count"], min(len(hits), 50))
+                for col in self.config["facet_cols"]:
+                    self.assertEqual(result["facets"][col], dict(Counter(row[col].strip() for row in hits)))
+
+    def test_unknown_column(self):
+        self.assertEqual(search("animation", "ux", filters={"Nope": ["x"]})["error"], "Unknown filter column for ux: Nope")
+
+
+if __name__ == "__main__":
+    unittest.main()
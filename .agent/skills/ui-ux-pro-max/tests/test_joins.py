@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Join graph - NameIndex resolution rules, edges resolved lazily against a full
+resolve_all(), and the report of unresolved references.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from joins import JOIN_RULES, JoinGraph, NameIndex, _normalize, join_graph
+
+STYLES = [{"No": "1", "Name": "Minimalism & Swiss Style"}, {"No": "2", "Name": "Exaggerated Minimalism"},
+          {"No": "3", "Name": "Data-Dense Dashboard"}, {"No": "4", "Name": "Educational Platform"},
+          {"No": "5", "Name": "Minimalism & Swiss Style"}]
+
+
+class NameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.names = NameIndex(STYLES, "Name")
+
+    def test_exact_after_normalising(self):
+        self.assertEqual(self.names.resolve("data dense dashboard"), "3")
+        self.assertEqual(self.names.resolve("  MINIMALISM & swiss-style "), "1")  # first of two equal names
+
+    def test_containment_prefers_prefix_then_shortest(self):
+        self.assertEqual(self.names.resolve("Minimalism"), "1")
+        self.assertEqual(self.names.resolve("Data-Dense"), "3")
+
+    def test_token_overlap(self):
+        self.assertEqual(self.names.resolve("Education Platforms"), "4")  # stems meet
+        self.assertIsNone(self.names.resolve("Swiss Dashboard Platform"))  # overlap below 0.5
+        self.assertIsNone(self.names.resolve(""))
+        self.assertIsNone(self.names.resolve("--"))
+
+
+class JoinGraphTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.full = JoinGraph().resolve_all()
+
+    def test_lazy_edges_match_resolve_all(self):
+        lazy = JoinGraph()
+        for source, _, relation, _, _ in JOIN_RULES:
+            for row_id in list(self.full.rows[source])[:15]:
+                with self.subTest(source=source, row=row_id, relation=relation):
+                    self.assertEqual(lazy.follow(source, row_id, relation), self.full.follow(source, row_id, relation))
+        self.assertLess(len(lazy.edges), len(self.full.edges))
+
+    def test_same_product_palette(self):
+        for row_id, product in self.full.rows["product"].items():
+            for palette in self.full.follow("product", row_id, "palette"):
+                with self.subTest(product=product["Product Type"]):
+                    # Exact for most; "Climate Tech" for "Sustainable Energy / Climate Tech"
+                    self.assertTrue(set(_normalize(palette["Product Type"]).split())
+                                    & set(_normalize(product["Product Type"]).split()))
+
+    def test_most_palettes_match_exactly(self):
+        exact = sum(_normalize(palette["Product Type"]) == _normalize(product["Product Type"])
+                    for row_id, product in self.full.rows["product"].items()
+                    for palette in self.full.follow("product", row_id, "palette"))
+        self.assertGreaterEqual(exact, 90)
+
+    def test_target_filter(self):
+        for row_id in self.full.rows["product"]:
+            landing = self.full.follow("product", row_id, "landing", "landing")
+            self.assertTrue(all("Pattern Name" in row for row in landing))
+        self.assertEqual(self.full.follow("product", None, "landing"), [])
+
+    def test_report(self):
+        report = self.full.report()
+        self.assertEqual(report["edges"], sum(report["relations"].values()))
+        self.assertEqual(report["unresolved_count"], len(report["unresolved"]))
+        for reference in report["unresolved"]:
+            source = self.full.rows[reference["domain"]][reference["row"]]
+            self.assertIn(reference["reference"], source[reference["column"]])
+            self.assertFalse(reference["reference"].lower().startswith(("n/a", "none")))
+
+    def test_cached_while_unchanged(self):
+        self.assertIs(join_graph(), join_graph())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Keyword matching - the Aho-Corasick automaton behind domain routing and
+page-type detection, on overlapping, nested and repeated keywords.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from core import KeywordMatcher
+
+
+def matcher(*keywords):
+    return KeywordMatcher([("kw", keywords)])
+
+
+class KeywordMatcherTest(unittest.TestCase):
+    def test_overlapping_keywords(self):
+        # The textbook set: "she" ends inside "hers", and "he" inside both
+        self.assertEqual(matcher("he", "she", "his", "hers").matches("ushers"), {"he", "she", "hers"})
+        self.assertEqual(matcher("abab", "bab", "ba").matches("ababab"), {"abab", "bab", "ba"})
+
+    def test_nested_keywords(self):
+        m = matcher("dash", "dashboard", "board", "boa", "oar")
+        self.assertEqual(m.matches("admin dashboard"), {"dash", "dashboard", "board", "boa", "oar"})
+        self.assertEqual(m.matches("dashing"), {"dash"})
+
+    def test_failure_links_after_partial_match(self):
+        # "dashbo" fails on "x" and must fall back far enough to still find "box"
+        self.assertEqual(matcher("dashboard", "box").matches("dashbox"), {"box"})
+        self.assertEqual(matcher("aab", "ab").matches("aaab"), {"aab", "ab"})
+
+    def test_no_match_and_empty_text(self):
+        m = matcher("chart", "graph")
+        self.assertEqual(m.matches("landing page"), set())
+        self.assertEqual(m.matches(""), set())
+
+    def test_owners_listed_per_listing(self):
+        m = KeywordMatcher([("style", ["glass", "dark mode"]), ("color", ["dark mode", "palette"])])
+        self.assertEqual(m.owners["dark mode"], ["style", "color"])
+        self.assertEqual(m.matches("a dark mode palette"), {"dark mode", "palette"})
+
+    def test_matches_brute_force_on_random_text(self):
+        rng = random.Random(0)
+        for _ in range(300):
+            keywords = {"".join(rng.choice("ab") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))}
+            text = "".join(rng.choice("abc") for _ in range(rng.randint(0, 20)))
+            with self.subTest(keywords=sorted(keywords), text=text):
+                self.assertEqual(matcher(*keywords).matches(text), {kw for kw in keywords if kw in text})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Metrics - Prometheus text for counters, histograms and derived counters,
+labels added to every series (the server's worker label), and the search
+counters core keeps per index.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import metrics
+from core import search
+from metrics import Metric
+
+
+class RenderTest(unittest.TestCase):
+    def test_counter(self):
+        family = Metric("test_things_total", "Things", "counter", ["kind"])
+        family.labels("a").inc()
+        family.labels("b").inc(3)
+        self.assertEqual(family.render(), ["# HELP ui_pro_max_test_things_total Things",
+                                           "# TYPE ui_pro_max_test_things_total counter",
+                                           'ui_pro_max_test_things_total{kind="a"} 1',
+                                           'ui_pro_max_test_things_total{kind="b"} 3'])
+
+    def test_histogram_buckets_are_cumulative_and_inclusive(self):
+        family = Metric("test_seconds", "Latency", "histogram", buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            family.labels().observe(value)
+        self.assertEqual(family.render()[2:], ['ui_pro_max_test_seconds_bucket{le="0.1"} 2',
+                                               'ui_pro_max_test_seconds_bucket{le="1.0"} 3',
+                                               'ui_pro_max_test_seconds_bucket{le="+Inf"} 4',
+                                               "ui_pro_max_test_seconds_sum 2.65",
+                                               "ui_pro_max_test_seconds_count 4"])
+
+    def test_extra_labels_on_every_series(self):
+        counter = Metric("test_total", "Total", "counter", ["index"])
+        counter.labels("style").inc()
+        histogram = Metric("test_size", "Size", "histogram", ["index"], buckets=(10,))
+        histogram.labels("style").observe(5)
+        derived = Metric("test_derived_total", "Derived", "counter", ["index"], collect=lambda: {("style",): 7})
+        extra = (("worker", 42),)
+        self.assertEqual(counter.render(extra)[2], 'ui_pro_max_test_total{index="style",worker="42"} 1')
+        self.assertEqual(histogram.render(extra)[2], 'ui_pro_max_test_size_bucket{index="style",worker="42",le="10"} 1')
+        self.assertEqual(histogram.render(extra)[-1], 'ui_pro_max_test_size_count{index="style",worker="42"} 1')
+        self.assertEqual(derived.render(extra)[2], 'ui_pro_max_test_derived_total{index="style",worker="42"} 7')
+        self.assertEqual(Metric("test_plain", "Plain", "counter").labels().value, 0)
+
+    def test_label_values_are_escaped(self):
+        family = Metric("test_total", "Total", "counter", ["query"])
+        family.labels('a"b\\c\nd').inc()
+        self.assertEqual(family.render()[2], r'ui_pro_max_test_total{query="a\"b\\c\nd"} 1')
+
+
+class SearchCountersTest(unittest.TestCase):
+    def value(self, text, name, labels):
+        prefix = f"ui_pro_max_{name}{{{labels}}} "
+        return int(next((line[len(prefix):] for line in text.splitlines() if line.startswith(prefix)), 0))
+
+    def test_searches_and_zero_results(self):
+        before = metrics.render()
+        search("glassmorphism", "style")
+        search("xyzzyplugh", "style")
+        after = metrics.render({"worker": 1})
+        for name, labels, delta in [("searches_total", 'index="style"', 2),
+                                    ("zero_result_searches_total", 'index="style"', 1)]:
+            with self.subTest(name=name):
+                self.assertEqual(self.value(after, name, labels + ',worker="1"') - self.value(before, name, labels), delta)
+
+
+if __name__ == "__main__":
+    unittest.main()
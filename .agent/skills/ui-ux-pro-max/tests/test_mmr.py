@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Result diversification - _mmr against the textbook MMR loop, its limits at
+diversity 0 and 1, and diversified search() results.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, MMR_CANDIDATES, _dot, _mmr, search
+
+QUERIES = ["minimal clean", "glass blur dark", "accessible high contrast", "playful colorful animation"]
+
+
+def reference(index, ranked, k, diversity):
+    """Each pick re-scores every remaining candidate against all rows picked so far"""
+    pool = [(idx, score) for idx, score in ranked[:max(MMR_CANDIDATES, k)] if score > 0]
+    best = pool[0][1] if pool else 1
+    picked = []
+    while pool and len(picked) < k:
+        def gain(i):
+            idx, score = pool[i]
+            redundancy = max((_dot(index.vectors[idx], index.vectors[p]) for p, _ in picked), default=0.0)
+            return (1 - diversity) * score / best - diversity * redundancy, -i
+        picked.append(pool.pop(max(range(len(pool)), key=gain)))
+    return picked
+
+
+class MMRTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config = CSV_CONFIG["style"]
+        cls.index = core._config_index(config)
+
+    def test_matches_reference(self):
+        for query in QUERIES:
+            ranked = self.index.bm25.score(query)
+            for diversity in (0.0, 0.3, 0.5, 0.9, 1.0):
+                with self.subTest(query=query, diversity=diversity):
+                    self.assertEqual(_mmr(self.index, ranked, 6, diversity), reference(self.index, ranked, 6, diversity))
+
+    def test_no_diversity_keeps_the_ranking(self):
+        ranked = self.index.bm25.score("minimal clean")
+        self.assertEqual(_mmr(self.index, ranked, 5, 0.0), ranked[:5])
+        self.assertEqual(_mmr(self.index, [(0, 0.0)], 5, 0.5), [])
+
+    def test_diversity_lowers_redundancy(self):
+        def redundancy(picked):
+            return sum(_dot(self.index.vectors[a], self.index.vectors[b])
+                       for i, (a, _) in enumerate(picked) for b, _ in picked[i + 1:])
+
+        for query in QUERIES:
+            ranked = self.index.bm25.score(query)
+            with self.subTest(query=query):
+                self.assertLessEqual(redundancy(_mmr(self.index, ranked, 5, 0.7)), redundancy(ranked[:5]) + 1e-9)
+
+    def test_search_with_diversity(self):
+        plain = search("glass blur dark", "style", max_results=5)
+        diverse = search("glass blur dark", "style", max_results=5, diversity=0.7)
+        self.assertEqual(diverse["count"], 5)
+        self.assertEqual(diverse["results"][0], plain["results"][0])  # the best hit always leads
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Palette lookups - KDTree k-nearest queries against a brute-force scan, and
+the nearest-palette entry point built on them, and malformed-row reporting.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import csv
+import random
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from palette import ROLES, KDTree, PaletteEngine, palette_engine
+
+
+def brute_force(points, point, k):
+    """[(squared distance, point id)] for the k closest points, ties by id"""
+    return sorted((sum((a - b) ** 2 for a, b in zip(point, p)), i) for i, p in enumerate(points))[:k]
+
+
+class KDTreeTest(unittest.TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(0)
+        points = [tuple(rng.uniform(-100, 100) for _ in range(3)) for _ in range(200)]
+        tree = KDTree(points)
+        for _ in range(100):
+            query = tuple(rng.uniform(-120, 120) for _ in range(3))
+            for k in (1, 2, 5, 17):
+                with self.subTest(query=query, k=k):
+                    self.assertEqual(tree.nearest(query, k), brute_force(points, query, k))
+
+    def test_ties_and_duplicates_break_by_id(self):
+        # Integer grid with repeated points: many equal distances
+        rng = random.Random(1)
+        points = [(rng.randint(0, 3), rng.randint(0, 3)) for _ in range(60)]
+        tree = KDTree(points)
+        for query in [(x, y) for x in range(-1, 5) for y in range(-1, 5)]:
+            for k in (2, 4, 9):
+                with self.subTest(query=query, k=k):
+                    self.assertEqual(tree.nearest(query, k), brute_force(points, query, k))
+
+    def test_k_beyond_size_returns_every_point(self):
+        points = [(0.0, 0.0, 0.0), (1.0, 1.0, 1.0), (5.0, 0.0, 0.0)]
+        self.assertEqual(KDTree(points).nearest((0.9, 0.9, 0.9), 10), brute_force(points, (0.9, 0.9, 0.9), 10))
+        self.assertEqual(KDTree([]).nearest((0.0, 0.0), 3), [])
+
+    def test_k_below_one_is_rejected(self):
+        with self.assertRaises(ValueError):
+            KDTree([(0.0, 0.0)]).nearest((1.0, 1.0), 0)
+
+
+class NearestPaletteTest(unittest.TestCase):
+    def test_exact_colour_comes_first(self):
+        engine = palette_engine()
+        row = engine.rows[0]
+        result = engine.nearest(row["Primary (Hex)"], 3)
+        self.assertEqual(result["count"], 3)
+        self.assertEqual(result["results"][0]["delta_e"], 0)
+        self.assertEqual([r["delta_e"] for r in result["results"]], sorted(r["delta_e"] for r in result["results"]))
+
+    def test_bad_input(self):
+        engine = palette_engine()
+        self.assertIn("error", engine.nearest("blue"))
+        self.assertIn("error", engine.nearest("#2563EB", role="border"))
+        self.assertIn("error", engine.nearest("#2563EB", 0))
+        self.assertIn("error", engine.nearest("#2563EB", -2))
+
+    def test_malformed_rows_are_reported(self):
+        fields = ["No", "Product Type", *ROLES.values()]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "colors.csv"
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(fields)
+                writer.writerow(["1", "Good", "#2563EB", "#3B82F6", "#F97316", "#F8FAFC", "#1E293B"])
+                writer.writerow(["2", "Bad", "#2563EB", "blue", "#F97316", "#F8FAFC", "#1E29"])
+            engine = PaletteEngine(path)
+        self.assertEqual([row["Product Type"] for row in engine.rows], ["Good"])
+        self.assertEqual(engine.malformed, [{"palette": "Bad", "row": "2",
+                                             "columns": {"Secondary (Hex)": "blue", "Text (Hex)": "#1E29"}}])
+
+
+if __name__ == "__main__":
+    unittest.main()
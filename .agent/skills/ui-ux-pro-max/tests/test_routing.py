@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Auto-routing - detect_domains on per-term score bounds, typo correction
+before routing, and routing without building the domains' indexes.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import detect_domain, detect_domains, search
+
+
+class RoutingTest(unittest.TestCase):
+    def test_queries_reach_their_domain(self):
+        for query, domain in [("glassmorphism dark", "style"), ("color palette", "color"), ("real-time trend", "chart"),
+                              ("hero testimonial pricing", "landing"), ("elegant luxury serif", "typography"),
+                              ("useEffect waterfall", "react"), ("lucide icon", "icons"), ("compare categories", "chart")]:
+            with self.subTest(query=query):
+                self.assertEqual(detect_domain(query), domain)
+
+    def test_close_runners_up_are_merged(self):
+        domains = detect_domains("ecommerce product page")
+        self.assertEqual(domains, ["product", "landing"])
+        result = search("ecommerce product page", max_results=4)
+        self.assertEqual(result["domains"], domains)
+        self.assertTrue({row["Domain"] for row in result["results"]} <= set(domains))
+
+    def test_typos_are_routed_after_correction(self):
+        self.assertEqual(detect_domains("dashbord"), ["product"])
+        self.assertEqual(detect_domains("scrol performance"), ["ux"])
+        # Without correction the misspelt token matches nowhere and the query falls back to style
+        self.assertEqual(detect_domains("dashbord", max_edit_distance=0), ["style"])
+
+    def test_unmatched_query_falls_back_to_style(self):
+        self.assertEqual(detect_domains("xyzzy"), ["style"])
+        self.assertEqual(detect_domains("xyzzy", candidates=["ux", "web"]), ["ux"])
+
+    def test_candidates_limit_routing(self):
+        self.assertEqual(detect_domains("color palette", candidates=["style", "typography"])[0], "style")
+
+    def test_routing_builds_no_index(self):
+        core.set_data_dir(core.DATA_DIR)  # empty every cache
+        detect_domains("dashbord accessibility")
+        self.assertEqual(core._INDEX_CACHE, {})
+        search("dashbord")
+        self.assertEqual([key[0] for key in core._INDEX_CACHE], [str(core.DATA_DIR / "products.csv")])
+
+
+if __name__ == "__main__":
+    unittest.main()
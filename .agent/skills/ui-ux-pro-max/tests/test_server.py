@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pre-fork server - a master with two workers answering /search and /metrics
+like the in-process calls, rejecting bad requests, replacing workers after
+--max-requests and stopping on SIGTERM.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import unittest
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+from core import search
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "the pre-fork server needs os.fork")
+class ServerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.master = subprocess.Popen(
+            [sys.executable, str(SCRIPTS / "server.py"), "--workers", "2", "--port", "0", "--max-requests", "5",
+             "--reload-interval", "0", "--warm-workers", "1"],
+            stderr=subprocess.PIPE, text=True)
+        line = cls.master.stderr.readline()
+        cls.url = re.search(r"http://[\d.]+:\d+", line).group(0)
+
+    @classmethod
+    def tearDownClass(cls):
+        if cls.master.poll() is None:
+            cls.master.kill()
+            cls.master.wait()
+        cls.master.stderr.close()
+
+    def request(self, path, params=None):
+        data = None if params is None else json.dumps(params).encode()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url + path, data), timeout=60) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode()
+
+    def test_search_matches_in_process(self):
+        params = {"query": "glassmorphism dark", "domain": "style", "max_results": 3}
+        status, body = self.request("/search", params)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), json.loads(json.dumps(search(**params))))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.request("/nope", {})[0], 404)
+        self.assertEqual(self.request("/search", {"no_such_arg": 1})[0], 400)
+        self.assertEqual(self.request("/search", {"query": "x", "domain": "style", "fields": ["Nope"]})[0], 400)
+        self.assertEqual(self.request("/generate_design_system", {"query": "spa", "persist": True})[0], 400)
+        self.assertEqual(self.request("/elsewhere")[0], 404)
+
+    def test_metrics_name_the_worker_and_workers_are_replaced(self):
+        workers = set()
+        for _ in range(12):  # more than two workers' --max-requests
+            status, body = self.request("/metrics")
+            self.assertEqual(status, 200)
+            workers |= set(re.findall(r'worker="(\d+)"', body))
+        self.assertNotIn(str(self.master.pid), workers)
+        self.assertGreater(len(workers), 2)
+
+    def test_zz_stops_on_sigterm(self):
+        self.master.send_signal(signal.SIGTERM)
+        self.assertEqual(self.master.wait(timeout=30), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Multi-stack search - search_stacks' merged top-k against each stack searched
+on its own, merged paging and the errors it reports.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from core import _search_csv_scored, _stack_config, search_stack, search_stacks
+
+STACKS = ["react", "vue", "svelte", "flutter"]
+
+
+def merged_reference(query, stacks, k):
+    """Every stack searched in turn, merged on normalised score, ties in stack then rank order"""
+    hits = []
+    for order, stack in enumerate(stacks):
+        scored, _ = _search_csv_scored(_stack_config(stack), query, 100)
+        hits += [(-score, order, rank, {"Stack": stack, **row}) for rank, (score, row) in enumerate(scored)]
+    return [row for *_, row in sorted(hits, key=lambda x: x[:3])[:k]]
+
+
+class SearchStacksTest(unittest.TestCase):
+    def test_matches_sequential_merge(self):
+        for query in ("state management", "list performance", "accessibility labels", "xyzzy"):
+            with self.subTest(query=query):
+                result = search_stacks(query, STACKS, max_results=7)
+                self.assertEqual(result["results"], merged_reference(query, STACKS, 7))
+                self.assertEqual(result["count"], len(result["results"]))
+                self.assertEqual(result["stacks"], STACKS)
+
+    def test_single_stack_matches_search_stack(self):
+        merged = search_stacks("form validation", ["react"], max_results=5)["results"]
+        alone = search_stack("form validation", "react", max_results=5)["results"]
+        self.assertEqual(merged, [{"Stack": "react", **row} for row in alone])
+
+    def test_pages_tile_the_merged_ranking(self):
+        full = search_stacks("state management", STACKS, max_results=12)["results"]
+        pages, offset = [], 0
+        while offset is not None and offset < 12:
+            page = search_stacks("state management", STACKS, max_results=4, offset=offset)
+            pages += page["results"]
+            offset = page.get("next_offset")
+        self.assertEqual(pages, full)
+
+    def test_duplicates_and_unknown_stacks(self):
+        self.assertEqual(search_stacks("state", ["vue", "vue", "react"], max_results=3)["stacks"], ["vue", "react"])
+        self.assertIn("error", search_stacks("state", ["react", "cobol"]))
+        self.assertIn("error", search_stacks("state", ["react"], fields=["Nope"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
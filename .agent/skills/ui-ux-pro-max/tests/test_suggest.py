@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Autocomplete - PrefixIndex completions against a linear scan with the same
+ranking rules, the precomputed short prefixes, and suggest() per domain or stack.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import random
+import sys
+import unittest
+from collections import Counter
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, _SUGGEST_CACHE_K, PrefixIndex, suggest
+
+
+def reference(titles, frequencies, prefix, k):
+    """Scan every title suffix and term: title starts, then later title words, then terms"""
+    prefix = " ".join(prefix.lower().split())
+    best = {}
+    for title, count in Counter(t.strip() for t in titles if t and t.strip()).items():
+        words = title.lower().split()
+        for i in range(len(words)):
+            if " ".join(words[i:]).startswith(prefix):
+                rank = (min(i, 1), -count, title.lower(), title)
+                if rank[2] not in best or rank < best[rank[2]][0]:
+                    best[rank[2]] = (rank, "title", count)
+    for term, freq in frequencies.items():
+        if term.startswith(prefix):
+            rank = (2, -freq, term, term)
+            if term not in best or rank < best[term][0]:
+                best[term] = (rank, "term", freq)
+    return [{"text": rank[3], "type": kind, "count": count} for rank, kind, count in sorted(best.values())[:k]]
+
+
+class PrefixIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config = CSV_CONFIG["style"]
+        index = core._config_index(config)
+        cls.titles = [row.get(config["title_col"], "") for row in index.rows]
+        cls.frequencies = dict(index.bm25.doc_freqs)
+        cls.prefixes = PrefixIndex(cls.titles, cls.frequencies)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(0)
+        words = sorted(self.frequencies) + [t.lower() for t in self.titles]
+        prefixes = {w[:rng.randint(1, len(w))] for w in rng.sample(words, 200)} | {"glass", "liquid gl", "zzz", "  Glass  "}
+        for prefix in sorted(prefixes):
+            for k in (1, 5, _SUGGEST_CACHE_K + 3):
+                with self.subTest(prefix=prefix, k=k):
+                    self.assertEqual(self.prefixes.suggest(prefix, k), reference(self.titles, self.frequencies, prefix, k))
+
+    def test_title_tiers(self):
+        texts = [s["text"] for s in self.prefixes.suggest("glass", 10)]
+        self.assertEqual(texts[0], "Glassmorphism")
+        self.assertIn("Liquid Glass", texts)  # matches from a later word
+        self.assertLess(texts.index("Liquid Glass"), texts.index("glass"))  # titles before terms
+
+    def test_empty(self):
+        self.assertEqual(self.prefixes.suggest(""), [])
+        self.assertEqual(self.prefixes.suggest("gl", 0), [])
+        self.assertEqual(PrefixIndex([], {}).suggest("a"), [])
+
+
+class SuggestTest(unittest.TestCase):
+    def test_domains_and_stacks(self):
+        self.assertEqual(suggest("glass")[0]["text"], "Glassmorphism")
+        self.assertTrue(all(s["text"].lower().startswith("ser") or " ser" in s["text"].lower()
+                            for s in suggest("ser", "typography")))
+        self.assertTrue(suggest("use", stack="react"))
+        self.assertEqual(suggest("use", stack="cobol"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -16,9 +16,15 @@ Usage:
 import csv
 import json
 import os
+import time
 from datetime import datetime
 from pathlib import Path
-from core import search, DATA_DIR
+import core
+import metrics
+from core import search, KeywordMatcher, observed, profile_stage
+from joins import join_graph
+from compatibility import best_combinations
+from palette import CONTRAST_CHECKS, contrast_ratio
 
 
 # ============ CONFIGURATION ============
@@ -32,37 +38,99 @@ SEARCH_CONFIG = {
     "typography": {"max_results": 2}
 }
 
+# Style candidates are re-ranked by their BM25F match with the reasoning rule's
+# style priorities, weighted first to last; STYLE_POOL candidates are considered
+PRIORITY_WEIGHTS = (2.0, 1.0)
+STYLE_POOL = 10
+
+_GENERATE_SECONDS = metrics.histogram("generate_seconds", "Design system generation latency (search, reasoning and joins)")
+_GENERATIONS = _GENERATE_SECONDS.labels()
+
+# Page type keyword groups, checked in order (first group with any match wins)
+PAGE_PATTERNS = [
+    (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
+    (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
+    (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
+    (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
+    (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
+    (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
+    (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
+    (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
+    (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
+    (["empty", "404", "error", "not found", "zero"], "Empty State"),
+]
+
+_PAGE_MATCHER = KeywordMatcher((order, keywords) for order, (keywords, _) in enumerate(PAGE_PATTERNS))
+
 
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
     def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+        self._reasoning_data = None
+        self.graph = join_graph()  # resolves only the edges a generation follows
+
+    @property
+    def reasoning_data(self) -> list:
+        """Reasoning rules, read only when no product -> reasoning edge resolves."""
+        if self._reasoning_data is None:
+            self._reasoning_data = self._load_reasoning()
+        return self._reasoning_data
 
     def _load_reasoning(self) -> list:
         """Load reasoning rules from CSV."""
-        filepath = DATA_DIR / REASONING_FILE
+        filepath = core.DATA_DIR / REASONING_FILE
         if not filepath.exists():
             return []
         with open(filepath, 'r', encoding='utf-8') as f:
             return list(csv.DictReader(f))
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
+    def _multi_domain_search(self, query: str, style_priority: list = None, domains: list = None) -> dict:
         """Execute searches across multiple domains."""
         results = {}
         for domain, config in SEARCH_CONFIG.items():
+            if domains is not None and domain not in domains:
+                continue
             if domain == "style" and style_priority:
-                # For style, also search with priority keywords
-                priority_query = " ".join(style_priority[:2]) if style_priority else query
-                combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                # For style, also search with priority keywords, then order by priority
+                priorities = style_priority[:len(PRIORITY_WEIGHTS)]
+                result = search(f"{query} {' '.join(priorities)}", domain, STYLE_POOL)
+                results[domain] = self._rank_by_priority(result, priorities, config["max_results"])
             else:
                 results[domain] = search(query, domain, config["max_results"])
         return results
 
+    def _rank_by_priority(self, result: dict, priorities: list, max_results: int) -> dict:
+        """Keep the max_results style rows that best match the priorities, in search order on ties.
+
+        Each priority adds its weight times the row's BM25F score for it, normalised by
+        that priority's score ceiling, so a Style Category hit outweighs a keyword one.
+        """
+        rows = result.get("results")
+        if not rows:
+            return result
+        config = core.CSV_CONFIG["style"]
+        index = core._config_index(config)
+        weighted = []
+        for priority, weight in zip(priorities, PRIORITY_WEIGHTS):
+            ceiling = index.bm25.max_possible_score(priority) or 1
+            weighted.append((weight / ceiling, dict(index.bm25.score(priority))))
+
+        def priority_score(row):
+            idx = index.find_row(row.get(config["title_col"], ""), config["title_col"])
+            return sum(scale * scores.get(idx, 0.0) for scale, scores in weighted)
+
+        ranked = sorted(rows, key=priority_score, reverse=True)[:max_results]
+        return {**result, "count": len(ranked), "results": ranked}
+
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
+        # Follow the precomputed product -> reasoning edge
+        linked = self.graph.follow("product", self.graph.lookup("product", category), "reasoning")
+        if linked:
+            return linked[0]
+
         category_lower = category.lower()
 
         # Try exact match first
@@ -109,6 +177,7 @@ class DesignSystemGenerator:
             pass
 
         return {
+            "rule_id": rule.get("No"),
             "pattern": rule.get("Recommended_Pattern", ""),
             "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
             "color_mood": rule.get("Color_Mood", ""),
@@ -119,48 +188,47 @@ class DesignSystemGenerator:
             "severity": rule.get("Severity", "MEDIUM")
         }
 
-    def _select_best_match(self, results: list, priority_keywords: list) -> dict:
-        """Select best matching result based on priority keywords."""
-        if not results:
-            return {}
-
-        if not priority_keywords:
-            return results[0]
-
-        # First: try exact style name match
-        for priority in priority_keywords:
-            priority_lower = priority.lower().strip()
-            for result in results:
-                style_name = result.get("Style Category", "").lower()
-                if priority_lower in style_name or style_name in priority_lower:
-                    return result
-
-        # Second: score by keyword match in all fields
-        scored = []
-        for result in results:
-            result_str = str(result).lower()
-            score = 0
-            for kw in priority_keywords:
-                kw_lower = kw.lower().strip()
-                # Higher score for style name match
-                if kw_lower in result.get("Style Category", "").lower():
-                    score += 10
-                # Lower score for keyword field match
-                elif kw_lower in result.get("Keywords", "").lower():
-                    score += 3
-                # Even lower for other field matches
-                elif kw_lower in result_str:
-                    score += 1
-            scored.append((score, result))
-
-        scored.sort(key=lambda x: x[0], reverse=True)
-        return scored[0][1] if scored and scored[0][0] > 0 else results[0]
-
     def _extract_results(self, search_result: dict) -> list:
         """Extract results list from search result dict."""
         return search_result.get("results", [])
 
-    def generate(self, query: str, project_name: str = None) -> dict:
+    def _style_section(self, style: dict) -> dict:
+        """Style block of the recommendation."""
+        return {
+            "name": style.get("Style Category", "Minimalism"),
+            "type": style.get("Type", "General"),
+            "effects": style.get("Effects & Animation", ""),
+            "keywords": style.get("Keywords", ""),
+            "best_for": style.get("Best For", ""),
+            "performance": style.get("Performance", ""),
+            "accessibility": style.get("Accessibility", "")
+        }
+
+    def _color_section(self, color: dict) -> dict:
+        """Colors block of the recommendation, with WCAG contrast ratios."""
+        section = {
+            "primary": color.get("Primary (Hex)", "#2563EB"),
+            "secondary": color.get("Secondary (Hex)", "#3B82F6"),
+            "cta": color.get("CTA (Hex)", "#F97316"),
+            "background": color.get("Background (Hex)", "#F8FAFC"),
+            "text": color.get("Text (Hex)", "#1E293B"),
+            "notes": color.get("Notes", "")
+        }
+        section["contrast"] = {f"{fg}/{bg}": contrast_ratio(section[fg], section[bg]) for fg, bg, _ in CONTRAST_CHECKS}
+        return section
+
+    def _typography_section(self, typography: dict, reasoning: dict) -> dict:
+        """Typography block of the recommendation."""
+        return {
+            "heading": typography.get("Heading Font", "Inter"),
+            "body": typography.get("Body Font", "Inter"),
+            "mood": typography.get("Mood/Style Keywords", reasoning.get("typography_mood", "")),
+            "best_for": typography.get("Best For", ""),
+            "google_fonts_url": typography.get("Google Fonts URL", ""),
+            "css_import": typography.get("CSS Import", "")
+        }
+
+    def generate(self, query: str, project_name: str = None, alternatives: int = 0) -> dict:
         """Generate complete design system recommendation."""
         # Step 1: First search product to get category
         product_result = search(query, "product", 1)
@@ -170,25 +238,50 @@ class DesignSystemGenerator:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with profile_stage("reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Follow join graph edges from the product and its reasoning rule
+        product_id = self.graph.lookup("product", category) if product_results else None
+        rule_id = reasoning.get("rule_id")
+        with profile_stage("joins"):
+            linked = {
+                "color": self.graph.follow("product", product_id, "palette"),
+                "landing": (self.graph.follow("product", product_id, "landing", "landing")
+                            or self.graph.follow("reasoning", rule_id, "landing", "landing")),
+            }
 
-        # Step 4: Select best matches from each domain using priority
-        style_results = self._extract_results(search_results.get("style", {}))
-        color_results = self._extract_results(search_results.get("color", {}))
-        typography_results = self._extract_results(search_results.get("typography", {}))
-        landing_results = self._extract_results(search_results.get("landing", {}))
+        # Step 4: Multi-domain search with style priority hints, only where no edge resolved
+        missing = [domain for domain in SEARCH_CONFIG if domain != "product" and not linked.get(domain)]
+        search_results = self._multi_domain_search(query, style_priority, missing)
+        search_results["product"] = product_result  # Reuse product search
 
-        best_style = self._select_best_match(style_results, reasoning.get("style_priority", []))
-        best_color = color_results[0] if color_results else {}
-        best_typography = typography_results[0] if typography_results else {}
+        # Step 5: Pick the style x color x typography combination that fits together best
+        def candidates(domain):
+            return linked.get(domain) or self._extract_results(search_results.get(domain, {}))
+
+        # The query names the product more precisely than the rule's typography mood, so that ranks last
+        typography_candidates = candidates("typography")
+        for row in self.graph.follow("reasoning", rule_id, "typography"):
+            if row.get("Font Pairing Name") not in {t.get("Font Pairing Name") for t in typography_candidates}:
+                typography_candidates.append(row)
+        pools = {"style": candidates("style"), "color": candidates("color"), "typography": typography_candidates}
+        with profile_stage("combine"):
+            combos = best_combinations(pools, alternatives + 1)
+
+        def pick(combo, domain):
+            rows = pools[domain]
+            return rows[combo[domain]] if combo else (rows[0] if rows else {})
+
+        best_combo = combos[0] if combos else None
+        best_style = pick(best_combo, "style")
+        best_color = pick(best_combo, "color")
+        best_typography = pick(best_combo, "typography")
+        landing_results = candidates("landing")
         best_landing = landing_results[0] if landing_results else {}
 
-        # Step 5: Build final recommendation
+        # Step 6: Build final recommendation
         # Combine effects from both reasoning and style search
         style_effects = best_style.get("Effects & Animation", "")
         reasoning_effects = reasoning.get("key_effects", "")
@@ -204,31 +297,18 @@ class DesignSystemGenerator:
                 "color_strategy": best_landing.get("Color Strategy", ""),
                 "conversion": best_landing.get("Conversion Optimization", "")
             },
-            "style": {
-                "name": best_style.get("Style Category", "Minimalism"),
-                "type": best_style.get("Type", "General"),
-                "effects": style_effects,
-                "keywords": best_style.get("Keywords", ""),
-                "best_for": best_style.get("Best For", ""),
-                "performance": best_style.get("Performance", ""),
-                "accessibility": best_style.get("Accessibility", "")
-            },
-            "colors": {
-                "primary": best_color.get("Primary (Hex)", "#2563EB"),
-                "secondary": best_color.get("Secondary (Hex)", "#3B82F6"),
-                "cta": best_color.get("CTA (Hex)", "#F97316"),
-                "background": best_color.get("Background (Hex)", "#F8FAFC"),
-                "text": best_color.get("Text (Hex)", "#1E293B"),
-                "notes": best_color.get("Notes", "")
-            },
-            "typography": {
-                "heading": best_typography.get("Heading Font", "Inter"),
-                "body": best_typography.get("Body Font", "Inter"),
-                "mood": best_typography.get("Mood/Style Keywords", reasoning.get("typography_mood", "")),
-                "best_for": best_typography.get("Best For", ""),
-                "google_fonts_url": best_typography.get("Google Fonts URL", ""),
-                "css_import": best_typography.get("CSS Import", "")
-            },
+            "style": self._style_section(best_style),
+            "colors": self._color_section(best_color),
+            "typography": self._typography_section(best_typography, reasoning),
+            "alternatives": [
+                {
+                    "score": combo["score"],
+                    "style": self._style_section(pick(combo, "style")),
+                    "colors": self._color_section(pick(combo, "color")),
+                    "typography": self._typography_section(pick(combo, "typography"), reasoning)
+                }
+                for combo in combos[1:]
+            ],
             "key_effects": combined_effects,
             "anti_patterns": reasoning.get("anti_patterns", ""),
             "decision_rules": reasoning.get("decision_rules", {}),
@@ -239,6 +319,17 @@ class DesignSystemGenerator:
 # ============ OUTPUT FORMATTERS ============
 BOX_WIDTH = 90  # Wider box for more content
 
+
+def _contrast_summary(contrast: dict) -> str:
+    """One-line WCAG verdict for each colour checked against the background."""
+    parts = []
+    for fg, bg, minimum in CONTRAST_CHECKS:
+        ratio = contrast.get(f"{fg}/{bg}")
+        if ratio is not None:
+            verdict = "ok" if ratio >= minimum else f"FAIL (min {minimum:g}:1)"
+            parts.append(f"{fg} {ratio:g}:1 {verdict}")
+    return " | ".join(parts)
+
 def format_ascii_box(design_system: dict) -> str:
     """Format design system as ASCII box with emojis (MCP-style)."""
     project = design_system.get("project_name", "PROJECT")
@@ -311,6 +402,8 @@ def format_ascii_box(design_system: dict) -> str:
     lines.append(f"|     CTA:        {colors.get('cta', '')}".ljust(BOX_WIDTH) + "|")
     lines.append(f"|     Background: {colors.get('background', '')}".ljust(BOX_WIDTH) + "|")
     lines.append(f"|     Text:       {colors.get('text', '')}".ljust(BOX_WIDTH) + "|")
+    if colors.get("contrast"):
+        lines.append(f"|     Contrast:   {_contrast_summary(colors['contrast'])}".ljust(BOX_WIDTH) + "|")
     if colors.get("notes"):
         for line in wrap_text(f"Notes: {colors.get('notes', '')}", "|     ", BOX_WIDTH):
             lines.append(line.ljust(BOX_WIDTH) + "|")
@@ -330,6 +423,17 @@ def format_ascii_box(design_system: dict) -> str:
         lines.append(f"|     CSS Import: {typography.get('css_import', '')[:70]}...".ljust(BOX_WIDTH) + "|")
     lines.append("|" + " " * BOX_WIDTH + "|")
 
+    # Alternatives section
+    if design_system.get("alternatives"):
+        lines.append("|  ALTERNATIVES:".ljust(BOX_WIDTH) + "|")
+        for i, alt in enumerate(design_system["alternatives"], 2):
+            alt_colors, alt_type = alt.get("colors", {}), alt.get("typography", {})
+            summary = (f"{i}. {alt.get('style', {}).get('name', '')} | {alt_type.get('heading', '')} / {alt_type.get('body', '')}"
+                       f" | {alt_colors.get('primary', '')} + {alt_colors.get('cta', '')} (score {alt.get('score', 0)})")
+            for line in wrap_text(summary, "|     ", BOX_WIDTH):
+                lines.append(line.ljust(BOX_WIDTH) + "|")
+        lines.append("|" + " " * BOX_WIDTH + "|")
+
     # Key Effects section
     if effects:
         lines.append("|  KEY EFFECTS:".ljust(BOX_WIDTH) + "|")
@@ -410,6 +514,8 @@ def format_markdown(design_system: dict) -> str:
     lines.append(f"| CTA | {colors.get('cta', '')} |")
     lines.append(f"| Background | {colors.get('background', '')} |")
     lines.append(f"| Text | {colors.get('text', '')} |")
+    if colors.get("contrast"):
+        lines.append(f"\n*Contrast: {_contrast_summary(colors['contrast'])}*")
     if colors.get("notes"):
         lines.append(f"\n*Notes: {colors.get('notes', '')}*")
     lines.append("")
@@ -431,6 +537,17 @@ def format_markdown(design_system: dict) -> str:
         lines.append(f"```")
     lines.append("")
 
+    # Alternatives section
+    if design_system.get("alternatives"):
+        lines.append("### Alternatives")
+        lines.append("| # | Style | Typography | Primary | CTA | Score |")
+        lines.append("|---|-------|------------|---------|-----|-------|")
+        for i, alt in enumerate(design_system["alternatives"], 2):
+            alt_colors, alt_type = alt.get("colors", {}), alt.get("typography", {})
+            lines.append(f"| {i} | {alt.get('style', {}).get('name', '')} | {alt_type.get('heading', '')} / {alt_type.get('body', '')} "
+                         f"| {alt_colors.get('primary', '')} | {alt_colors.get('cta', '')} | {alt.get('score', 0)} |")
+        lines.append("")
+
     # Key Effects section
     if effects:
         lines.append("### Key Effects")
@@ -459,8 +576,10 @@ def format_markdown(design_system: dict) -> str:
 
 
 # ============ MAIN ENTRY POINT ============
+@observed("generate_design_system")
 def generate_design_system(query: str, project_name: str = None, output_format: str = "ascii", 
-                           persist: bool = False, page: str = None, output_dir: str = None) -> str:
+                           persist: bool = False, page: str = None, output_dir: str = None,
+                           alternatives: int = 0) -> str:
     """
     Main entry point for design system generation.
 
@@ -471,20 +590,27 @@ def generate_design_system(query: str, project_name: str = None, output_format:
         persist: If True, save design system to design-system/ folder
         page: Optional page name for page-specific override file
         output_dir: Optional output directory (defaults to current working directory)
+        alternatives: Number of runner-up style/color/typography combinations to list
 
     Returns:
         Formatted design system string
     """
-    generator = DesignSystemGenerator()
-    design_system = generator.generate(query, project_name)
+    with profile_stage("setup"):
+        generator = DesignSystemGenerator()
+    with profile_stage("generate"):
+        start = time.perf_counter()
+        design_system = generator.generate(query, project_name, alternatives)
+        _GENERATIONS.observe(time.perf_counter() - start)
     
     # Persist to files if requested
     if persist:
-        persist_design_system(design_system, page, output_dir, query)
+        with profile_stage("persist"):
+            persist_design_system(design_system, page, output_dir, query)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    with profile_stage("render"):
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
 
 
 # ============ PERSISTENCE FUNCTIONS ============
@@ -1019,25 +1145,11 @@ def _generate_intelligent_overrides(page_name: str, page_query: str, design_syst
 
 def _detect_page_type(context: str, style_results: list) -> str:
     """Detect page type from context and search results."""
-    context_lower = context.lower()
-    
-    # Check for common page type patterns
-    page_patterns = [
-        (["dashboard", "admin", "analytics", "data", "metrics", "stats", "monitor", "overview"], "Dashboard / Data View"),
-        (["checkout", "payment", "cart", "purchase", "order", "billing"], "Checkout / Payment"),
-        (["settings", "profile", "account", "preferences", "config"], "Settings / Profile"),
-        (["landing", "marketing", "homepage", "hero", "home", "promo"], "Landing / Marketing"),
-        (["login", "signin", "signup", "register", "auth", "password"], "Authentication"),
-        (["pricing", "plans", "subscription", "tiers", "packages"], "Pricing / Plans"),
-        (["blog", "article", "post", "news", "content", "story"], "Blog / Article"),
-        (["product", "item", "detail", "pdp", "shop", "store"], "Product Detail"),
-        (["search", "results", "browse", "filter", "catalog", "list"], "Search Results"),
-        (["empty", "404", "error", "not found", "zero"], "Empty State"),
-    ]
-    
-    for keywords, page_type in page_patterns:
-        if any(kw in context_lower for kw in keywords):
-            return page_type
+    # Check for common page type patterns (one pass; earliest matching group wins)
+    found = _PAGE_MATCHER.matches(context.lower())
+    if found:
+        first = min(order for kw in found for order in _PAGE_MATCHER.owners[kw])
+        return PAGE_PATTERNS[first][1]
     
     # Fallback: try to infer from style results
     if style_results:
@@ -1060,8 +1172,9 @@ if __name__ == "__main__":
     parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--alternatives", type=int, default=0, help="Also list the top K runner-up combinations")
 
     args = parser.parse_args()
 
-    result = generate_design_system(args.query, args.project_name, args.format)
+    result = generate_design_system(args.query, args.project_name, args.format, alternatives=args.alternatives)
     print(result)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Join Graph - Resolves the free-text cross references between CSVs into row IDs
+
+products.csv and ui-reasoning.csv name styles, landing patterns, palettes and
+typography moods as text. join_graph() resolves each reference, on first
+use and once per data version, into typed edges between (domain, row ID)
+nodes, so the design system generator can follow edges instead of searching.
+
+Usage:
+    from joins import join_graph
+    graph = join_graph()
+    graph.follow("product", "1", "primary_style")   # -> [style rows]
+    graph.report()                                  # -> resolved / unresolved summary
+"""
+
+import re
+import threading
+import core
+from core import CSV_CONFIG, _config_index, _load_csv
+
+
+# ============ CONFIGURATION ============
+REASONING_FILE = "ui-reasoning.csv"
+
+# Domains taking part in the graph: file and the column holding each row's name
+JOIN_TABLES = {
+    "product": {"file": CSV_CONFIG["product"]["file"], "name_col": "Product Type"},
+    "reasoning": {"file": REASONING_FILE, "name_col": "UI_Category"},
+    "style": {"file": CSV_CONFIG["style"]["file"], "name_col": "Style Category"},
+    "landing": {"file": CSV_CONFIG["landing"]["file"], "name_col": "Pattern Name"},
+    "color": {"file": CSV_CONFIG["color"]["file"], "name_col": "Product Type"},
+    "typography": {"file": CSV_CONFIG["typography"]["file"], "name_col": "Font Pairing Name"},
+}
+
+# (source domain, column, relation, how to resolve, target domains tried in order)
+# colors.csv has one palette per product type, so products join it by name; the
+# product's Color Palette Focus is a mood description of that same palette.
+#   names: split on "+" / "," and match each part by name
+#   pattern: match the whole value by name, else fall back to its "+" parts
+#   same:    rows describing the same product type (matched on the name column)
+#   search:  free-text mood resolved by the target's BM25 index
+JOIN_RULES = [
+    ("product", "Product Type", "reasoning", "same", ["reasoning"]),
+    ("product", "Product Type", "palette", "same", ["color"]),
+    ("product", "Primary Style Recommendation", "primary_style", "names", ["style"]),
+    ("product", "Secondary Styles", "secondary_style", "names", ["style"]),
+    ("product", "Landing Page Pattern", "landing", "pattern", ["landing", "style"]),
+    ("reasoning", "Style_Priority", "style_priority", "names", ["style"]),
+    ("reasoning", "Recommended_Pattern", "landing", "pattern", ["landing", "style"]),
+    ("reasoning", "Typography_Mood", "typography", "search", ["typography"]),
+]
+
+# Values that deliberately name nothing (e.g. "N/A - Dashboard focused")
+_NO_REFERENCE = re.compile(r"^(n/?a|none)\b", re.I)
+
+
+# ============ NAME RESOLUTION ============
+def _normalize(name):
+    """Lowercase and collapse punctuation so "Data-Dense" matches "data dense" """
+    return re.sub(r"[^a-z0-9]+", " ", name.lower()).strip()
+
+
+def _stem(token):
+    """Crude suffix strip so "educational" and "education" meet"""
+    for suffix in ("ing", "al", "s"):
+        if len(token) - len(suffix) >= 4 and token.endswith(suffix):
+            return token[:-len(suffix)]
+    return token
+
+
+class NameIndex:
+    """Resolves names against one table's name column: exact, then whole-word containment, then token overlap"""
+
+    def __init__(self, rows, name_col):
+        self.exact = {}
+        self.names = []
+        for row in rows:
+            norm = _normalize(row.get(name_col, ""))
+            if norm:
+                self.exact.setdefault(norm, row["No"])
+                self.names.append((norm, {_stem(t) for t in norm.split()}, row["No"]))
+
+    def resolve(self, name):
+        """Row ID for name, or None when nothing matches well enough"""
+        norm = _normalize(name)
+        if not norm:
+            return None
+        if norm in self.exact:
+            return self.exact[norm]
+
+        # "Minimalism" -> "Minimalism & Swiss Style": prefer prefix matches, then the shortest name
+        padded = f" {norm} "
+        contained = [(not target.startswith(norm + " "), len(target), row_id)
+                     for target, _, row_id in self.names
+                     if padded in f" {target} " or f" {target} " in padded]
+        if contained:
+            return min(contained)[2]
+
+        tokens = {_stem(t) for t in norm.split()}
+        best, best_id = 0.0, None
+        for _, target_tokens, row_id in self.names:
+            overlap = len(tokens & target_tokens) / len(tokens | target_tokens)
+            if overlap > best:
+                best, best_id = overlap, row_id
+        return best_id if best >= 0.5 else None
+
+
+# ============ JOIN GRAPH ============
+# (source domain, relation) -> (column, how, targets); each pair has one rule
+_RULES = {(source, relation): (column, how, targets) for source, column, relation, how, targets in JOIN_RULES}
+
+
+class JoinGraph:
+    """Typed edges between (domain, row ID) nodes plus the references that could not be resolved.
+
+    Tables are read and references resolved on first use, per node and
+    relation, so a one-shot design system run resolves the handful of edges
+    it follows; resolve_all() (used by report()) resolves every one.
+    """
+
+    def __init__(self, mtimes=None):
+        self.data_dir = core.DATA_DIR
+        self.mtimes = mtimes if mtimes is not None else _join_mtimes(self.data_dir)
+        self.rows = {}
+        self.names = {}
+        self.edges = {}
+        self._unresolved = {}  # (source, row ID, relation) -> references that matched nothing
+        self._lock = threading.Lock()
+
+    def _table(self, domain):
+        """{row ID: row} for a domain, read on first use (empty when its CSV is missing)"""
+        rows = self.rows.get(domain)
+        if rows is None:
+            with self._lock:
+                rows = self.rows.get(domain)
+                if rows is None:
+                    table = JOIN_TABLES[domain]
+                    loaded = _load_csv(self.data_dir / table["file"]) if domain in self.mtimes else []
+                    self.names[domain] = NameIndex(loaded, table["name_col"])
+                    rows = self.rows[domain] = {row["No"]: row for row in loaded}
+        return rows
+
+    def _targets(self, source, row_id, relation):
+        """(domain, row ID) targets of one node along one relation, resolved on first use"""
+        relations = self.edges.get((source, row_id))
+        if relations is not None and relation in relations:
+            return relations[relation]
+        targets, unresolved = [], []
+        column, how, domains = _RULES[(source, relation)]
+        row = self._table(source).get(row_id) if all(d in self.mtimes for d in (source, *domains)) else None
+        value = (row.get(column) or "").strip() if row else ""
+        if value and not _NO_REFERENCE.match(value):
+            for reference, target in self._resolve(value, how, domains):
+                if target is None:
+                    unresolved.append({"domain": source, "row": row_id, "column": column,
+                                       "relation": relation, "reference": reference})
+                elif target not in targets:
+                    targets.append(target)
+        with self._lock:
+            self._unresolved[(source, row_id, relation)] = unresolved
+            self.edges.setdefault((source, row_id), {})[relation] = targets
+        return targets
+
+    def resolve_all(self):
+        """Read every table and resolve every reference now instead of on first use; returns self"""
+        for domain in JOIN_TABLES:
+            self._table(domain)
+        for source, _, relation, _, _ in JOIN_RULES:
+            for row_id in self.rows[source]:
+                self._targets(source, row_id, relation)
+        return self
+
+    def _resolve(self, value, how, targets):
+        """(reference, (domain, row ID) or None) pairs for one cell"""
+        if how == "search":
+            domain = targets[0]
+            index = _config_index(CSV_CONFIG[domain])
+            ranked = index.bm25.score(value)
+            hit = ranked[0] if ranked and ranked[0][1] > 0 else None
+            return [(value, (domain, index.rows[hit[0]]["No"]) if hit else None)]
+
+        def lookup(name):
+            return next(((domain, row_id) for domain in targets
+                         for row_id in [self.lookup(domain, name)] if row_id), None)
+
+        if how == "same":
+            return [(value, lookup(value))]
+        if how == "pattern":
+            # Pattern names contain "+" themselves, so only split when the whole value is unknown
+            whole = lookup(value)
+            if whole:
+                return [(value, whole)]
+        parts = [p.strip() for p in re.split(r"[+,]" if how == "names" else r"\+", value) if p.strip()]
+        return [(part, lookup(part)) for part in parts]
+
+    def lookup(self, domain, name):
+        """Row ID of the row a name refers to, or None"""
+        if domain not in self.mtimes:
+            return None
+        self._table(domain)
+        return self.names[domain].resolve(name)
+
+    def follow(self, domain, row_id, relation, target=None):
+        """Rows reached from one node along one relation, optionally only those in the target domain"""
+        if row_id is None:
+            return []
+        return [self._table(d)[r] for d, r in self._targets(domain, row_id, relation)
+                if target is None or d == target]
+
+    def report(self):
+        """Summary of the graph with every unresolved reference"""
+        self.resolve_all()
+        counts = {}
+        for (domain, _), relations in self.edges.items():
+            for relation, targets in relations.items():
+                key = f"{domain}.{relation}"
+                counts[key] = counts.get(key, 0) + len(targets)
+        counts = {key: count for key, count in counts.items() if count}
+        unresolved = [reference for source, _, relation, _, _ in JOIN_RULES for row_id in self.rows[source]
+                      for reference in self._unresolved[(source, row_id, relation)]]
+        return {
+            "nodes": sum(len(rows) for rows in self.rows.values()),
+            "edges": sum(counts.values()),
+            "relations": dict(sorted(counts.items())),
+            "unresolved_count": len(unresolved),
+            "unresolved": unresolved,
+        }
+
+
+_GRAPH = None
+_GRAPH_LOCK = threading.Lock()
+
+
+def _join_mtimes(data_dir):
+    """{domain: CSV mtime} for the joined tables present in data_dir"""
+    return {domain: (data_dir / table["file"]).stat().st_mtime
+            for domain, table in JOIN_TABLES.items() if (data_dir / table["file"]).exists()}
+
+
+def join_graph():
+    """Return the cached join graph, starting a new one when any joined CSV changes"""
+    global _GRAPH
+    data_dir = core.DATA_DIR
+    with _GRAPH_LOCK:
+        mtimes = _join_mtimes(data_dir)
+        if _GRAPH is None or _GRAPH.data_dir != data_dir or _GRAPH.mtimes != mtimes:
+            _GRAPH = JoinGraph(mtimes)
+        return _GRAPH
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Palette Engine - WCAG contrast validation and nearest-palette lookup for colors.csv
+
+All palettes are parsed once per data version. Contrast ratios for every
+text/background and CTA/background pair are computed in one pass (vectorised
+with NumPy when available) and failing palettes are flagged at build time.
+Nearest-palette queries walk a KD-tree over CIELAB coordinates, where Euclidean
+distance is the Delta E (CIE76) colour difference.
+
+Usage:
+    from palette import palette_engine, contrast_ratio
+    engine = palette_engine()
+    engine.failures                        # -> palettes below the WCAG thresholds
+    engine.malformed                       # -> rows skipped for a malformed hex colour
+    engine.nearest("#2563EB", k=3)         # -> closest palettes by primary colour
+    contrast_ratio("#1E293B", "#F8FAFC")   # -> 13.98
+"""
+
+import re
+import threading
+import core
+from core import CSV_CONFIG, _load_csv
+
+try:
+    import numpy as np
+except ImportError:  # optional: pure-Python fallback below
+    np = None
+
+
+# ============ CONFIGURATION ============
+ROLES = {
+    "primary": "Primary (Hex)",
+    "secondary": "Secondary (Hex)",
+    "cta": "CTA (Hex)",
+    "background": "Background (Hex)",
+    "text": "Text (Hex)",
+}
+
+# (foreground role, background role, minimum ratio): body text needs WCAG AA 4.5:1,
+# CTA fills are UI components and need the non-text contrast 3:1
+CONTRAST_CHECKS = [
+    ("text", "background", 4.5),
+    ("cta", "background", 3.0),
+]
+
+_HEX = re.compile(r"^#?([0-9a-fA-F]{6})$")
+
+# D65 reference white and linear sRGB -> XYZ
+_WHITE = (0.95047, 1.0, 1.08883)
+_RGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+
+
+# ============ COLOUR MATHS ============
+def parse_hex(value):
+    """(r, g, b) in 0..1 for "#RRGGBB" (the "#" is optional), or None"""
+    match = _HEX.match(str(value).strip())
+    if not match:
+        return None
+    digits = match.group(1)
+    return tuple(int(digits[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def _linear(channel):
+    """sRGB channel to linear light"""
+    return channel / 12.92 if channel <= 0.04045 else ((channel + 0.055) / 1.055) ** 2.4
+
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of an (r, g, b) colour"""
+    r, g, b = (_linear(c) for c in rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def contrast_ratio(foreground, background):
+    """WCAG contrast ratio between two hex colours, or None if either is malformed"""
+    fg, bg = parse_hex(foreground), parse_hex(background)
+    if fg is None or bg is None:
+        return None
+    light, dark = sorted((relative_luminance(fg), relative_luminance(bg)), reverse=True)
+    return round((light + 0.05) / (dark + 0.05), 2)
+
+
+def _lab_f(t):
+    """CIELAB companding of a normalised XYZ component"""
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+
+def to_lab(rgb):
+    """CIELAB (D65) coordinates of an (r, g, b) colour"""
+    linear = [_linear(c) for c in rgb]
+    x, y, z = (sum(m * c for m, c in zip(row, linear)) / white for row, white in zip(_RGB_TO_XYZ, _WHITE))
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+# ============ KD-TREE ============
+class KDTree:
+    """Static KD-tree over fixed-dimension points for k-nearest queries"""
+
+    def __init__(self, points):
+        self.points = [tuple(p) for p in points]
+        self.dims = len(self.points[0]) if self.points else 0
+        self.root = self._build(list(range(len(self.points))), 0)
+
+    def _build(self, ids, depth):
+        """Node as (point id, axis, left, right), split on the median"""
+        if not ids:
+            return None
+        axis = depth % self.dims
+        ids.sort(key=lambda i: (self.points[i][axis], i))
+        mid = len(ids) // 2
+        return (ids[mid], axis, self._build(ids[:mid], depth + 1), self._build(ids[mid + 1:], depth + 1))
+
+    def nearest(self, point, k=1):
+        """[(squared distance, point id)] for the k closest points, closest first"""
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        best = []
+
+        def visit(node):
+            if node is None:
+                return
+            idx, axis, left, right = node
+            dist = sum((a - b) ** 2 for a, b in zip(point, self.points[idx]))
+            if len(best) < k or (dist, idx) < best[-1]:
+                best.append((dist, idx))
+                best.sort()
+                del best[k:]
+            diff = point[axis] - self.points[idx][axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            # Only cross the split plane if it is closer than the current k-th best
+            if len(best) < k or diff * diff <= best[-1][0]:
+                visit(far)
+
+        visit(self.root)
+        return best
+
+
+# ============ PALETTE ENGINE ============
+class PaletteEngine:
+    """Parsed colors.csv with contrast ratios, WCAG failures and per-role KD-trees.
+
+    Rows with a malformed hex colour in any role are left out and listed in malformed.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.mtime = filepath.stat().st_mtime
+        self.rows, self.malformed = [], []
+        for row in _load_csv(filepath):
+            bad = {col: row.get(col, "") for col in ROLES.values() if parse_hex(row.get(col, "")) is None}
+            if bad:
+                self.malformed.append({"palette": row.get("Product Type", ""), "row": row.get("No", ""), "columns": bad})
+            else:
+                self.rows.append(row)
+        self.rgb = [[parse_hex(row[col]) for col in ROLES.values()] for row in self.rows]
+        self.contrast = self._contrast_table()
+        self.failures = [
+            {"palette": row.get("Product Type", ""), "row": row.get("No", ""), "pair": f"{fg}/{bg}",
+             "ratio": self.contrast[i][f"{fg}/{bg}"], "minimum": minimum}
+            for i, row in enumerate(self.rows)
+            for fg, bg, minimum in CONTRAST_CHECKS
+            if self.contrast[i][f"{fg}/{bg}"] < minimum
+        ]
+        self._trees = {}
+
+    def _contrast_table(self):
+        """[{"fg/bg": ratio}] per palette for every CONTRAST_CHECKS pair"""
+        roles = list(ROLES)
+        pairs = [(roles.index(fg), roles.index(bg), f"{fg}/{bg}") for fg, bg, _ in CONTRAST_CHECKS]
+        if not self.rows:
+            return []
+
+        if np is not None:
+            rgb = np.array(self.rgb)
+            linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+            lum = linear @ np.array([0.2126, 0.7152, 0.0722])
+            ratios = {}
+            for fg, bg, key in pairs:
+                light = np.maximum(lum[:, fg], lum[:, bg])
+                dark = np.minimum(lum[:, fg], lum[:, bg])
+                ratios[key] = np.round((light + 0.05) / (dark + 0.05), 2)
+            return [{key: float(ratios[key][i]) for _, _, key in pairs} for i in range(len(self.rows))]
+
+        table = []
+        for colours in self.rgb:
+            lum = [relative_luminance(c) for c in colours]
+            table.append({key: round((max(lum[fg], lum[bg]) + 0.05) / (min(lum[fg], lum[bg]) + 0.05), 2)
+                          for fg, bg, key in pairs})
+        return table
+
+    def tree(self, role):
+        """KD-tree over one role's CIELAB colours, built on first use"""
+        if role not in self._trees:
+            col = list(ROLES).index(role)
+            self._trees[role] = KDTree([to_lab(colours[col]) for colours in self.rgb])
+        return self._trees[role]
+
+    def nearest(self, hex_color, k=3, role="primary"):
+        """Palettes whose role colour is closest to hex_color, with Delta E (CIE76)"""
+        if k < 1:
+            return {"error": f"k must be at least 1, got {k}"}
+        rgb = parse_hex(hex_color)
+        if rgb is None:
+            return {"error": f"Invalid colour: {hex_color} (expected #RRGGBB)"}
+        if role not in ROLES:
+            return {"error": f"Unknown role: {role}. Available: {', '.join(ROLES)}"}
+        results = []
+        for dist, idx in self.tree(role).nearest(to_lab(rgb), k):
+            row = self.rows[idx]
+            results.append({
+                "palette": row.get("Product Type", ""),
+                "delta_e": round(dist ** 0.5, 2),
+                **{name: row[col] for name, col in ROLES.items()},
+                "contrast": self.contrast[idx],
+            })
+        return {"color": hex_color, "role": role, "count": len(results), "results": results}
+
+
+_ENGINE = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def palette_engine():
+    """Return the cached palette engine, rebuilding it when colors.csv changes"""
+    global _ENGINE
+    filepath = core.DATA_DIR / CSV_CONFIG["color"]["file"]
+    with _ENGINE_LOCK:
+        if _ENGINE is None or _ENGINE.filepath != filepath or _ENGINE.mtime != filepath.stat().st_mtime:
+            _ENGINE = PaletteEngine(filepath)
+        return _ENGINE
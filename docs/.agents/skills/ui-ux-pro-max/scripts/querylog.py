@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query Log - Opt-in JSONL capture of search and design-system calls
+
+While enabled, every top-level search(), search_stack(), search_stacks() and
+generate_design_system() call is appended as one JSON line: kind, parameters,
+result row IDs per CSV, result count or error, wall time and per-stage
+latency (flat, summed per stage name). Files rotate at max_bytes, keeping
+`backups` older files (queries.jsonl.1, .2, ...). replay.py re-runs a log.
+
+Usage:
+    UI_PRO_MAX_QUERY_LOG=/var/log/ui-pro-max/queries.jsonl python search.py "..."
+    python search.py "glassmorphism" --query-log queries.jsonl
+
+    from querylog import enable, disable
+    enable("queries.jsonl", max_bytes=50_000_000, backups=3)
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+import core
+
+
+# ============ CONFIGURATION ============
+MAX_BYTES = 10 * 1024 * 1024
+BACKUPS = 5
+
+
+class QueryLog:
+    """Call observer writing one JSON line per call, and a profiler collecting that call's stage times"""
+
+    def __init__(self, path, max_bytes=MAX_BYTES, backups=BACKUPS):
+        self.path = str(path)
+        self.handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        self.handler.setFormatter(logging.Formatter("%(message)s"))
+        self.logger = logging.getLogger(f"ui-pro-max.querylog.{self.path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    @contextmanager
+    def stage(self, name):
+        """Add the stage's wall time to the running call's notes"""
+        notes = core.call_notes()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if notes is not None:
+                stages = notes.setdefault("stage_ms", {})
+                stages[name] = stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+    def observe(self, kind, params, result, elapsed, notes):
+        record = {
+            "ts": round(time.time(), 3),
+            "kind": kind,
+            "params": params,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "stage_ms": {name: round(ms, 3) for name, ms in notes.get("stage_ms", {}).items()},
+            "ids": notes.get("ids", {}),
+        }
+        if isinstance(result, dict):
+            if "error" in result:
+                record["error"] = result["error"]
+            else:
+                record["count"] = result.get("count", 0)
+        self.logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    def close(self):
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+
+_LOG = None
+
+
+def enable(path, max_bytes=MAX_BYTES, backups=BACKUPS):
+    """Start logging every call to path (replacing any log already enabled)"""
+    global _LOG
+    disable()
+    _LOG = QueryLog(path, max_bytes, backups)
+    core.add_profiler(_LOG)
+    core.add_observer(_LOG)
+    return _LOG
+
+
+def disable():
+    """Stop logging and close the file"""
+    global _LOG
+    if _LOG is not None:
+        core.remove_observer(_LOG)
+        core.remove_profiler(_LOG)
+        _LOG.close()
+        _LOG = None
@@ -3,11 +3,25 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --stack nextjs --stack shadcn [--max-results 5]
+       python search.py "<query>" --domain ux --filter Severity=High --filter Platform=Web,All [--facets]
+       python search.py "<row ID or name>" --similar --domain style [-n 3]
+       python search.py "<prefix>" --suggest [--domain <domain> | --stack <stack>]
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py --join-report [--json]
+       python search.py --nearest-palette "#2563EB" [--role primary] [-n 3]
+       python search.py --contrast-report [--json]
+       python search.py --index-stats [--json]
+       python search.py --write-snapshot indexes.snap [--json]
+       python search.py "<query>" [...] --snapshot indexes.snap   (or set UI_PRO_MAX_SNAPSHOT)
+       UI_PRO_MAX_WARM_WORKERS=4 python search.py "<query>" [...]   (build every index in 4 processes meanwhile)
        python search.py "<query>" --design-system --persist [-p "Project Name"] [--page "dashboard"]
+       python search.py "<query>" [...] --profile [--profile-stacks out.folded]
+       python search.py "<query>" [...] --query-log queries.jsonl
+       python search.py "<query>" [...] --metrics-file metrics.prom
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
-Stacks: html-tailwind, react, nextjs
+Stacks: html-tailwind, react, nextjs (repeat --stack to merge several stacks)
 
 Persistence (Master + Overrides pattern):
   --persist    Save design system to design-system/MASTER.md
@@ -15,10 +29,10 @@ Persistence (Master + Overrides pattern):
 """
 
 import argparse
+import os
 import sys
 import io
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system, persist_design_system
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, MAX_EDIT_DISTANCE, MAX_SUGGESTIONS, search, search_stack, search_stacks, similar, suggest, profile_stage
 
 # Force UTF-8 for stdout/stderr to handle emojis on Windows (cp1252 default)
 if sys.stdout.encoding and sys.stdout.encoding.lower() != 'utf-8':
@@ -27,11 +41,14 @@ if sys.stderr.encoding and sys.stderr.encoding.lower() != 'utf-8':
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
 
-def format_output(result):
-    """Format results for Claude consumption (token-optimized)"""
-    if "error" in result:
-        return f"Error: {result['error']}"
+# Budgeted output: approximate characters per token, and how far fields may shrink
+CHARS_PER_TOKEN = 4
+MIN_FIELD_CHARS = 40
+KEEP_FIELDS = 2  # leading fields (name, type) are truncated but never dropped
 
+
+def _format_header(result):
+    """Heading, source and facet lines shared by both formatters"""
     output = []
     if result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
@@ -39,8 +56,27 @@ def format_output(result):
     else:
         output.append(f"## UI Pro Max Search Results")
         output.append(f"**Domain:** {result['domain']} | **Query:** {result['query']}")
-    output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results\n")
+    if result.get("corrections"):
+        fixed = ", ".join(f"{typo} → {word}" for typo, word in result["corrections"].items())
+        output.append(f"**Corrected:** {fixed}")
+    more = f" | **Next page:** --offset {result['next_offset']}" if result.get("next_offset") else ""
+    output.append(f"**Source:** {result['file']} | **Found:** {result['count']} results{more}\n")
+
+    if result.get("facets"):
+        output.append("### Facets")
+        for col, counts in result["facets"].items():
+            values = ", ".join(f"{value} ({count})" for value, count in counts.items())
+            output.append(f"- **{col}:** {values or '-'}")
+        output.append("")
+    return output
+
+
+def format_output(result):
+    """Format results for Claude consumption (token-optimized)"""
+    if "error" in result:
+        return f"Error: {result['error']}"
 
+    output = _format_header(result)
     for i, row in enumerate(result['results'], 1):
         output.append(f"### Result {i}")
         for key, value in row.items():
@@ -53,33 +89,276 @@ def format_output(result):
     return "\n".join(output)
 
 
+def _plan_fields(row, budget):
+    """[(key, value, shown length)] within budget chars: drop the lowest-priority fields, then truncate.
+
+    Fields are in priority order (the config's output_cols order), and each line
+    costs len(key) + len(value) + 9 for "- **", ":** " and the newline; a
+    truncated value also pays 3 for "...".
+    """
+    fields = [(key, str(value)) for key, value in row.items()]
+    shown = [len(value) for _, value in fields]
+    keep = len(fields)
+    total = sum(len(key) + len(value) + 9 for key, value in fields)
+    while total > budget and keep > KEEP_FIELDS:
+        keep -= 1
+        total -= len(fields[keep][0]) + shown[keep] + 9
+    for i in reversed(range(keep)):
+        if total <= budget:
+            break
+        cut = min(shown[i], total - budget + 3)
+        if shown[i] - cut < MIN_FIELD_CHARS:
+            cut = shown[i] - MIN_FIELD_CHARS
+        if cut > 3:
+            shown[i] -= cut
+            total -= cut - 3
+    return [(key, value, shown[i]) for i, (key, value) in enumerate(fields[:keep])], total
+
+
+def write_output(result, budget, out=None):
+    """Write results within budget characters, allocating more to higher-ranked results.
+
+    Each result gets its rank-weighted share (1 / rank) of what is left, so unused
+    space flows to later results; output is streamed to out piece by piece.
+    """
+    out = out or sys.stdout
+    if "error" in result:
+        out.write(f"Error: {result['error']}\n")
+        return
+
+    # The header counts against the budget too: short of room its title goes first,
+    # then lines are cut (with "...") and dropped
+    header = _format_header(result)
+    if sum(len(line) + 1 for line in header) > budget:
+        header = header[1:]
+    remaining = budget
+    for line in header:
+        if len(line) + 1 > remaining:
+            if remaining <= 4:
+                break
+            line = line[:remaining - 4] + "..."
+        out.write(line)
+        out.write("\n")
+        remaining -= len(line) + 1
+
+    rows = result["results"]
+    weights = [1 / rank for rank in range(1, len(rows) + 1)]
+    for i, row in enumerate(rows):
+        overhead = len("### Result ") + len(str(i + 1)) + 2
+        share = remaining * weights[i] / sum(weights[i:])
+        plan, used = _plan_fields(row, share - overhead)
+        if used + overhead > remaining:
+            note = f"*{len(rows) - i} more result(s) omitted to fit the budget*\n"
+            if len(note) <= remaining:
+                out.write(note)
+            return
+        out.write(f"### Result {i + 1}\n")
+        for key, value, length in plan:
+            out.write("- **")
+            out.write(key)
+            out.write(":** ")
+            out.write(value if length == len(value) else value[:length])
+            if length < len(value):
+                out.write("...")
+            out.write("\n")
+        out.write("\n")
+        remaining -= used + overhead
+
+
+def parse_filters(specs):
+    """Turn repeated COL=VALUE[,VALUE] arguments into {col: [values]}"""
+    filters = {}
+    for spec in specs or []:
+        col, sep, values = spec.partition("=")
+        if not sep or not col.strip():
+            raise argparse.ArgumentTypeError(f"Invalid filter (expected COL=VALUE): {spec}")
+        filters.setdefault(col.strip(), []).extend(v.strip() for v in values.split(",") if v.strip())
+    return filters
+
+
 if __name__ == "__main__":
+    # Start the parallel index build first so it overlaps argparse and setup; a query
+    # reaching an index still in flight waits for it instead of building it again
+    if os.environ.get("UI_PRO_MAX_WARM_WORKERS"):
+        from core import warm_all_background
+        warm_all_background(int(os.environ["UI_PRO_MAX_WARM_WORKERS"]))
+
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, action="append", help="Stack-specific search (html-tailwind, react, nextjs); repeat to merge several stacks")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--budget", type=int, default=None, metavar="N", help="Fit text output into N tokens (or --budget-unit chars; at least 40 chars), dropping low-priority fields before truncating")
+    parser.add_argument("--budget-unit", choices=["tokens", "chars"], default="tokens", help="Unit for --budget (default: tokens, ~4 chars each)")
+    parser.add_argument("--suggest", action="store_true", help=f"Treat query as a prefix and list up to {MAX_SUGGESTIONS} completions")
+    parser.add_argument("--similar", action="store_true", help="Treat query as a row ID or name in --domain and list the most similar rows")
+    parser.add_argument("--filter", action="append", metavar="COL=VALUE", help="Only rows whose column matches; comma-separate values to match any, repeat for more columns")
+    parser.add_argument("--fields", type=lambda v: [c.strip() for c in v.split(",") if c.strip()], default=None, metavar="COL,COL", help="Only return these columns (any column of the CSV)")
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many ranked results (use the reported next offset to page)")
+    parser.add_argument("--diversity", type=float, default=0.0, help="0-1: re-rank to avoid near-duplicate results (MMR); 0 keeps BM25 order (default: 0)")
+    parser.add_argument("--facets", action="store_true", help="Include value counts for the domain's facet columns among matches")
+    parser.add_argument("--max-edit-distance", type=int, default=MAX_EDIT_DISTANCE, help=f"Typo correction distance, 0 disables (default: {MAX_EDIT_DISTANCE})")
+    parser.add_argument("--join-report", action="store_true", help="Report cross-table references (products/reasoning -> styles, landing, colors) and list unresolved ones")
+    parser.add_argument("--index-stats", action="store_true", help="Load every domain and stack index and report rows, vocabulary, postings lengths and memory held")
+    parser.add_argument("--write-snapshot", metavar="FILE", default=None, help="Build every domain and stack index and save them, parsed rows included, to FILE")
+    parser.add_argument("--snapshot", metavar="FILE", default=None, help="Load indexes from a --write-snapshot FILE instead of parsing CSVs (stale entries are rebuilt)")
+    # Palette checks
+    parser.add_argument("--nearest-palette", metavar="HEX", help="List the palettes closest to a #RRGGBB colour (CIELAB Delta E)")
+    parser.add_argument("--role", choices=["primary", "secondary", "cta", "background", "text"], default="primary", help="Palette colour compared by --nearest-palette (default: primary)")
+    parser.add_argument("--contrast-report", action="store_true", help="List palettes failing WCAG contrast (text 4.5:1, CTA 3:1 on background)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    parser.add_argument("--alternatives", type=int, default=0, metavar="K", help="Also list the top K runner-up style/color/typography combinations")
     # Persistence (Master + Overrides pattern)
     parser.add_argument("--persist", action="store_true", help="Save design system to design-system/MASTER.md (creates hierarchical structure)")
     parser.add_argument("--page", type=str, default=None, help="Create page-specific override file in design-system/pages/")
     parser.add_argument("--output-dir", "-o", type=str, default=None, help="Output directory for persisted files (default: current directory)")
+    # Profiling
+    parser.add_argument("--profile", action="store_true", help="Print per-stage wall time and allocations as JSON on stderr")
+    parser.add_argument("--profile-stacks", metavar="FILE", default=None, help="With --profile, also run cProfile and write collapsed stacks (flamegraph input) to FILE")
+    parser.add_argument("--query-log", metavar="FILE", default=None, help="Append this call to a rotating JSONL query log (see replay.py; or set UI_PRO_MAX_QUERY_LOG)")
+    parser.add_argument("--metrics-file", metavar="FILE", default=None, help="Write this run's counters and histograms to FILE in Prometheus text format")
 
     args = parser.parse_args()
+    if args.offset < 0:
+        parser.error("--offset must be 0 or more")
+    if not 0 <= args.diversity <= 1:
+        parser.error("--diversity must be between 0 and 1")
+    if args.nearest_palette and args.max_results < 1:
+        parser.error("--max-results must be at least 1 with --nearest-palette")
+    if args.similar and args.max_results < 1:
+        parser.error("--max-results must be at least 1 with --similar")
+    if args.filter and (args.similar or args.suggest):
+        parser.error("--filter does not apply to --similar or --suggest")
+    budget = None if args.budget is None else args.budget * (CHARS_PER_TOKEN if args.budget_unit == "tokens" else 1)
+    if budget is not None and budget < MIN_FIELD_CHARS:
+        parser.error(f"--budget must allow at least {MIN_FIELD_CHARS} chars ({MIN_FIELD_CHARS // CHARS_PER_TOKEN} tokens)")
+    if args.query is None and not (args.join_report or args.index_stats or args.write_snapshot or args.nearest_palette or args.contrast_report):
+        parser.error("the following arguments are required: query")
+    try:
+        filters = parse_filters(args.filter)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+    profiler = None
+    if args.profile or args.profile_stacks:
+        from profiling import StageProfiler
+        # cProfile inflates every call, so it only runs when stacks are asked for
+        profiler = StageProfiler(cprofile=bool(args.profile_stacks)).start()
+    if args.snapshot:
+        from core import use_snapshot
+        use_snapshot(args.snapshot)
+    if args.query_log:
+        import querylog
+        querylog.enable(args.query_log)
 
+    # Join graph report
+    if args.join_report:
+        from joins import join_graph
+        report = join_graph().report()
+        if args.json:
+            import json
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+        else:
+            print(f"## Join Graph\n**Nodes:** {report['nodes']} | **Edges:** {report['edges']} | **Unresolved:** {report['unresolved_count']}\n")
+            for relation, count in report["relations"].items():
+                print(f"- **{relation}:** {count}")
+            if report["unresolved"]:
+                print("\n### Unresolved references")
+                for ref in report["unresolved"]:
+                    print(f"- {ref['domain']} #{ref['row']} {ref['column']} ({ref['relation']}): {ref['reference']}")
+    # Single-file index snapshot
+    elif args.write_snapshot:
+        from core import write_snapshot
+        summary = write_snapshot(args.write_snapshot)
+        if args.json:
+            import json
+            print(json.dumps(summary, indent=2))
+        else:
+            print(f"Wrote {summary['indexes']} indexes ({summary['bytes'] / 1024:,.1f} KiB) to {summary['path']}")
+    # Index statistics and memory footprint
+    elif args.index_stats:
+        from core import index_stats
+        report = index_stats()
+        if args.json:
+            import json
+            print(json.dumps(report, indent=2))
+        else:
+            total = report["total"]
+            print(f"## Index Statistics\n**Indexes:** {total['indexes']} | **Rows:** {total['rows']} | "
+                  f"**Resident:** {total['resident_bytes'] / 1024:,.1f} KiB (traced {total['traced_bytes'] / 1024:,.1f} KiB)\n")
+            for name, stats in report["indexes"].items():
+                postings = stats["postings"]
+                lengths = f"postings p50 {postings['p50']} / p90 {postings['p90']} / max {postings['max']}" if postings else "no postings"
+                print(f"- **{name}:** {stats['rows']} rows, {stats['vocabulary']} terms, {lengths}, "
+                      f"avg doc {stats['avg_doc_length']} tokens | rows {stats['row_bytes'] / 1024:,.1f} KiB, "
+                      f"index {stats['index_bytes'] / 1024:,.1f} KiB, lazy {stats['lazy_bytes'] / 1024:,.1f} KiB")
+    # Palette checks
+    elif args.nearest_palette or args.contrast_report:
+        from palette import palette_engine
+        engine = palette_engine()
+        if args.nearest_palette:
+            result = engine.nearest(args.nearest_palette, args.max_results, args.role)
+        else:
+            result = {"palettes": len(engine.rows), "failing": len(engine.failures), "failures": engine.failures,
+                      "malformed": engine.malformed}
+        if args.json:
+            import json
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+        elif "error" in result:
+            print(f"Error: {result['error']}")
+        elif args.nearest_palette:
+            print(f"## Nearest Palettes\n**Color:** {result['color']} | **Role:** {result['role']}\n")
+            for i, hit in enumerate(result["results"], 1):
+                ratios = ", ".join(f"{pair} {ratio:g}:1" for pair, ratio in hit["contrast"].items())
+                print(f"{i}. **{hit['palette']}** (Delta E {hit['delta_e']:g}) - primary {hit['primary']}, cta {hit['cta']}, "
+                      f"background {hit['background']}, text {hit['text']} | {ratios}")
+        else:
+            print(f"## Contrast Report\n**Palettes:** {result['palettes']} | **Failing checks:** {result['failing']}\n")
+            for fail in result["failures"]:
+                print(f"- #{fail['row']} {fail['palette']}: {fail['pair']} {fail['ratio']:g}:1 (min {fail['minimum']:g}:1)")
+            if result["malformed"]:
+                print(f"\n**Skipped (malformed hex):** {len(result['malformed'])}\n")
+                for bad in result["malformed"]:
+                    cols = ", ".join(f"{col} '{value}'" for col, value in bad["columns"].items())
+                    print(f"- #{bad['row']} {bad['palette']}: {cols}")
+    # More like this
+    elif args.similar:
+        if not args.domain:
+            parser.error("--similar needs --domain (e.g. style, typography, color, landing)")
+        result = similar(args.domain, args.query, args.max_results, fields=args.fields)
+        with profile_stage("render"):
+            if args.json:
+                import json
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            elif budget is not None:
+                write_output(result, budget)
+            else:
+                print(format_output(result))
+    # Autocomplete
+    elif args.suggest:
+        stack = args.stack[0] if args.stack else None
+        suggestions = suggest(args.query, args.domain, MAX_SUGGESTIONS, stack=stack)
+        if args.json:
+            import json
+            print(json.dumps(suggestions, indent=2, ensure_ascii=False))
+        else:
+            for item in suggestions:
+                print(f"{item['text']}  ({item['type']}, {item['count']})")
     # Design system takes priority
-    if args.design_system:
+    elif args.design_system:
+        from design_system import generate_design_system
         result = generate_design_system(
             args.query, 
             args.project_name, 
             args.format,
             persist=args.persist,
             page=args.page,
-            output_dir=args.output_dir
+            output_dir=args.output_dir,
+            alternatives=args.alternatives
         )
         print(result)
         
@@ -98,17 +377,39 @@ if __name__ == "__main__":
             print("=" * 60)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
+        if len(args.stack) == 1:
+            result = search_stack(args.query, args.stack[0], args.max_results, args.max_edit_distance, filters, args.facets, args.diversity,
+                                  fields=args.fields, offset=args.offset)
         else:
-            print(format_output(result))
+            result = search_stacks(args.query, args.stack, args.max_results, args.max_edit_distance, filters, args.facets, args.diversity,
+                                   fields=args.fields, offset=args.offset)
+        with profile_stage("render"):
+            if args.json:
+                import json
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            elif budget is not None:
+                write_output(result, budget)
+            else:
+                print(format_output(result))
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        result = search(args.query, args.domain, args.max_results, args.max_edit_distance, filters, args.facets, args.diversity,
+                        fields=args.fields, offset=args.offset)
+        with profile_stage("render"):
+            if args.json:
+                import json
+                print(json.dumps(result, indent=2, ensure_ascii=False))
+            elif budget is not None:
+                write_output(result, budget)
+            else:
+                print(format_output(result))
+
+    if profiler:
+        profiler.stop()
+        import json
+        print(json.dumps(profiler.report(), indent=2), file=sys.stderr)
+        if args.profile_stacks:
+            profiler.write_collapsed(args.profile_stacks)
+    if args.metrics_file:
+        import metrics
+        metrics.write(args.metrics_file)
@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared Index - Indexes built once by a parent and read by every worker from shared memory
+
+publish() builds every domain and stack index and copies its postings,
+document lengths (the BM25 norms), vocabulary statistics, parsed rows, row IDs
+and spelling delete dictionary into one multiprocessing.shared_memory
+segment. attach() in a worker maps the segment, wraps it in read-only views
+and installs them in core's index cache, so searches there score against the
+shared arrays instead of building private copies: per-worker memory stays
+roughly flat as workers are added. Term vectors, neighbours, prefixes, filter
+bitmaps and ranking LRUs are still built per process, on first use.
+
+Python dicts cannot live in shared memory, so strings (terms, row IDs, delete
+variants) are found through open-addressing hash tables (CRC32, linear
+probing) stored in the segment. Rows are marshalled and decoded on access. A
+CSV changed after publishing is rebuilt privately by the worker that next
+reads it, as with any stale index.
+
+The publishing process owns the segment: close(), leaving its with block or
+interpreter exit unlinks it (multiprocessing's resource tracker covers a
+crashed parent); workers only unmap.
+
+Usage:
+    import shared_index
+    with shared_index.publish() as shared:
+        with ProcessPoolExecutor(8, initializer=shared_index.attach, initargs=(shared.name,)) as pool:
+            ...
+    UI_PRO_MAX_SHARED_INDEX=<name> python app.py     # workers not started by multiprocessing
+    python shared_index.py --serve                   # publish, print the name, hold until interrupted
+    python shared_index.py --measure 1,2,4           # per-worker memory, private vs shared indexes
+"""
+
+import argparse
+import atexit
+import marshal
+import os
+import pickle
+import signal
+import sys
+from array import array
+from collections.abc import Mapping, Sequence
+from multiprocessing import shared_memory
+from pathlib import Path
+from zlib import crc32
+
+import core
+from core import BM25, BM25F, SearchIndex, SymSpell, _bit_bytes
+
+
+# ============ CONFIGURATION ============
+LAYOUT_VERSION = 1  # bump whenever the segment layout changes
+ALIGN = 8
+
+# --measure: queries every worker runs against every index (the typo reaches the speller)
+MEASURE_QUERIES = ["dashboard", "accessibility focus", "glassmorphsm"]
+
+
+# ============ LAYOUT ============
+def _key_table(keys):
+    """(UTF-8 blob, offsets, hash table) for unique string keys; key i sits in slot i"""
+    blob, offsets = bytearray(), array("Q", [0])
+    encoded = [key.encode("utf-8", "surrogatepass") for key in keys]
+    for data in encoded:
+        blob += data
+        offsets.append(len(blob))
+    size = 8
+    while size < 2 * len(encoded):
+        size *= 2
+    table = array("i", [-1]) * size
+    for slot, data in enumerate(encoded):
+        pos = crc32(data) & (size - 1)
+        while table[pos] >= 0:
+            pos = (pos + 1) & (size - 1)
+        table[pos] = slot
+    return blob, offsets, table
+
+
+class _Layout:
+    """Arrays queued for the segment at aligned offsets from its data area"""
+
+    def __init__(self):
+        self.parts = []
+        self.size = 0
+
+    def add(self, data, fmt="B"):
+        raw = memoryview(data).cast("B")
+        offset = self.size
+        self.parts.append((offset, raw))
+        self.size = (offset + raw.nbytes + ALIGN - 1) // ALIGN * ALIGN
+        return offset, fmt, raw.nbytes // array(fmt).itemsize
+
+    def add_keys(self, arrays, prefix, keys):
+        blob, offsets, table = _key_table(keys)
+        arrays[f"{prefix}_blob"] = self.add(blob)
+        arrays[f"{prefix}_offsets"] = self.add(offsets, "Q")
+        arrays[f"{prefix}_table"] = self.add(table, "i")
+
+
+def _entry(key, index, layout):
+    """Manifest entry for one index, its arrays queued on layout"""
+    bm25, arrays = index.bm25, {}
+
+    # Vocabulary in postings order, which term_vectors() iterates in
+    terms = list(bm25.postings)
+    layout.add_keys(arrays, "terms", terms)
+    arrays["idf"] = layout.add(array("d", (bm25.idf[t] for t in terms)), "d")
+    arrays["doc_freqs"] = layout.add(array("I", (bm25.doc_freqs[t] for t in terms)), "I")
+    arrays["term_upper"] = layout.add(array("d", (bm25.term_upper.get(t, 0.0) for t in terms)), "d")
+    starts, docs, tfs = array("Q", [0]), array("I"), array("d")
+    for term in terms:
+        for idx, tf in bm25.postings[term]:
+            docs.append(idx)
+            tfs.append(tf)
+        starts.append(len(docs))
+    arrays["post_starts"], arrays["post_docs"], arrays["post_tfs"] = (
+        layout.add(starts, "Q"), layout.add(docs, "I"), layout.add(tfs, "d"))
+    arrays["doc_lengths"] = layout.add(array("I", bm25.doc_lengths), "I")
+
+    # Rows as marshalled value tuples (a dict when a row's keys differ from the header)
+    blob, offsets = bytearray(), array("Q", [0])
+    for row in index.rows:
+        blob += marshal.dumps(tuple(row.values()) if list(row) == index.columns else row)
+        offsets.append(len(blob))
+    arrays["rows"], arrays["row_offsets"] = layout.add(blob), layout.add(offsets, "Q")
+    layout.add_keys(arrays, "ids", list(index.row_ids))
+    arrays["id_rows"] = layout.add(array("I", index.row_ids.values()), "I")
+
+    # Delete dictionary: variant -> vocabulary slots of its words
+    slots = {term: slot for slot, term in enumerate(terms)}
+    speller = index.speller
+    layout.add_keys(arrays, "deletes", list(speller.deletes))
+    starts, words = array("Q", [0]), array("I")
+    for variant_words in speller.deletes.values():
+        words.extend(slots[word] for word in variant_words)
+        starts.append(len(words))
+    arrays["delete_starts"], arrays["delete_words"] = layout.add(starts, "Q"), layout.add(words, "I")
+
+    return {
+        "key": key,
+        "filepath": str(index.filepath),
+        "mtime": index.mtime,
+        "columns": index.columns,
+        "boosts": list(bm25.boosts) if isinstance(bm25, BM25F) else None,
+        "k1": bm25.k1, "b": bm25.b, "N": bm25.N, "avgdl": bm25.avgdl,
+        "speller": (speller.max_distance, speller.prefix_length),
+        "arrays": arrays,
+    }
+
+
+# ============ SHARED VIEWS ============
+class _Keys:
+    """Read side of a shared string hash table: key -> slot (-1 if absent) and slot -> key.
+
+    The last lookup is remembered, since scoring asks for a token's idf and
+    postings right after checking it is in the vocabulary.
+    """
+    __slots__ = ("blob", "offsets", "table", "mask", "last")
+
+    def __init__(self, blob, offsets, table):
+        self.blob, self.offsets, self.table = blob, offsets, table
+        self.mask = len(table) - 1
+        self.last = (None, -1)
+
+    def slot(self, key):
+        last = self.last  # one tuple, so a concurrent lookup never sees a key with another key's slot
+        if last[0] == key:
+            return last[1]
+        data = key.encode("utf-8", "surrogatepass")
+        blob, offsets, table, mask = self.blob, self.offsets, self.table, self.mask
+        pos = crc32(data) & mask
+        while True:
+            slot = table[pos]
+            if slot < 0 or blob[offsets[slot]:offsets[slot + 1]] == data:
+                self.last = (key, slot)
+                return slot
+            pos = (pos + 1) & mask
+
+    def key(self, slot):
+        return str(self.blob[self.offsets[slot]:self.offsets[slot + 1]], "utf-8", "surrogatepass")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        return map(self.key, range(len(self)))
+
+
+class _Column(Mapping):
+    """Read-only {key: value} over a shared key table and a value array aligned with its slots"""
+
+    def __init__(self, keys, values):
+        self._keys, self._values = keys, values
+
+    def _value(self, slot):
+        return self._values[slot]
+
+    def __getitem__(self, key):
+        slot = self._keys.slot(key)
+        if slot < 0:
+            raise KeyError(key)
+        return self._value(slot)
+
+    def get(self, key, default=None):
+        slot = self._keys.slot(key)
+        return default if slot < 0 else self._value(slot)
+
+    def __contains__(self, key):
+        return self._keys.slot(key) >= 0
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class _Postings(_Column):
+    """{term: [(row, tf)]} read off the shared postings arrays"""
+
+    def __init__(self, keys, starts, docs, tfs):
+        super().__init__(keys, starts)
+        self._docs, self._tfs = docs, tfs
+
+    def _value(self, slot):
+        start, end = self._values[slot], self._values[slot + 1]
+        return list(zip(self._docs[start:end], self._tfs[start:end]))
+
+
+class _Deletes(_Column):
+    """{delete variant: [word]} with words stored as vocabulary slots"""
+
+    def __init__(self, keys, starts, words, vocabulary):
+        super().__init__(keys, starts)
+        self._words, self._vocabulary = words, vocabulary
+
+    def _value(self, slot):
+        return [self._vocabulary.key(word) for word in self._words[self._values[slot]:self._values[slot + 1]]]
+
+
+class _Rows(Sequence):
+    """Parsed CSV rows, each decoded from the shared row store when read"""
+
+    def __init__(self, blob, offsets, columns):
+        self._blob, self._offsets, self._columns = blob, offsets, columns
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("row index out of range")
+        values = marshal.loads(self._blob[self._offsets[idx]:self._offsets[idx + 1]])
+        return dict(zip(self._columns, values)) if type(values) is tuple else values
+
+
+class _SharedTerms:
+    """BM25 state over shared arrays; token lists (corpus) are not shared, scoring reads the postings"""
+
+    def __init__(self, entry, vocabulary, arrays):
+        self.k1, self.b, self.N, self.avgdl = entry["k1"], entry["b"], entry["N"], entry["avgdl"]
+        self.corpus = None
+        self.doc_lengths = arrays["doc_lengths"]
+        self.idf = _Column(vocabulary, arrays["idf"])
+        self.doc_freqs = _Column(vocabulary, arrays["doc_freqs"])
+        self.term_upper = _Column(vocabulary, arrays["term_upper"])
+        self.postings = _Postings(vocabulary, arrays["post_starts"], arrays["post_docs"], arrays["post_tfs"])
+
+
+class SharedBM25F(_SharedTerms, BM25F):
+    """BM25F whose inherited score() walks the shared postings"""
+
+    def __init__(self, entry, vocabulary, arrays):
+        super().__init__(entry, vocabulary, arrays)
+        self.boosts = list(entry["boosts"])
+        self.field_lengths, self.avg_field_lengths = [], []
+
+
+class SharedBM25(_SharedTerms, BM25):
+    """Plain BM25 over the shared postings"""
+
+    def score(self, query, candidates=None):
+        """BM25.score read off the postings; each row adds its terms in query order, so scores match exactly"""
+        k1, b, avgdl, lengths = self.k1, self.b, self.avgdl, self.doc_lengths
+        scores = [0.0] * self.N
+        allowed = _bit_bytes(candidates, self.N) if candidates is not None else None
+        for token in self.tokenize(query):
+            if token in self.idf:
+                idf = self.idf[token]
+                for idx, tf in self.postings[token]:
+                    if allowed is None or allowed[idx >> 3] >> (idx & 7) & 1:
+                        scores[idx] += idf * (tf * (k1 + 1)) / (tf + k1 * (1 - b + b * lengths[idx] / avgdl))
+        ranked = enumerate(scores)
+        if allowed is not None:
+            ranked = ((idx, score) for idx, score in ranked if allowed[idx >> 3] >> (idx & 7) & 1)
+        return sorted(ranked, key=lambda x: x[1], reverse=True)
+
+
+class SharedSpeller(SymSpell):
+    """SymSpell whose delete dictionary is read from the segment"""
+
+    def __init__(self, entry, frequencies, vocabulary, arrays):
+        self.frequencies = frequencies
+        self.max_distance, self.prefix_length = entry["speller"]
+        self.deletes = _Deletes(_Keys(arrays["deletes_blob"], arrays["deletes_offsets"], arrays["deletes_table"]),
+                                arrays["delete_starts"], arrays["delete_words"], vocabulary)
+
+
+class SharedIndex(SearchIndex):
+    """SearchIndex over read-only views of a published segment; not picklable"""
+
+    def __init__(self, entry, arrays):
+        self.filepath = Path(entry["filepath"])
+        self.mtime = entry["mtime"]
+        self.columns = list(entry["columns"])
+        self.rows = _Rows(arrays["rows"], arrays["row_offsets"], self.columns)
+        vocabulary = _Keys(arrays["terms_blob"], arrays["terms_offsets"], arrays["terms_table"])
+        bm25_class = SharedBM25F if entry["boosts"] is not None else SharedBM25
+        self.bm25 = bm25_class(entry, vocabulary, arrays)
+        self.row_ids = _Column(_Keys(arrays["ids_blob"], arrays["ids_offsets"], arrays["ids_table"]), arrays["id_rows"])
+        self.speller = SharedSpeller(entry, self.bm25.doc_freqs, vocabulary, arrays)
+        self._prefixes = {}
+        self._bitmaps = {}
+        self._vectors = None
+        self._neighbours = None
+        self._bind()
+
+
+# ============ SEGMENTS ============
+class _Segment:
+    """An attached segment and the read-only views cut from it, released before it is unmapped"""
+
+    def __init__(self, shm):
+        self.shm = shm
+        self.buf = shm.buf.toreadonly()
+        self.views = [self.buf]
+
+    def view(self, offset, fmt, count):
+        view = self.buf[offset:offset + count * array(fmt).itemsize].cast(fmt)
+        self.views.append(view)
+        return view
+
+    def close(self):
+        for view in reversed(self.views):
+            try:
+                view.release()
+            except BufferError:
+                pass
+        try:
+            self.shm.close()
+        except BufferError:  # something still holds a view; the mapping goes with the process
+            pass
+
+
+class SharedIndexes:
+    """A published segment; the publishing process unlinks it on close()"""
+
+    def __init__(self, shm, indexes):
+        self.shm = shm
+        self.name = shm.name
+        self.size = shm.size
+        self.indexes = indexes
+        self.owner = os.getpid()
+
+    def close(self):
+        """Unmap and unlink the segment (once); attached workers keep their mappings until they exit"""
+        if self.shm is None:
+            return
+        shm, self.shm = self.shm, None
+        shm.close()
+        if os.getpid() == self.owner:  # forked children inherit this object but not the segment
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_PUBLISHED = []
+_ATTACHED = []
+
+
+def publish(indexes=None):
+    """Copy indexes ({cache key: SearchIndex}; default every domain and stack index, built now) into one new segment"""
+    if indexes is None:
+        indexes = {}
+        for _, config in core._all_configs():
+            filepath = core.DATA_DIR / config["file"]
+            key = core._index_key(filepath, config["search_cols"], config.get("field_boosts"))
+            indexes[key] = SearchIndex(filepath, config["search_cols"], config.get("field_boosts"))
+    layout = _Layout()
+    entries = [_entry(key, index, layout) for key, index in indexes.items()]
+    header = pickle.dumps({"version": LAYOUT_VERSION, "indexes": entries}, protocol=pickle.HIGHEST_PROTOCOL)
+    base = (8 + len(header) + ALIGN - 1) // ALIGN * ALIGN
+
+    shm = shared_memory.SharedMemory(create=True, size=max(base + layout.size, 1))
+    try:
+        shm.buf[:8] = len(header).to_bytes(8, "little")
+        shm.buf[8:8 + len(header)] = header
+        for offset, raw in layout.parts:
+            shm.buf[base + offset:base + offset + raw.nbytes] = raw
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    shared = SharedIndexes(shm, len(entries))
+    _PUBLISHED.append(shared)
+    return shared
+
+
+def _open(name):
+    """Attach to a segment without handing it to a resource tracker that would unlink it when this process exits"""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    from multiprocessing import resource_tracker
+    # A multiprocessing child shares its parent's tracker, where registering again is harmless;
+    # any other process starts its own tracker here, which must not own the segment
+    own_tracker = os.name == "posix" and getattr(resource_tracker._resource_tracker, "_fd", None) is None
+    shm = shared_memory.SharedMemory(name)
+    if own_tracker:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+def attach(name, install=True):
+    """Map a published segment read-only; returns {cache key: SharedIndex}, installed in core's cache unless install is False"""
+    segment = _Segment(_open(name))
+    try:
+        size = int.from_bytes(segment.buf[:8], "little")
+        manifest = pickle.loads(segment.buf[8:8 + size])
+        if manifest.get("version") != LAYOUT_VERSION:
+            raise ValueError(f"{name}: layout version {manifest.get('version')}, expected {LAYOUT_VERSION}")
+        base = (8 + size + ALIGN - 1) // ALIGN * ALIGN
+        indexes = {}
+        for entry in manifest["indexes"]:
+            arrays = {field: segment.view(base + offset, fmt, count)
+                      for field, (offset, fmt, count) in entry["arrays"].items()}
+            indexes[entry["key"]] = SharedIndex(entry, arrays)
+    except BaseException:
+        segment.close()
+        raise
+    _ATTACHED.append(segment)
+    if install:
+        for index in indexes.values():
+            core._INDEX_BUILDS.labels(index.label, "shared").inc()
+        with core._INDEX_LOCK:
+            core._INDEX_CACHE.update(indexes)
+    return indexes
+
+
+@atexit.register
+def _shutdown():
+    """Unlink what this process published and unmap what it attached"""
+    while _PUBLISHED:
+        _PUBLISHED.pop().close()
+    while _ATTACHED:
+        _ATTACHED.pop().close()
+
+
+# ============ MEASUREMENT ============
+def _memory():
+    """This process's resident, proportional and private KiB (Linux; elsewhere peak resident only)"""
+    try:
+        with open("/proc/self/smaps_rollup", encoding="ascii") as f:
+            fields = dict(line.split(":", 1) for line in f if line[:1].isalpha() and ":" in line)
+    except OSError:
+        import resource
+        return {"rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    kib = lambda name: int(fields[name].split()[0])
+    return {"rss_kb": kib("Rss"), "pss_kb": kib("Pss"), "private_kb": kib("Private_Clean") + kib("Private_Dirty")}
+
+
+def _measure_worker(name, results, done):
+    """Run MEASURE_QUERIES on every index (attaching first when name is set), report memory, wait"""
+    if name:
+        attach(name)
+    for _, config in core._all_configs():
+        for query in MEASURE_QUERIES:
+            core._search_csv(config, query, core.MAX_RESULTS)
+    results.put(_memory())
+    done.wait()
+
+
+def measure(workers, shared=True):
+    """Mean per-worker memory with `workers` live workers that have searched every index"""
+    import multiprocessing
+    context = multiprocessing.get_context("spawn")
+    results, done = context.Queue(), context.Event()
+    published = publish() if shared else None
+    try:
+        processes = [context.Process(target=_measure_worker, args=(published and published.name, results, done))
+                     for _ in range(workers)]
+        for process in processes:
+            process.start()
+        samples = [results.get() for _ in processes]
+        done.set()
+        for process in processes:
+            process.join()
+    finally:
+        if published:
+            published.close()
+    report = {key: round(sum(s[key] for s in samples) / len(samples)) for key in samples[0]}
+    report.update({"workers": workers, "mode": "shared" if shared else "private",
+                   "segment_kb": round(published.size / 1024) if published else 0})
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max shared-memory indexes")
+    parser.add_argument("--serve", action="store_true", help="Publish every index, print the segment name and hold it until interrupted")
+    parser.add_argument("--measure", metavar="N,N", default=None, help="Per-worker memory with N workers, private indexes vs shared (e.g. 1,2,4)")
+    parser.add_argument("--json", action="store_true", help="Print --measure results as JSON")
+    args = parser.parse_args()
+    if not (args.serve or args.measure):
+        parser.error("one of --serve or --measure is required")
+
+    if args.serve:
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        with publish() as shared:
+            print(f"UI_PRO_MAX_SHARED_INDEX={shared.name}  ({shared.indexes} indexes, {shared.size / 1024:,.1f} KiB)", flush=True)
+            try:
+                if hasattr(signal, "pause"):
+                    signal.pause()
+                else:
+                    input()
+            except KeyboardInterrupt:
+                pass
+    else:
+        counts = [int(n) for n in args.measure.split(",") if n.strip()]
+        rows = [measure(n, shared) for n in counts for shared in (False, True)]
+        if args.json:
+            import json
+            print(json.dumps(rows, indent=2))
+        else:
+            print("## Per-worker memory (KiB, mean)\n")
+            print(f"{'workers':>8} {'mode':>8} {'rss':>10} {'pss':>10} {'private':>10} {'segment':>10}")
+            for row in rows:
+                print(f"{row['workers']:>8} {row['mode']:>8} {row['rss_kb']:>10} {row.get('pss_kb', '-'):>10} "
+                      f"{row.get('private_kb', '-'):>10} {row['segment_kb']:>10}")
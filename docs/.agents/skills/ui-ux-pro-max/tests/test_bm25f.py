@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+BM25F scoring - per-field normalisation and boosts against a hand-computed
+score, single-field parity with BM25, and the design system's style re-rank
+against the reasoning rules' priorities.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import csv
+import math
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import BM25, BM25F, _bitset
+from design_system import DesignSystemGenerator
+
+
+DOCS = [
+    ["Glassmorphism", "frosted glass blur translucent layers"],
+    ["Minimalism", "clean simple whitespace glassmorphism accents"],
+    ["Dark Mode", "dark theme glass panels glass glass"],
+]
+
+
+class BM25FTest(unittest.TestCase):
+    def test_matches_hand_computed_score(self):
+        bm25 = BM25F([3.0, 1.0])
+        bm25.fit(DOCS)
+        k1, b = bm25.k1, bm25.b
+        fields = [[BM25.tokenize(text) for text in doc] for doc in DOCS]
+        avg = [sum(len(doc[f]) for doc in fields) / len(fields) for f in range(2)]
+        for idx, doc in enumerate(fields):
+            expected = 0.0
+            for token in ("glassmorphism", "glass"):
+                tf = sum(boost * doc[f].count(token) / (1 - b + b * len(doc[f]) / avg[f])
+                         for f, boost in enumerate([3.0, 1.0]))
+                df = sum(token in d[0] + d[1] for d in fields)
+                idf = math.log((len(fields) - df + 0.5) / (df + 0.5) + 1)
+                expected += idf * tf * (k1 + 1) / (tf + k1)
+            with self.subTest(row=idx):
+                self.assertTrue(math.isclose(dict(bm25.score("glassmorphism glass"))[idx], expected))
+
+    def test_boosted_field_outranks_a_long_one(self):
+        bm25 = BM25F([3.0, 1.0])
+        bm25.fit(DOCS)
+        flat = BM25F([1.0, 1.0])
+        flat.fit(DOCS)
+        boosted, even = dict(bm25.score("glassmorphism")), dict(flat.score("glassmorphism"))
+        self.assertEqual(bm25.score("glassmorphism")[0][0], 0)
+        self.assertGreater(boosted[0] / boosted[1], even[0] / even[1])
+
+    def test_single_field_equals_bm25(self):
+        rng = random.Random(0)
+        words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta"]
+        docs = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 12))) for _ in range(40)]
+        plain, fielded = BM25(), BM25F([1.0])
+        plain.fit(docs)
+        fielded.fit([[doc] for doc in docs])
+        for query in ("alpha", "beta gamma", "zeta zeta epsilon", "missing"):
+            with self.subTest(query=query):
+                got, expected = fielded.score(query), plain.score(query)
+                self.assertEqual([idx for idx, _ in got], [idx for idx, _ in expected])
+                for (_, a), (_, e) in zip(got, expected):
+                    self.assertTrue(math.isclose(a, e, abs_tol=1e-12))
+
+    def test_candidates_restrict_scoring(self):
+        bm25 = BM25F([3.0, 1.0])
+        bm25.fit(DOCS)
+        self.assertEqual([idx for idx, _ in bm25.score("glass", _bitset([0, 2], 3))], [2, 0])
+
+
+class StylePriorityTest(unittest.TestCase):
+    def test_top_priority_style_ranks_first(self):
+        generator = DesignSystemGenerator()
+        styles = {row["Style Category"] for row in core._config_index(core.CSV_CONFIG["style"]).rows}
+        with open(core.DATA_DIR / "ui-reasoning.csv", encoding="utf-8") as f:
+            rules = list(csv.DictReader(f))
+        checked = 0
+        for rule in rules:
+            priorities = [s.strip() for s in rule["Style_Priority"].split("+")]
+            if priorities[0] not in styles:
+                continue
+            checked += 1
+            top = generator._multi_domain_search(rule["UI_Category"], priorities, ["style"])["style"]["results"][0]
+            with self.subTest(category=rule["UI_Category"]):
+                self.assertEqual(top["Style Category"], priorities[0])
+        self.assertGreater(checked, 50)
+
+
+if __name__ == "__main__":
+    unittest.main()
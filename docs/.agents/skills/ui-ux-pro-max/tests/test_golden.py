@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Golden rankings under the test runner - every engine in golden.py against the
+brute-force BM25F reference, a record/check round trip, and the comparison
+helpers flagging what they should.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import copy
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import golden
+
+
+class GoldenTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = golden.run()
+
+    def test_every_engine_matches_the_reference(self):
+        self.assertGreater(self.result["queries"], 1000)
+        self.assertEqual(self.result["failures"], [])
+
+    def test_recorded_golden_round_trip(self):
+        recorded = self.result["golden"]
+        self.assertEqual(golden.run(engines=[], golden=recorded)["failures"], [])
+        tampered = copy.deepcopy(recorded)
+        query, top = next((q, top) for q, top in tampered["style"].items() if len(top) > 1)
+        top[0], top[1] = top[1], top[0]
+        failures = golden.run(engines=[], golden=tampered)["failures"]
+        self.assertTrue(failures)
+        self.assertEqual({(f["engine"], f["index"], f["query"]) for f in failures}, {("golden", "style", query)})
+
+
+class HelpersTest(unittest.TestCase):
+    def test_tie_break_errors(self):
+        self.assertEqual(golden.tie_break_errors([(0, 2.0), (3, 1.0), (5, 1.0), (1, 0.0), (0, 0.0)]), [])
+        self.assertEqual(len(golden.tie_break_errors([(5, 1.0), (3, 1.0)])), 1)  # equal scores out of row order
+        self.assertEqual(len(golden.tie_break_errors([(0, 1.0), (1, 2.0)])), 1)  # score order
+        # Scores equal to SCORE_DIGITS places are ties: row order decides, not the last digits
+        self.assertEqual(golden.tie_break_errors([(3, 1.0), (5, 1.0 + 1e-12)]), [])
+        self.assertEqual(len(golden.tie_break_errors([(5, 1.0 + 1e-12), (3, 1.0)])), 1)
+
+    def test_differences(self):
+        expected = [("1", 2.0), ("2", 1.0)]
+        self.assertEqual(golden.differences(expected, list(expected)), [])
+        self.assertEqual(len(golden.differences(expected, [("2", 1.0), ("1", 2.0)])), 2)
+        self.assertEqual(len(golden.differences(expected, [("1", 2.0)])), 1)
+        self.assertEqual(len(golden.differences(expected, [("1", 2.0), ("2", 1.1)])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ranking cache and paging - SearchIndex.ranking's LRU and its hit/miss counts
+under concurrent misses, one filter mask per miss, and offset/fields paging.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import threading
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, RANKING_CACHE_SIZE, SearchIndex, search
+
+
+def style_index():
+    config = CSV_CONFIG["style"]
+    return SearchIndex(core.DATA_DIR / config["file"], config["search_cols"], config.get("field_boosts"))
+
+
+class RankingCacheTest(unittest.TestCase):
+    def test_hits_reuse_the_entry(self):
+        index = style_index()
+        hits, misses = index._hits.value, index._misses.value
+        entry = index.ranking("glassmorphism dark")
+        self.assertIs(index.ranking("glassmorphism dark"), entry)
+        self.assertIsNot(index.ranking("glassmorphism dark", filters={"Type": "General"}), entry)
+        self.assertEqual((index._hits.value - hits, index._misses.value - misses), (1, 2))
+
+    def test_least_recently_used_is_evicted(self):
+        index = style_index()
+        first = index.ranking("query 0")
+        for i in range(1, RANKING_CACHE_SIZE + 1):
+            index.ranking(f"query {i}")
+        self.assertEqual(len(index._rankings), RANKING_CACHE_SIZE)
+        self.assertIsNot(index.ranking("query 0"), first)
+
+    def test_concurrent_misses_are_all_counted(self):
+        index = style_index()
+        misses = index._misses.value
+        threads = [threading.Thread(target=lambda n=n: [index.ranking(f"minimal {n} {i}", 0) for i in range(20)])
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(index._misses.value - misses, 160)
+
+    def test_one_filter_mask_per_miss(self):
+        index = style_index()
+        calls = []
+        real = index.filter_mask
+        index.filter_mask = lambda filters: calls.append(filters) or real(filters)
+        index.ranking("glasmorphism", filters={"Type": "General"})  # corrected, so scored twice
+        index.ranking("glasmorphism", filters={"Type": "General"})
+        self.assertEqual(len(calls), 1)
+
+
+class PagingTest(unittest.TestCase):
+    def test_pages_tile_the_full_ranking(self):
+        full = search("minimal clean", "style", max_results=9)["results"]
+        pages, offset = [], 0
+        while offset is not None and offset < 9:
+            page = search("minimal clean", "style", max_results=3, offset=offset)
+            pages += page["results"]
+            offset = page.get("next_offset")
+        self.assertEqual(pages, full)
+
+    def test_fields(self):
+        result = search("minimal clean", "style", max_results=2, fields=["Style Category", "Era/Origin"])
+        self.assertEqual([list(row) for row in result["results"]], [["Style Category", "Era/Origin"]] * 2)
+        self.assertIn("error", search("minimal clean", "style", fields=["Nope"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared-memory indexes - the open-addressing string hash tables (CRC32,
+linear probing) read by every shared lookup, and a publish/attach round trip.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from zlib import crc32
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+import shared_index
+from core import CSV_CONFIG, SearchIndex
+from shared_index import _Column, _Keys, _key_table
+
+# Two keys with the same full CRC32: only comparing the stored bytes tells them apart
+CRC_TWINS = ("key5408826", "key10004200")
+
+
+def keys(words):
+    blob, offsets, table = _key_table(words)
+    return _Keys(bytes(blob), offsets, table)
+
+
+def same_start(mask, start, count, exclude=()):
+    """count keys whose probe starts at slot start in a table of mask + 1 slots"""
+    found, i = [], 0
+    while len(found) < count:
+        key = f"k{i}"
+        if crc32(key.encode()) & mask == start and key not in exclude:
+            found.append(key)
+        i += 1
+    return found
+
+
+class KeyTableTest(unittest.TestCase):
+    def test_table_size(self):
+        for n in (0, 1, 4, 5, 100):
+            _, offsets, table = _key_table([f"w{i}" for i in range(n)])
+            self.assertEqual(len(offsets), n + 1)
+            self.assertGreaterEqual(len(table), max(8, 2 * n))
+            self.assertEqual(len(table) & (len(table) - 1), 0)  # power of two, so & mask wraps
+            self.assertEqual(sorted(s for s in table if s >= 0), list(range(n)))
+
+    def test_every_key_at_its_slot(self):
+        words = [f"term{i}" for i in range(1000)] + ["naïve", "ümlaut", "\ud800"]
+        table = keys(words)
+        self.assertEqual(len(table), len(words))
+        self.assertEqual(list(table), words)
+        for slot, word in enumerate(words):
+            self.assertEqual(table.slot(word), slot)
+            self.assertEqual(table.key(slot), word)
+
+    def test_full_crc32_collision(self):
+        a, b = CRC_TWINS
+        self.assertEqual(crc32(a.encode()), crc32(b.encode()))
+        table = keys(["other", a, b])
+        self.assertEqual((table.slot(a), table.slot(b), table.slot("other")), (1, 2, 0))
+        self.assertEqual(keys([b, a]).slot(a), 1)
+
+    def test_probing_wraps_past_the_last_slot(self):
+        colliding = same_start(7, 7, 3)
+        blob, offsets, table = _key_table(colliding)
+        self.assertEqual(len(table), 8)
+        self.assertEqual([table[7], table[0], table[1]], [0, 1, 2])
+        lookup = _Keys(bytes(blob), offsets, table)
+        self.assertEqual([lookup.slot(k) for k in colliding], [0, 1, 2])
+
+    def test_absent_keys(self):
+        colliding = same_start(7, 3, 3)
+        table = keys(colliding)
+        # Starts inside the cluster and walks it to the empty slot after it
+        self.assertEqual(table.slot(same_start(7, 3, 1, exclude=colliding)[0]), -1)
+        self.assertEqual(table.slot("missing"), -1)
+        self.assertEqual(table.slot(""), -1)
+        self.assertEqual(keys([CRC_TWINS[0]]).slot(CRC_TWINS[1]), -1)
+        self.assertEqual(keys([]).slot("anything"), -1)
+
+    def test_last_lookup_memo(self):
+        table = keys(["alpha", "beta", "gamma"])
+        for key, slot in [("beta", 1), ("beta", 1), ("delta", -1), ("alpha", 0), ("delta", -1), ("gamma", 2)]:
+            self.assertEqual(table.slot(key), slot)
+
+
+class ColumnTest(unittest.TestCase):
+    def test_mapping(self):
+        from array import array
+        column = _Column(keys(["a1", "b2", "c3"]), array("d", [0.5, 1.5, 2.5]))
+        self.assertEqual(dict(column), {"a1": 0.5, "b2": 1.5, "c3": 2.5})
+        self.assertEqual(column.get("b2"), 1.5)
+        self.assertIsNone(column.get("zz"))
+        self.assertNotIn("zz", column)
+        with self.assertRaises(KeyError):
+            column["zz"]
+
+
+class RoundTripTest(unittest.TestCase):
+    def test_shared_index_matches_the_original(self):
+        config = CSV_CONFIG["ux"]
+        index = SearchIndex(core.DATA_DIR / config["file"], config["search_cols"], config.get("field_boosts"))
+        with shared_index.publish({"ux": index}) as published:
+            shared = shared_index.attach(published.name, install=False)["ux"]
+            self.assertEqual(list(shared.rows), index.rows)
+            self.assertEqual(dict(shared.row_ids), index.row_ids)
+            self.assertNotIn("no such row", shared.row_ids)
+            for query in ("touch target mobile", "animation accessibility", "xyzzy", ""):
+                self.assertEqual(shared.bm25.score(query), index.bm25.score(query))
+            self.assertEqual(shared.speller.correct("acessibility"), index.speller.correct("acessibility"))
+
+
+if __name__ == "__main__":
+    unittest.main()
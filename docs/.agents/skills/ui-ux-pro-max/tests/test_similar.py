@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+More like this - the neighbour lists built with the index against a brute-force
+cosine over the term vectors, and similar()'s error dicts and projection.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import math
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, SIMILAR_TOP_N, SearchIndex, similar
+
+
+class NeighboursTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config = CSV_CONFIG["style"]
+        cls.index = SearchIndex(core.DATA_DIR / config["file"], config["search_cols"], config.get("field_boosts"), True)
+
+    def test_built_with_the_index(self):
+        self.assertIsNotNone(self.index._neighbours)
+        config = CSV_CONFIG["ux"]
+        self.assertIsNone(SearchIndex(core.DATA_DIR / config["file"], config["search_cols"])._neighbours)
+
+    def test_matches_brute_force_cosine(self):
+        vectors = self.index.vectors
+        for idx, vec in enumerate(vectors):
+            dots = [(other, sum(weight * vectors[other].get(word, 0.0) for word, weight in vec.items()))
+                    for other in range(len(vectors)) if other != idx]
+            expected = sorted(((o, s) for o, s in dots if s > 0), key=lambda x: (-x[1], x[0]))[:SIMILAR_TOP_N]
+            got = self.index.neighbours[idx]
+            with self.subTest(row=idx):
+                self.assertEqual([o for o, _ in got], [o for o, _ in expected])
+                for (_, a), (_, b) in zip(got, expected):
+                    self.assertTrue(math.isclose(a, b, rel_tol=1e-9))
+
+
+class SimilarTest(unittest.TestCase):
+    def test_by_title_and_id(self):
+        by_title = similar("style", "Glassmorphism", 3)
+        self.assertEqual(by_title["count"], 3)
+        self.assertEqual(similar("style", by_title["row_id"], 3)["results"], by_title["results"])
+        self.assertNotIn("Glassmorphism", [row["Style Category"] for row in by_title["results"]])
+        scores = [row["Similarity"] for row in by_title["results"]]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+
+    def test_k_below_one_is_an_error(self):
+        for k in (0, -2):
+            with self.subTest(k=k):
+                self.assertIn("error", similar("style", "Glassmorphism", k))
+
+    def test_fields(self):
+        result = similar("style", "Glassmorphism", 2, fields=["Style Category", "Keywords"])
+        self.assertEqual([list(row) for row in result["results"]], [["Style Category", "Keywords", "Similarity"]] * 2)
+        self.assertEqual(similar("style", "Glassmorphism", fields=["Nope"])["error"], "Unknown field for style: Nope")
+
+    def test_unknown_row_or_domain(self):
+        self.assertIn("error", similar("style", "No Such Style"))
+        self.assertIn("error", similar("nope", "Glassmorphism"))
+
+
+if __name__ == "__main__":
+    unittest.main()
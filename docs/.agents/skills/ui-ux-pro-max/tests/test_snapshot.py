@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index snapshots - a write_snapshot() file loads only the indexes a call needs,
+ranks exactly like freshly built indexes, and is ignored for CSVs changed since.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS))
+
+import core
+from core import search, search_stack, similar
+
+QUERIES = [("glassmorphism dark", "style"), ("saas", "color"), ("hero pricing", "landing"), ("touch target", "ux")]
+
+
+def builds(reason):
+    return sum(series.value for (_, r), series in core._INDEX_BUILDS.series.items() if r == reason)
+
+
+class SnapshotTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.original = core.DATA_DIR
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.data = Path(cls.tmp.name) / "data"
+        shutil.copytree(cls.original, cls.data)
+        cls.path = Path(cls.tmp.name) / "indexes.snap"
+        core.set_data_dir(cls.data)
+        cls.fresh = {q: search(q, d, max_results=5) for q, d in QUERIES}
+        cls.report = core.write_snapshot(cls.path, lazy=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        core.use_snapshot(None)
+        core.set_data_dir(cls.original)
+        cls.tmp.cleanup()
+
+    def setUp(self):
+        core.set_data_dir(self.data)  # empty every cache
+        core.use_snapshot(self.path)
+
+    def tearDown(self):
+        core.use_snapshot(None)
+
+    def test_written_for_every_index(self):
+        self.assertEqual(self.report["indexes"], len(core._all_configs()))
+        self.assertEqual(self.report["bytes"], self.path.stat().st_size)
+
+    def test_loads_only_what_is_asked_for(self):
+        before, built = builds("snapshot"), builds("first")
+        search("glassmorphism dark", "style")
+        search_stack("state", "react")
+        self.assertEqual(builds("snapshot") - before, 2)
+        self.assertEqual(builds("first"), built)
+        self.assertEqual(len(core._INDEX_CACHE), 2)
+
+    def test_ranks_like_a_fresh_build(self):
+        for query, domain in QUERIES:
+            with self.subTest(query=query):
+                self.assertEqual(search(query, domain, max_results=5), self.fresh[query])
+
+    def test_lazy_state_is_stored(self):
+        index = core._config_index(core.CSV_CONFIG["style"])
+        self.assertIsNotNone(index._neighbours)
+        self.assertIsNotNone(index._vectors)
+        self.assertEqual(similar("style", "Glassmorphism", 3)["count"], 3)
+
+    def test_changed_csv_is_rebuilt(self):
+        csv = self.data / core.CSV_CONFIG["ux"]["file"]
+        stat = csv.stat()
+        os.utime(csv, (stat.st_atime, stat.st_mtime + 10))
+        try:
+            before, built = builds("snapshot"), builds("first")
+            search("touch target", "ux")
+            search("glassmorphism", "style")
+            self.assertEqual((builds("snapshot") - before, builds("first") - built), (1, 1))
+        finally:
+            os.utime(csv, (stat.st_atime, stat.st_mtime))
+
+    def test_version_mismatch(self):
+        stale = Path(self.tmp.name) / "stale.snap"
+        header = pickle.dumps({"version": core.SNAPSHOT_VERSION - 1, "entries": {}})
+        stale.write_bytes(len(header).to_bytes(8, "little") + header)
+        with self.assertRaises(ValueError):
+            core.Snapshot(stale)
+
+    def test_cli_snapshot_flag(self):
+        def run(*extra):
+            return subprocess.run([sys.executable, str(SCRIPTS / "search.py"), "glassmorphism dark", "-d", "style", *extra],
+                                  capture_output=True, text=True, check=True).stdout
+        snap = Path(self.tmp.name) / "shipped.snap"
+        core.set_data_dir(self.original)
+        core.write_snapshot(snap)
+        self.assertEqual(run("--snapshot", str(snap)), run())
+
+
+if __name__ == "__main__":
+    unittest.main()
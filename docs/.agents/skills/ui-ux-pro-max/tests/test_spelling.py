@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Spelling correction - OSA edit distance, the SymSpell delete dictionary and
+which query tokens SearchIndex.correct_query rewrites.
+
+Usage:
+    python -m unittest discover -s tests      # from the skill directory
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import core
+from core import CSV_CONFIG, SearchIndex, SymSpell, _edit_distance
+
+
+def osa(a, b):
+    """Textbook optimal string alignment distance, no cut-off"""
+    d = [[i + j if i * j == 0 else 0 for j in range(len(b) + 1)] for i in range(len(a) + 1)]
+    for i in range(1, len(a) + 1):
+        for j in range(1, len(b) + 1):
+            d[i][j] = min(d[i - 1][j] + 1, d[i][j - 1] + 1, d[i - 1][j - 1] + (a[i - 1] != b[j - 1]))
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                d[i][j] = min(d[i][j], d[i - 2][j - 2] + 1)
+    return d[len(a)][len(b)]
+
+
+class EditDistanceTest(unittest.TestCase):
+    def test_basic_edits(self):
+        self.assertEqual(_edit_distance("glass", "glass", 2), 0)
+        self.assertEqual(_edit_distance("glass", "class", 2), 1)   # substitution
+        self.assertEqual(_edit_distance("glass", "gloss", 2), 1)
+        self.assertEqual(_edit_distance("glass", "glas", 2), 1)    # deletion
+        self.assertEqual(_edit_distance("glas", "glass", 2), 1)    # insertion
+        self.assertEqual(_edit_distance("", "ab", 2), 2)
+
+    def test_adjacent_transposition_costs_one(self):
+        self.assertEqual(_edit_distance("ab", "ba", 2), 1)
+        self.assertEqual(_edit_distance("glass", "glsas", 2), 1)
+        self.assertEqual(_edit_distance("dashboard", "dahsboard", 2), 1)
+        self.assertEqual(_edit_distance("minimalism", "imnimalims", 2), 2)
+
+    def test_restricted_transposition(self):
+        # OSA edits no substring twice: "ca" -> "abc" is 3, where unrestricted Damerau gives 2
+        self.assertEqual(_edit_distance("ca", "abc", 3), 3)
+
+    def test_cut_off(self):
+        self.assertEqual(_edit_distance("abcdef", "uvwxyz", 2), 3)
+        self.assertEqual(_edit_distance("ab", "abcdef", 2), 3)     # length gap alone exceeds it
+        self.assertEqual(_edit_distance("glass", "glossy", 1), 2)
+
+    def test_matches_reference_on_random_strings(self):
+        rng = random.Random(0)
+        for _ in range(2000):
+            a = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+            b = "".join(rng.choice("abc") for _ in range(rng.randint(0, 6)))
+            expected = osa(a, b)
+            for max_distance in (1, 2, 3):
+                with self.subTest(a=a, b=b, max_distance=max_distance):
+                    self.assertEqual(_edit_distance(a, b, max_distance), min(expected, max_distance + 1))
+                    self.assertEqual(_edit_distance(b, a, max_distance), min(expected, max_distance + 1))
+
+
+class SymSpellTest(unittest.TestCase):
+    def setUp(self):
+        self.speller = SymSpell({"glassmorphism": 5, "minimalism": 9, "dashboard": 7, "dashboards": 2,
+                                 "brutalism": 3, "animation": 4, "animations": 4})
+
+    def test_corrects_within_distance(self):
+        self.assertEqual(self.speller.correct("glasmorphism"), "glassmorphism")
+        self.assertEqual(self.speller.correct("glsasmorphism"), "glassmorphism")  # transposition
+        self.assertEqual(self.speller.correct("minimalsm"), "minimalism")
+        self.assertEqual(self.speller.correct("dashbord"), "dashboard")
+
+    def test_nothing_close_enough(self):
+        self.assertIsNone(self.speller.correct("xyzzyplugh"))
+        self.assertIsNone(self.speller.correct("glasmorphism", 0))
+
+    def test_short_tokens_are_left_alone(self):
+        self.assertIsNone(SymSpell({"form": 1}).correct("from"))
+
+    def test_ties_prefer_frequency_then_alphabetical(self):
+        self.assertEqual(SymSpell({"colour": 1, "colours": 5}).correct("colourz"), "colours")
+        self.assertEqual(self.speller.correct("animationz"), "animation")  # equal frequency: alphabetical
+
+
+class CorrectQueryTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        config = CSV_CONFIG["style"]
+        cls.index = SearchIndex(core.DATA_DIR / config["file"], config["search_cols"], config.get("field_boosts"))
+
+    def test_words_known_elsewhere_are_kept(self):
+        for query in ("booking form", "banking", "modal dialog", "tooltip breadcrumb"):
+            with self.subTest(query=query):
+                self.assertEqual(self.index.correct_query(query), (query, {}))
+
+    def test_typos_are_corrected(self):
+        self.assertEqual(self.index.correct_query("glasmorphism dark"),
+                         ("glassmorphism dark", {"glasmorphism": "glassmorphism"}))
+
+    def test_distance_zero_leaves_the_query(self):
+        self.assertEqual(self.index.correct_query("glasmorphism", 0), ("glasmorphism", {}))
+
+    def test_speller_built_with_the_index(self):
+        self.assertIsInstance(self.index.speller, SymSpell)
+        self.assertEqual(set(self.index.speller.frequencies), set(self.index.bm25.idf))
+
+    def test_union_vocabulary_covers_every_index(self):
+        vocabulary = core._vocabulary()
+        self.assertIs(core._vocabulary(), vocabulary)  # built once, then a set lookup
+        for name, config in core._all_configs():
+            with self.subTest(index=name):
+                self.assertLessEqual(set(core._term_stats(config).idf), set(vocabulary))
+        self.assertNotIn("glasmorphism", vocabulary)
+
+
+if __name__ == "__main__":
+    unittest.main()